@@ -1,9 +1,90 @@
+import os
 import streamlit as st
 import pandas as pd
 import io
 import plotly.express as px
-from src.preprocessing import preprocess_data
-from src.optimizer import optimize_shipping
+from src.preprocessing import preprocess_data, PO_TEMPLATE_COLUMNS, CAP_TEMPLATE_COLUMNS
+from src.jobs import JobManager, SolveRequest, run_solve_request
+from src.scenarios import penalty_grid, sweep_penalties
+from src.solver import SolverConfig
+from src.cache import ResultCache, make_cache_key
+from src.instrumentation import configure_logging
+from src.results_view import ResultFilter, ResultsView
+
+
+INPUT_FILE_TYPES = ["csv", "parquet", "arrow", "feather"]
+
+
+@st.cache_resource
+def get_result_cache():
+    # One cache per server process, shared by all sessions; set OPTIMIZER_CACHE_DIR to
+    # also keep results on disk across restarts
+    return ResultCache(max_entries=32, cache_dir=os.environ.get("OPTIMIZER_CACHE_DIR"))
+
+
+@st.cache_resource
+def get_job_manager():
+    # Background solves of all sessions share one pool of OPTIMIZER_JOB_WORKERS worker
+    # processes; a job whose page stops polling for 5 minutes is cancelled
+    return JobManager(max_workers=int(os.environ.get("OPTIMIZER_JOB_WORKERS", 2)), abandon_after=300)
+
+
+def store_results(results_df, cap_df, solve_info, bad_rows, plan=None, from_cache=False):
+    st.session_state["results_df"] = results_df
+    st.session_state["solve_info"] = solve_info
+    if not from_cache:
+        st.session_state["plan"] = plan
+    st.session_state["from_cache"] = from_cache
+    st.session_state["cap_df"] = cap_df
+    st.session_state["bad_rows"] = bad_rows
+    # Filter indexes and aggregations are built once per solve, not on every rerun
+    st.session_state["results_view"] = ResultsView(results_df, cap_df)
+
+
+@st.fragment(run_every=1.0)
+def show_job_progress():
+    # Poll the session's running solve; the page reruns once it has finished
+    job_id = st.session_state.get("active_job")
+    if job_id is None:
+        return
+    manager = get_job_manager()
+    job = manager.get(job_id)
+    if job is None:
+        del st.session_state["active_job"]
+        return
+    st.session_state["jobs"][job_id].update(status=job.status, phase=job.phase, elapsed=job.elapsed)
+
+    if job.status == "done":
+        results_df, cap_df, solve_info, plan, bad_rows = job.result
+        # Derive temporal fields
+        if "Export ETA" in results_df.columns:
+            results_df['Export Date'] = pd.to_datetime(results_df["Export ETA"])
+            results_df['Export Year'] = results_df['Export Date'].dt.strftime('%Y')
+            results_df['Export YearMonth'] = results_df['Export Date'].dt.strftime('%Y-%m')
+            results_df['Export YearWeek'] = results_df['Export Date'].dt.strftime('%Y-%U')
+        get_result_cache().put(st.session_state["jobs"][job_id]["cache_key"], (results_df, cap_df, solve_info, bad_rows))
+        store_results(results_df, cap_df, solve_info, bad_rows, plan)
+        del st.session_state["active_job"]
+        manager.forget(job_id)
+        st.rerun()
+    elif job.status == "failed":
+        st.error(f"❌ Error: {job.error}")
+    elif job.status == "cancelled":
+        st.info("🛑 Optimization cancelled.")
+    else:
+        if job.status == "queued":
+            st.info(f"⏳ Waiting for a free solver (position {manager.queue_position(job_id) or 1} in queue)")
+        else:
+            phase_col, time_col, objective_col, gap_col = st.columns(4)
+            phase_col.metric("Phase", job.phase or "starting")
+            time_col.metric("Elapsed", f"{job.elapsed:.0f}s")
+            objective_col.metric("Incumbent", f"{job.objective:,.0f}" if job.objective is not None else "n/a")
+            gap_col.metric("Gap", f"{job.gap:.2%}" if job.gap is not None else "n/a")
+        if st.button("🛑 Cancel", key=f"cancel_{job_id}"):
+            manager.cancel(job_id)
+            del st.session_state["active_job"]
+            st.rerun()
+
 
 def show_dashboard():
 
@@ -15,60 +96,95 @@ def show_dashboard():
     """)
 
     # --- File Upload ---
-    po_file = st.file_uploader("Upload Purchase Order CSV", type="csv", key="po_upload")
-    cap_file = st.file_uploader("Upload Container Capacity CSV", type="csv", key="cap_upload")
+    po_file = st.file_uploader("Upload Purchase Order File", type=INPUT_FILE_TYPES, key="po_upload")
+    cap_file = st.file_uploader("Upload Container Capacity File", type=INPUT_FILE_TYPES, key="cap_upload")
 
     # --- Sidebar Config ---
     st.sidebar.header("Penalty Configuration")
     late_penalty_per_day = st.sidebar.number_input("Late Penalty per Day", value=2, min_value=0, key="late_penalty_per_day", help="Cost per day for late delivery")
     priority_multiplier = st.sidebar.number_input("Priority Multiplier", value=2, min_value=1, key="priority_multiplier")
 
+    st.sidebar.header("Solver Configuration")
+    engine = st.sidebar.radio("Engine", ["MIP (optimal)", "Greedy heuristic"], key="engine", help="The greedy heuristic answers in about a second without an optimality guarantee")
+    seed_with_greedy = st.sidebar.checkbox("Seed MIP with greedy solution", key="seed_with_greedy", disabled=engine != "MIP (optimal)")
+    solver_backend = st.sidebar.selectbox("Solver", ["CBC", "HiGHS", "HiGHS-Direct"], key="solver_backend", help="HiGHS-Direct passes the model to HiGHS as arrays, skipping PuLP model building")
+    time_limit = st.sidebar.number_input("Time Limit (seconds)", value=120, min_value=1, key="time_limit", help="Stop the solve and keep the best solution found so far")
+    mip_gap = st.sidebar.number_input("Relative MIP Gap", value=0.0, min_value=0.0, max_value=1.0, step=0.01, format="%.3f", key="mip_gap", help="Stop once the solution is proven within this fraction of optimal")
+    threads = st.sidebar.number_input("Threads", value=1, min_value=1, key="threads")
+    relax_and_round = st.sidebar.checkbox("LP relaxation + rounding", key="relax_and_round", disabled=engine != "MIP (optimal)", help="Solve the LP relaxation, round it and re-solve only the fractional part; the gap is reported against the LP bound")
+    decompose_lanes = st.sidebar.checkbox("Solve lanes in parallel", key="decompose_lanes", help="Split the model per (From Port, To Port) lane and solve the lanes in worker processes")
+    lane_workers = st.sidebar.number_input("Parallel Workers", value=4, min_value=1, key="lane_workers", disabled=not decompose_lanes)
+    rolling_horizon = st.sidebar.checkbox("Rolling horizon", key="rolling_horizon", help="Solve a few departure weeks at a time, keep the first weeks' assignments and carry the rest forward")
+    window_weeks = st.sidebar.number_input("Window (weeks)", value=4, min_value=1, key="window_weeks", disabled=not rolling_horizon)
+    commit_weeks = st.sidebar.number_input("Commit (weeks)", value=1, min_value=1, max_value=int(window_weeks), key="commit_weeks", disabled=not rolling_horizon)
+    use_warm_start = st.sidebar.checkbox("Warm start from previous results", key="use_warm_start", disabled="results_df" not in st.session_state)
+    incremental = st.sidebar.checkbox("Re-solve changed lanes only", key="incremental", disabled="plan" not in st.session_state, help="Keep the previous solution on lanes whose PO lines and containers did not change")
+    chunked_ingest = st.sidebar.checkbox("Skip invalid PO rows", key="chunked_ingest", help="Read the PO CSV in chunks and report malformed rows with their line numbers instead of failing the load")
+    log_level = st.sidebar.selectbox("Log Level", ["WARNING", "INFO", "DEBUG"], key="log_level", help="Phase timings and model size are logged to the server console at INFO")
+    configure_logging(log_level)
+
     # --- Run Optimization ---
     if st.button("Run Optimization"):
         if po_file and cap_file:
-            try:
-                po_df, cap_df = preprocess_data(po_file, cap_file)
-                results_df = optimize_shipping(po_df, cap_df, late_penalty_per_day, priority_multiplier)
-
-                # Derive temporal fields
-                if "Export ETA" in results_df.columns:
-                    results_df['Export Date'] = pd.to_datetime(results_df["Export ETA"])
-                    results_df['Export Year'] = results_df['Export Date'].dt.strftime('%Y')
-                    results_df['Export YearMonth'] = results_df['Export Date'].dt.strftime('%Y-%m')
-                    results_df['Export YearWeek'] = results_df['Export Date'].dt.strftime('%Y-%U')
-
-                st.session_state["results_df"] = results_df
-                st.session_state["cap_df"] = cap_df
-                st.session_state["po_file"] = po_file
-                st.session_state["cap_file"] = cap_file
-            except Exception as e:
-                st.error(f"❌ Error: {e}")
-                st.stop()
+            params = {
+                "late_penalty_per_day": late_penalty_per_day, "priority_multiplier": priority_multiplier,
+                "engine": engine, "solver_backend": solver_backend, "time_limit": time_limit,
+                "mip_gap": mip_gap, "threads": threads, "relax_and_round": relax_and_round,
+                "decompose_lanes": decompose_lanes,
+                "seed_with_greedy": seed_with_greedy, "rolling_horizon": rolling_horizon,
+                "window_weeks": window_weeks, "commit_weeks": commit_weeks,
+                "chunked_ingest": chunked_ingest,
+            }
+            cache_key = make_cache_key([po_file.getvalue(), cap_file.getvalue()], params)
+            # Warm-started runs depend on the previous results, so they always solve
+            cached = None if use_warm_start or incremental else get_result_cache().get(cache_key)
+
+            if cached is not None:
+                results_df, cap_df, solve_info, bad_rows = cached
+                store_results(results_df, cap_df, solve_info, bad_rows, from_cache=True)
+            else:
+                request = SolveRequest(
+                    late_penalty_per_day=late_penalty_per_day,
+                    priority_multiplier=priority_multiplier,
+                    engine="greedy" if engine == "Greedy heuristic" else "mip",
+                    solver_config=SolverConfig(
+                        backend=solver_backend.lower(), time_limit=time_limit,
+                        mip_gap=mip_gap or None, threads=threads, relax_and_round=relax_and_round, msg=False
+                    ),
+                    seed_with_greedy=seed_with_greedy,
+                    warm_start=st.session_state.get("results_df") if use_warm_start else None,
+                    plan=st.session_state.get("plan") if incremental else None,
+                    rolling_weeks=(window_weeks, commit_weeks) if rolling_horizon else None,
+                    lane_workers=lane_workers if decompose_lanes else None,
+                    chunked_ingest=chunked_ingest,
+                )
+                job_id = get_job_manager().submit(
+                    run_solve_request, io.BytesIO(po_file.getvalue()), io.BytesIO(cap_file.getvalue()),
+                    request, label=f"{po_file.name} + {cap_file.name}"
+                )
+                st.session_state.setdefault("jobs", {})[job_id] = {"cache_key": cache_key, "status": "queued"}
+                st.session_state["active_job"] = job_id
+            st.session_state["po_file"] = po_file
+            st.session_state["cap_file"] = cap_file
         else:
             st.warning("⚠️ Please upload both CSV files to continue.")
             st.stop()
 
+    show_job_progress()
+
     # Reuse cached data if available
-    if "results_df" in st.session_state and "cap_df" in st.session_state:
-        results_df = st.session_state["results_df"]
-        cap_df = st.session_state["cap_df"]
+    if "results_view" in st.session_state:
+        view = st.session_state["results_view"]
 
         # Shared filter inputs
         st.sidebar.subheader("🔍 Filters")
         filter_po = st.sidebar.text_input("Filter by PO Number (partial match)", key="filter_po")
-        filter_export_year = st.sidebar.multiselect("Filter by Export Year", options=sorted(results_df['Export Year'].dropna().unique()), key="filter_year", help="Using export ETA")
-        filter_export_yearmonth = st.sidebar.multiselect("Filter by Export YearMonth", options=sorted(results_df['Export YearMonth'].dropna().unique()), key="filter_yearmonth", help="Using export ETA")
-        filter_export_yearweek = st.sidebar.multiselect("Filter by Export YearWeek", options=sorted(results_df['Export YearWeek'].dropna().unique()), key="filter_yearweek", help="Using export ETA")
-
-        filtered_df = results_df.copy()
-        if filter_po:
-            filtered_df = filtered_df[filtered_df['PO Number'].astype(str).str.contains(filter_po)]
-        if filter_export_year:
-            filtered_df = filtered_df[filtered_df['Export Year'].isin(filter_export_year)]
-        if filter_export_yearmonth:
-            filtered_df = filtered_df[filtered_df['Export YearMonth'].isin(filter_export_yearmonth)]
-        if filter_export_yearweek:
-            filtered_df = filtered_df[filtered_df['Export YearWeek'].isin(filter_export_yearweek)]
+        filter_export_year = st.sidebar.multiselect("Filter by Export Year", options=view.options("years"), key="filter_year", help="Using export ETA")
+        filter_export_yearmonth = st.sidebar.multiselect("Filter by Export YearMonth", options=view.options("months"), key="filter_yearmonth", help="Using export ETA")
+        filter_export_yearweek = st.sidebar.multiselect("Filter by Export YearWeek", options=view.options("weeks"), key="filter_yearweek", help="Using export ETA")
+
+        state = ResultFilter(filter_po, tuple(filter_export_year), tuple(filter_export_yearmonth), tuple(filter_export_yearweek))
+        filtered_df = view.rows(state)
 
         # Sorting and grouping controls
         st.sidebar.subheader("📊 Data Display Settings")
@@ -87,84 +203,62 @@ def show_dashboard():
         sort_ascending = st.sidebar.radio("Sort Order", ["Ascending", "Descending"], key="sort_order") == "Ascending"
 
         st.success("✅ Optimization completed!")
-        st.subheader("📊 KPI Summary")
-
-        total_pos = filtered_df[["PO Number", "PO Line Number"]].drop_duplicates().shape[0]
-        used_containers = filtered_df["Shipment ID"].dropna().nunique()
-        # total_unmet = filtered_df["Unmet Qty"].sum()
-        # total_assigned = filtered_df["Qty Assigned"].sum()
-        total_unmet_value = filtered_df["COGS Value Unmet"].sum()
-        total_assigned_value = filtered_df["COGS Value Assigned"].sum()
-
-    
-        # total_late_penalty = (filtered_df["Late Days"].fillna(0) * late_penalty_per_day * (priority_multiplier ** filtered_df["Priority Level"].fillna(0))).sum()
-
-        total_cost = (
-            filtered_df["Unmet Penalty"].sum()
-            + cap_df[cap_df["Shipment ID"].isin(filtered_df["Shipment ID"].unique())]["Price (USD)"].sum()
-            + filtered_df["Late Penalty"].sum()
+        solve_info = st.session_state.get("solve_info")
+        if solve_info is not None:
+            gap_text = f"{solve_info.gap:.2%}" if solve_info.gap is not None else "n/a"
+            bound_text = f"{solve_info.best_bound:,.0f}" if solve_info.best_bound is not None else "n/a"
+            bound_label = "LP bound" if getattr(solve_info, "lp_bound", None) is not None else "Bound"
+            st.caption(
+                f"Solver: {solve_info.backend.upper()} · Status: {solve_info.status} ({solve_info.solution_status}) · "
+                f"Objective: {solve_info.objective:,.0f} · {bound_label}: {bound_text} · Gap: {gap_text} · "
+                f"Solve time: {solve_info.solve_time:.1f}s"
+            )
+        if solve_info is not None and solve_info.stats is not None:
+            with st.expander("⏱️ Run statistics"):
+                phase_df = solve_info.stats.to_frame().dropna(axis=1, how="all")
+                st.dataframe(phase_df, use_container_width=True, hide_index=True)
+                st.caption(" · ".join(f"{k.replace('_', ' ').title()}: {v:,}" for k, v in solve_info.stats.counters.items()))
+                if getattr(solve_info, "windows", None) is not None:
+                    st.dataframe(solve_info.windows, use_container_width=True, hide_index=True)
+        bad_rows = st.session_state.get("bad_rows")
+        if bad_rows is not None and not bad_rows.empty:
+            with st.expander(f"⚠️ {bad_rows['Line'].nunique():,} PO rows skipped"):
+                st.dataframe(bad_rows, use_container_width=True, hide_index=True)
+        cache_stats = get_result_cache().stats()
+        st.caption(
+            f"{'♻️ Served from result cache · ' if st.session_state.get('from_cache') else ''}"
+            f"Cache: {cache_stats['entries']} entries, {cache_stats['hits'] + cache_stats['disk_hits']} hits, "
+            f"{cache_stats['misses']} misses ({cache_stats['hit_rate']:.0%} hit rate)"
         )
+        st.subheader("📊 KPI Summary")
 
-        all_containers = set(cap_df["Shipment ID"])
-        used_containers_set = set(filtered_df["Shipment ID"].dropna())
-        # unused_containers = len(all_containers - used_containers_set)
-
+        kpis = view.kpis(state)
         col1, col2, col3, col4, col5, col6, col7, col8 = st.columns(8)
-        col1.metric("Total PO Lines", total_pos)
-        col2.metric("Used Containers", used_containers)
-        # col3.metric("Total Qty Assigned", total_assigned)
-        # col4.metric("Total Unmet Qty", total_unmet)
-        col3.metric("Total Value Assigned", f"{total_assigned_value:,.0f}")
-        col4.metric("Total Unmet Value", f"{total_unmet_value:,.0f}")
-        col5.metric("Total Unmet Penalty", f"{filtered_df["Unmet Penalty"].sum():,.0f}")
-        col6.metric("Total Late Penalty", f"{filtered_df["Late Penalty"].sum():,.0f}")
-        col7.metric("Total Container Cost", f"{cap_df[cap_df["Shipment ID"].isin(filtered_df["Shipment ID"].unique())]["Price (USD)"].sum():,.0f}")
-        col8.metric("Estimated Total Cost ($)", f"{total_cost:,.0f}")
+        col1.metric("Total PO Lines", kpis["Total PO Lines"])
+        col2.metric("Used Containers", kpis["Used Containers"])
+        col3.metric("Total Value Assigned", f"{kpis['Total Value Assigned']:,.0f}")
+        col4.metric("Total Unmet Value", f"{kpis['Total Unmet Value']:,.0f}")
+        col5.metric("Total Unmet Penalty", f"{kpis['Total Unmet Penalty']:,.0f}")
+        col6.metric("Total Late Penalty", f"{kpis['Total Late Penalty']:,.0f}")
+        col7.metric("Total Container Cost", f"{kpis['Total Container Cost']:,.0f}")
+        col8.metric("Estimated Total Cost ($)", f"{kpis['Estimated Total Cost']:,.0f}")
 
         st.subheader("📈 Visualization")
 
-        po_status = filtered_df.groupby(["PO Number", "PO Line Number"], as_index=False).agg({
-            "Qty Assigned": "sum",
-            "Unmet Qty": "sum"
-        })
-        po_status["Status"] = po_status.apply(lambda row: "Fully Met" if row["Unmet Qty"] == 0 
-                                                else ("Partially Met" if row["Qty Assigned"] > 0 else "Unmet"), axis=1)
-        st.plotly_chart(px.histogram(po_status, x="Status", title="PO Line Fulfillment Status"), use_container_width=True)
+        fulfillment = view.fulfillment(state)
+        st.plotly_chart(px.bar(fulfillment, x="Status", y="PO Lines", title="PO Line Fulfillment Status"), use_container_width=True)
 
-        carrier_summary = filtered_df.groupby(["Carrier", "PO Number"], as_index=False)["Qty Assigned"].sum()
-        st.plotly_chart(px.bar(carrier_summary, x="Carrier", y="Qty Assigned", color="PO Number",
+        st.plotly_chart(px.bar(view.carrier_summary(state), x="Carrier", y="Qty Assigned", color="PO Number",
                             title="Assigned Quantities per Carrier by PO Number"), use_container_width=True)
 
-        cogs_status = filtered_df.groupby(["PO Number", "PO Line Number", "COGS"], as_index=False).agg({
-            "Qty Assigned": "sum",
-            "Unmet Qty": "sum"
-        })
-        cogs_status["Status"] = cogs_status.apply(
-            lambda row: "Fully Met" if row["Unmet Qty"] == 0
-            else ("Partially Met" if row["Qty Assigned"] > 0 else "Unmet"),
-            axis=1
-        )
-        cogs_status["COGS Value"] = (cogs_status["Qty Assigned"] + cogs_status["Unmet Qty"]) * cogs_status["COGS"]
-
         st.plotly_chart(
-            px.pie(cogs_status.groupby("Status", as_index=False).agg({"COGS Value": "sum"}),
-                names="Status", values="COGS Value", title="COGS Breakdown by Fulfillment Status"),
+            px.pie(fulfillment, names="Status", values="COGS Value", title="COGS Breakdown by Fulfillment Status"),
             use_container_width=True
         )
 
         if "Product Family" in filtered_df.columns:
-            fam_summary = filtered_df.groupby("Product Family", as_index=False).agg({
-                "Qty Assigned": "sum",
-                "Unmet Qty": "sum",
-                "COGS": "mean"
-            })
-            fam_summary["Assigned Value"] = fam_summary["Qty Assigned"] * fam_summary["COGS"]
-            fam_summary["Unmet Value"] = fam_summary["Unmet Qty"] * fam_summary["COGS"]
-
-            fam_melted = fam_summary.melt(id_vars="Product Family", value_vars=["Assigned Value", "Unmet Value"],
-                                        var_name="Status", value_name="COGS Value")
             st.plotly_chart(
-                px.bar(fam_melted, x="Product Family", y="COGS Value", color="Status", barmode="stack",
+                px.bar(view.family_summary(state), x="Product Family", y="COGS Value", color="Status", barmode="stack",
                     title="COGS Fulfillment by Product Family"),
                 use_container_width=True
             )
@@ -173,12 +267,12 @@ def show_dashboard():
 
         if groupby_cols:
             try:
-                display_df = filtered_df.groupby(groupby_cols, as_index=False)[valid_numeric_cols].sum()
+                display_df = view.aggregate(state, groupby_cols, valid_numeric_cols)
             except Exception as e:
                 st.error(f"⚠️ Aggregation failed: {e}")
-                display_df = filtered_df.copy()
+                display_df = filtered_df
         else:
-            display_df = filtered_df.copy()
+            display_df = filtered_df
 
         if not display_df.empty and sort_by in display_df.columns:
             display_df = display_df.sort_values(by=sort_by, ascending=sort_ascending)
@@ -193,7 +287,7 @@ def show_dashboard():
         else:
             st.warning("No data available for aggregation.")
 
-        unused_df = cap_df[cap_df["Shipment ID"].isin(all_containers - used_containers_set)]
+        unused_df = view.unused_containers(state)
         st.subheader("🪣 Unused Container Details")
         st.dataframe(unused_df[[
             "Shipment ID", "Base Shipment ID", "From Port", "To Port", "Carrier",
@@ -207,6 +301,72 @@ def show_dashboard():
 
 
 
+def parse_number_list(text):
+    return [float(value) for value in text.replace(";", ",").split(",") if value.strip()]
+
+
+def show_scenario_sweep():
+    st.title("🧮 Penalty Scenario Sweep")
+
+    st.markdown("""
+    Solve the same inputs for every combination of late penalty and priority multiplier
+    and compare the resulting costs. The scenarios are solved in parallel worker processes.
+    """)
+
+    # Falls back to the files of the last dashboard run
+    po_file = st.file_uploader("Upload Purchase Order File", type=INPUT_FILE_TYPES, key="sweep_po_upload") or st.session_state.get("po_file")
+    cap_file = st.file_uploader("Upload Container Capacity File", type=INPUT_FILE_TYPES, key="sweep_cap_upload") or st.session_state.get("cap_file")
+
+    st.sidebar.header("Scenario Grid")
+    late_penalties = st.sidebar.text_input("Late Penalties per Day", value="0, 1, 2, 5, 10", key="sweep_late_penalties")
+    priority_multipliers = st.sidebar.text_input("Priority Multipliers", value="1, 2, 3", key="sweep_priority_multipliers")
+    solver_backend = st.sidebar.selectbox("Solver", ["CBC", "HiGHS"], key="sweep_solver_backend")
+    time_limit = st.sidebar.number_input("Time Limit per Scenario (seconds)", value=60, min_value=1, key="sweep_time_limit")
+    max_workers = st.sidebar.number_input("Parallel Workers", value=min(os.cpu_count() or 1, 4), min_value=1, key="sweep_workers")
+
+    if st.button("Run Sweep"):
+        if po_file is None or cap_file is None:
+            st.warning("⚠️ Please upload both CSV files to continue.")
+            st.stop()
+        try:
+            po_file.seek(0)
+            cap_file.seek(0)
+            po_df, cap_df = preprocess_data(po_file, cap_file, compact=True)
+            scenarios = penalty_grid(parse_number_list(late_penalties), parse_number_list(priority_multipliers))
+            solver_config = SolverConfig(backend=solver_backend.lower(), time_limit=time_limit, msg=False)
+            with st.spinner(f"Solving {len(scenarios)} scenarios..."):
+                st.session_state["sweep_df"] = sweep_penalties(
+                    po_df, cap_df, scenarios, solver_config=solver_config, max_workers=max_workers
+                )
+        except Exception as e:
+            st.error(f"❌ Error: {e}")
+            st.stop()
+
+    if "sweep_df" in st.session_state:
+        sweep_df = st.session_state["sweep_df"]
+        chart_df = sweep_df.dropna(subset=["Total Cost"]).assign(**{
+            "Priority Multiplier": lambda df: df["Priority Multiplier"].astype(str)
+        })
+        st.plotly_chart(
+            px.scatter(chart_df, x="Late Penalty", y="Unmet Value", color="Priority Multiplier",
+                       size="Containers Used", hover_data=["Late Penalty per Day", "Total Cost", "Container Cost"],
+                       title="Late Penalty vs Unmet Value per Scenario"),
+            use_container_width=True
+        )
+        st.plotly_chart(
+            px.line(chart_df, x="Late Penalty per Day", y="Total Cost", color="Priority Multiplier", markers=True,
+                    title="Total Cost by Late Penalty per Day"),
+            use_container_width=True
+        )
+        st.dataframe(sweep_df, use_container_width=True, hide_index=True)
+        st.download_button(
+            label="Download Scenario Table",
+            data=sweep_df.to_csv(index=False),
+            file_name="penalty_scenarios.csv",
+            mime="text/csv"
+        )
+
+
 def show_definitions():
     st.title("📘 Definitions & Assumptions")
 
@@ -236,7 +396,7 @@ def show_definitions():
     - **Constraints**:
         - Shipment date must be on or after Export ETA
         - Volume/weight must not exceed container limits
-        - Containers limited by availability (expanded into unique shipment IDs)
+        - Containers limited by availability (pooled per Base Shipment ID, then unpacked into unique shipment IDs)
 
     ## 📊 KPIs and Metrics
     - **Used Containers**: Number of containers utilized in assignments
@@ -264,46 +424,14 @@ def show_download_templates():
     Ensure your uploaded files match the expected column names and formats exactly.
     """)
 
-    # Define PO template schema
-    po_columns = [
-        ("PO Number", "str"),
-        ("PO Line Number", "int"),
-        ("SKU", "str"),
-        ("Product Name", "str"),
-        ("Product Family", "str"),
-        ("IsElectronic", "int (0 or 1)"),
-        ("COGS", "float"),
-        ("From Port", "str"),
-        ("To Port", "str"),
-        ("Export ETA", "date (DD/MM/YYYY)"),
-        ("Import ETA", "date (DD/MM/YYYY)"),
-        ("To Be Shipped Quantity", "int"),
-        ("Length (cm)", "float"),
-        ("Width (cm)", "float"),
-        ("Height (cm)", "float"),
-        ("Weight (kg)", "float"),
-        ("Priority Level", "int"),
-        ("Unmet Penalty", "float")
-    ]
+    # Template schemas shared with the synthetic data generator
+    po_columns = PO_TEMPLATE_COLUMNS
+    cap_columns = CAP_TEMPLATE_COLUMNS
 
     po_template = pd.DataFrame([
         ["PO001", 1, "SKU1001", "Smartphone X", "Electronics", 1, 250, "HK", "LA", "15/06/2025", "25/06/2025", 10, 15.0, 7.5, 0.8, 0.2, 2, 1000]
     ], columns=[col[0] for col in po_columns])
 
-    # Define Capacity template schema
-    cap_columns = [
-        ("Week_Year", "str (e.g. 2025-W25)"),
-        ("From Port", "str"),
-        ("To Port", "str"),
-        ("Carrier", "str"),
-        ("Container Type", "str"),
-        ("Available Units", "int"),
-        ("Max Volume (m³)", "float"),
-        ("Max Weight (kg)", "float"),
-        ("Estimated Transit Time (days)", "int"),
-        ("Price (USD)", "float")
-    ]
-
     cap_template = pd.DataFrame([
         ["2025-W25", "HK", "LA", "Maersk", "40FT", 3, 66.0, 26500.0, 10, 3000.0]
     ], columns=[col[0] for col in cap_columns])
@@ -7,14 +7,16 @@ import pandas as pd
 import plotly.express as px
 from src.preprocessing import preprocess_data
 from src.optimizer import optimize_shipping
-from app.components import show_dashboard, show_definitions, show_download_templates
+from app.components import show_dashboard, show_definitions, show_download_templates, show_scenario_sweep
 
 # Navigation
-page = st.sidebar.selectbox("Navigation", ["Dashboard", "Definitions & Assumptions", "Download CSV Templates"])
+page = st.sidebar.selectbox("Navigation", ["Dashboard", "Scenario Sweep", "Definitions & Assumptions", "Download CSV Templates"])
 
 
 if page == "Dashboard":
     show_dashboard()
+elif page == "Scenario Sweep":
+    show_scenario_sweep()
 elif page == "Definitions & Assumptions":
     show_definitions()
 elif page == "Download CSV Templates":
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import pickle
+import time
+from dataclasses import asdict
+
+import numpy as np
+import pandas as pd
+import pulp
+from src.instrumentation import logger
+from src.optimizer import (
+    has_solution, pack_solution, plan_objective, reconcile_objective, results_from_assignments, solution_values
+)
+from src.presolve import add_settled_objective
+from src.solver import SolverConfig, solve_model
+
+MODEL_FORMATS = ("json", "mps")
+# Bumped whenever the rows or columns optimize_shipping builds change, so models archived
+# by an earlier version are not reused
+MODEL_VERSION = 2
+
+
+def frame_digest(df):
+    # Content hash of a table: column names, dtypes and every value (index included)
+    digest = hashlib.sha256()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.digest()
+
+
+def variables_table(po_df, pools, routes, variables):
+    # Variable name to (kind, PO line, container pool), in model order
+    route_vars, use_container, unmet_vars = variables
+    po_number = po_df["PO Number"].to_numpy()
+    po_line = po_df["PO Line Number"].to_numpy()
+    n_routes, n_pools, n_po = len(route_vars), len(use_container), len(unmet_vars)
+    return pd.DataFrame({
+        "Variable": [var.name for var in route_vars] + [var.name for var in use_container.values()]
+                    + [var.name for var in unmet_vars.values()],
+        "Kind": ["route"] * n_routes + ["use"] * n_pools + ["unmet"] * n_po,
+        "PO Number": np.concatenate([po_number[routes[:, 0]], np.full(n_pools, None), po_number]),
+        "PO Line Number": np.concatenate([po_line[routes[:, 0]], np.full(n_pools, None), po_line]),
+        "Base Shipment ID": np.concatenate([pools.index.to_numpy()[routes[:, 1]], pools.index.to_numpy(), np.full(n_po, None)]),
+    })
+
+
+class ModelArchive:
+    # Built models on disk, one folder per content key (PO table, capacity table, penalty
+    # parameters, presolve and the model version), so identical inputs reuse the stored
+    # model:
+    #   model.json / model.mps  the PuLP model exactly as it was solved
+    #   variables.csv           variable name -> kind, PO line and Base Shipment ID
+    #   context.pkl             PO table, container pools and members, routes and the
+    #                           presolve Reduction the PO table came from
+    #   solution.npz            route quantities, opened units and unmet quantity
+    #   plan.pkl                the returned plan: container pools (split where their
+    #                           lines did not pack), per-container assignments and
+    #                           unmet quantity
+    #   manifest.json           penalties, presolve, model version and size, solve status
+    #                           and objective
+    def __init__(self, root, model_format="json"):
+        if model_format not in MODEL_FORMATS:
+            raise ValueError(f"Unknown model format '{model_format}', expected one of {MODEL_FORMATS}")
+        self.root = root
+        self.model_format = model_format
+        os.makedirs(root, exist_ok=True)
+
+    def key(self, po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2, presolve=True):
+        digest = hashlib.sha256()
+        digest.update(frame_digest(po_df))
+        digest.update(frame_digest(cap_df))
+        digest.update(json.dumps([
+            float(late_penalty_per_day), float(priority_multiplier), bool(presolve), MODEL_VERSION
+        ]).encode())
+        return digest.hexdigest()
+
+    def matches(self, key, presolve=True):
+        # Whether the stored model was built the way optimize_shipping would build it now
+        manifest = self.manifest(key)
+        return manifest.get("presolve") == bool(presolve) and manifest.get("model_version") == MODEL_VERSION
+
+    def path(self, key, name=""):
+        return os.path.join(self.root, key, name)
+
+    def __contains__(self, key):
+        return os.path.exists(self.path(key, "manifest.json"))
+
+    def keys(self):
+        return sorted(key for key in os.listdir(self.root) if key in self)
+
+    def manifest(self, key):
+        with open(self.path(key, "manifest.json")) as f:
+            return json.load(f)
+
+    def _write_manifest(self, key, manifest):
+        tmp_path = self.path(key, "manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, self.path(key, "manifest.json"))
+
+    def save_model(self, key, model, po_df, pools, members, routes, variables,
+                   late_penalty_per_day=2, priority_multiplier=2, reduction=None):
+        # Store the model as built, before it is solved
+        os.makedirs(self.path(key), exist_ok=True)
+        model_file = f"model.{self.model_format}"
+        if self.model_format == "json":
+            # Coefficients and bounds may be numpy scalars
+            model.to_json(self.path(key, model_file), default=lambda value: value.item())
+        else:
+            model.writeMPS(self.path(key, model_file))
+        variables_table(po_df, pools, routes, variables).to_csv(self.path(key, "variables.csv"), index=False)
+        with open(self.path(key, "context.pkl"), "wb") as f:
+            pickle.dump({
+                "po_df": po_df, "pools": pools, "members": members, "routes": routes, "presolve": reduction,
+            }, f, protocol=pickle.HIGHEST_PROTOCOL)
+        route_vars, use_container, unmet_vars = variables
+        self._write_manifest(key, {
+            "key": key, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "model_file": model_file,
+            "late_penalty_per_day": late_penalty_per_day, "priority_multiplier": priority_multiplier,
+            "presolve": reduction is not None, "model_version": MODEL_VERSION,
+            "po_lines": len(po_df), "pools": len(pools), "routes": len(routes),
+            "variables": len(route_vars) + len(use_container) + len(unmet_vars),
+            "constraints": len(model.constraints), "solution": None,
+        })
+        logger.info("archived model %s", key)
+
+    def save_solution(self, key, solution, plan, solve_info):
+        # solution: (route_qty, opened, unmet_qty) arrays; plan: (pools, assignments,
+        # unmet_qty) as pack_solution returns them; solve_info: reconciled with the plan
+        route_qty, opened, unmet_qty = solution
+        np.savez_compressed(self.path(key, "solution.npz"), route_qty=route_qty, opened=opened, unmet_qty=unmet_qty)
+        with open(self.path(key, "plan.pkl"), "wb") as f:
+            pickle.dump(plan, f, protocol=pickle.HIGHEST_PROTOCOL)
+        manifest = self.manifest(key)
+        manifest["solution"] = {k: v for k, v in asdict(solve_info).items() if k != "stats"}
+        manifest["solved"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self._write_manifest(key, manifest)
+
+    def load_context(self, key):
+        with open(self.path(key, "context.pkl"), "rb") as f:
+            return pickle.load(f)
+
+    def load_model(self, key):
+        # The stored model and its variables as the (route_vars, use_container,
+        # unmet_vars) tuple the optimizer works with
+        model_path = self.path(key, self.manifest(key)["model_file"])
+        if model_path.endswith(".json"):
+            by_name, model = pulp.LpProblem.from_json(model_path)
+        else:
+            by_name, model = pulp.LpProblem.fromMPS(model_path, sense=pulp.LpMinimize)
+        table = pd.read_csv(self.path(key, "variables.csv"), usecols=["Variable", "Kind", "Base Shipment ID"])
+        names = table.groupby("Kind", sort=False)["Variable"].agg(list)
+        unmet_names = names.get("unmet", [])
+        context = self.load_context(key)
+        variables = (
+            [by_name[name] for name in names.get("route", [])],
+            dict(zip(context["pools"].index, (by_name[name] for name in names.get("use", [])))),
+            dict(zip(context["po_df"].index, (by_name[name] for name in unmet_names))),
+        )
+        return model, variables, context
+
+    def load_solution(self, key):
+        # (route_qty, opened, unmet_qty) of the last solve
+        with np.load(self.path(key, "solution.npz")) as solution:
+            return solution["route_qty"], solution["opened"], solution["unmet_qty"]
+
+    def load_plan(self, key):
+        # (pools, assignments, unmet_qty) of the last solve's returned plan
+        with open(self.path(key, "plan.pkl"), "rb") as f:
+            return pickle.load(f)
+
+
+def replay_archived(archive, key):
+    # Results of the stored plan, without preprocessing, model building, a solve or packing
+    manifest = archive.manifest(key)
+    if manifest.get("solution") is None:
+        raise ValueError(f"Archived model {key} has no stored solution")
+    context = archive.load_context(key)
+    return results_from_assignments(
+        context["po_df"], *archive.load_plan(key), manifest["late_penalty_per_day"],
+        manifest["priority_multiplier"], reduction=context.get("presolve")
+    )
+
+
+def resolve_archived(archive, key, solver_config=None):
+    # Solve the stored model again, e.g. with another backend or time limit, store the new
+    # solution and return its results and SolveInfo
+    manifest = archive.manifest(key)
+    solver_config = solver_config or SolverConfig()
+    model, variables, context = archive.load_model(key)
+    solve_info = solve_model(model, solver_config)
+    if not has_solution(model):
+        raise RuntimeError(f"Solver returned no solution (status: {solve_info.status})")
+    solution = solution_values(variables)
+    late_penalty_per_day, priority_multiplier = manifest["late_penalty_per_day"], manifest["priority_multiplier"]
+    pools, assignments, unmet_qty, seconds = pack_solution(
+        context["po_df"], context["pools"], context["members"], context["routes"], solution,
+        late_penalty_per_day, priority_multiplier, solver_config
+    )
+    solve_info.solve_time += seconds
+    reduction = context.get("presolve")
+    if reduction is not None:
+        add_settled_objective(solve_info, reduction)
+    results_df = results_from_assignments(
+        context["po_df"], pools, assignments, unmet_qty, late_penalty_per_day, priority_multiplier, reduction
+    )
+    reconcile_objective(solve_info, plan_objective(results_df))
+    archive.save_solution(key, solution, (pools, assignments, unmet_qty), solve_info)
+    return results_df, solve_info
@@ -0,0 +1,238 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+
+from src.archive import ModelArchive
+from src.cache import make_cache_key
+from src.decomposition import optimize_shipping_by_lane
+from src.heuristic import greedy_shipping
+from src.instrumentation import RunStats, configure_logging, logger, peak_rss_mb
+from src.optimizer import optimize_shipping
+from src.preprocessing import preprocess_data
+from src.solver import SOLVER_BACKENDS, SolverConfig
+
+RESULT_FORMATS = ("csv", "parquet")
+STATS_FILE = "run_stats.json"
+
+
+@dataclass
+class BatchOptions:
+    # Solve settings shared by every job of a batch run
+    late_penalty_per_day: float = 2
+    priority_multiplier: float = 2
+    engine: str = "mip"
+    by_lane: bool = False
+    compact: bool = True
+    result_format: str = "csv"
+    # Folder of a ModelArchive for the full MIP, so reruns on identical inputs skip
+    # model building and every solved model can be replayed
+    archive_dir: str = None
+
+
+def file_digest(path, chunk_size=2**20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def input_key(po_path, cap_path, options, solver_config):
+    # Content hash of both input files plus every setting that changes the result
+    params = {"options": asdict(options), "solver": asdict(solver_config)}
+    return make_cache_key([file_digest(po_path), file_digest(cap_path)], params)
+
+
+def job_name(po_path, cap_path):
+    # Readable and unique per input pair: PO file's folder and name plus a path hash
+    po_path = os.path.abspath(po_path)
+    tag = hashlib.sha1(f"{po_path}|{os.path.abspath(cap_path)}".encode()).hexdigest()[:8]
+    stem = os.path.splitext(os.path.basename(po_path))[0]
+    return f"{os.path.basename(os.path.dirname(po_path))}_{stem}_{tag}"
+
+
+def find_pairs(pairs=(), po_glob=None, cap_pattern="{dir}/container_capacity.csv"):
+    # Explicit (po, capacity) pairs, plus one pair per PO file matching po_glob. The
+    # capacity path of a globbed PO file is cap_pattern with {dir} (the PO file's folder)
+    # and {stem} (its name without extension) filled in.
+    found = [tuple(pair) for pair in pairs]
+    if po_glob:
+        for po_path in sorted(glob.glob(po_glob, recursive=True)):
+            stem = os.path.splitext(os.path.basename(po_path))[0]
+            found.append((po_path, cap_pattern.format(dir=os.path.dirname(po_path) or ".", stem=stem)))
+    return found
+
+
+def read_job_stats(job_dir):
+    path = os.path.join(job_dir, STATS_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_up_to_date(job_dir, key):
+    # The last run of this job succeeded on the same inputs and its results are still there
+    stats = read_job_stats(job_dir)
+    return (
+        stats is not None and stats.get("status") == "ok" and stats.get("input_key") == key
+        and os.path.exists(os.path.join(job_dir, stats.get("results_file", "")))
+    )
+
+
+def write_results(results_df, path, result_format):
+    if result_format == "parquet":
+        results_df.to_parquet(path, index=False)
+    else:
+        results_df.to_csv(path, index=False)
+
+
+def run_job(po_path, cap_path, out_dir, options, solver_config, key):
+    # Solve one input pair and write its results and run_stats.json into out_dir.
+    # Failures are recorded in run_stats.json instead of raised.
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    record = {
+        "po_file": os.path.abspath(po_path), "capacity_file": os.path.abspath(cap_path),
+        "input_key": key, "options": asdict(options), "solver": asdict(solver_config),
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    stats = RunStats()
+    try:
+        with stats.phase("preprocessing"):
+            po_df, cap_df = preprocess_data(po_path, cap_path, compact=options.compact)
+        late, pm = options.late_penalty_per_day, options.priority_multiplier
+        if options.engine == "greedy":
+            results_df, info = greedy_shipping(po_df, cap_df, late, pm, return_info=True, stats=stats)
+        elif options.by_lane:
+            results_df, info = optimize_shipping_by_lane(
+                po_df, cap_df, late, pm, solver_config=solver_config, return_info=True
+            )
+        else:
+            archive = ModelArchive(options.archive_dir) if options.archive_dir else None
+            results_df, info = optimize_shipping(
+                po_df, cap_df, late, pm, solver_config=solver_config, return_info=True, stats=stats,
+                archive=archive
+            )
+        results_file = f"results.{options.result_format}"
+        write_results(results_df, os.path.join(out_dir, results_file), options.result_format)
+        if info.stats is not None and info.stats is not stats:
+            stats.phases.extend(info.stats.phases)
+            stats.counters.update(info.stats.counters)
+        record.update({
+            "status": "ok", "results_file": results_file, "rows": len(results_df),
+            "solver_status": info.status, "objective": info.objective,
+            "best_bound": info.best_bound, "gap": info.gap, "solve_time": info.solve_time,
+        })
+    except Exception as e:
+        record.update({"status": "failed", "error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()})
+
+    record.update({
+        "seconds": time.perf_counter() - start, "peak_rss_mb": peak_rss_mb(), **stats.to_dict(),
+    })
+    with open(os.path.join(out_dir, STATS_FILE), "w") as f:
+        json.dump(record, f, indent=2, default=str)
+    return record
+
+
+def run_batch(pairs, out_root, options=None, solver_config=None, max_workers=1, force=False):
+    # Run every (po, capacity) pair as a job under out_root/<job name>/, up to max_workers
+    # at a time. Jobs whose inputs and settings match their last successful run are
+    # skipped unless force is set. Returns one summary row per job.
+    options = options or BatchOptions()
+    solver_config = solver_config or SolverConfig(msg=False)
+    if options.result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format '{options.result_format}', expected one of {RESULT_FORMATS}")
+
+    summary, jobs = [], []
+    for po_path, cap_path in pairs:
+        name = job_name(po_path, cap_path)
+        job_dir = os.path.join(out_root, name)
+        missing = [path for path in (po_path, cap_path) if not os.path.exists(path)]
+        if missing:
+            summary.append({"job": name, "status": "missing input", "error": ", ".join(missing)})
+            continue
+        key = input_key(po_path, cap_path, options, solver_config)
+        if not force and is_up_to_date(job_dir, key):
+            logger.info("job %s: inputs unchanged, skipped", name)
+            summary.append({"job": name, "status": "skipped"})
+            continue
+        jobs.append((name, (po_path, cap_path, job_dir, options, solver_config, key)))
+        summary.append({"job": name, "status": "queued"})
+
+    if max_workers <= 1:
+        records = {name: run_job(*args) for name, args in jobs}
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(run_job, *args): name for name, args in jobs}
+            records = {futures[future]: future.result() for future in as_completed(futures)}
+
+    # Summary rows in input order
+    for n, row in enumerate(summary):
+        record = records.get(row["job"]) if row["status"] == "queued" else None
+        if record is not None:
+            logger.info("job %s: %s in %.1fs", row["job"], record["status"], record["seconds"])
+            summary[n] = {
+                "job": row["job"], "status": record["status"], "objective": record.get("objective"),
+                "seconds": record["seconds"], "error": record.get("error"),
+            }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve PO / capacity file pairs unattended")
+    parser.add_argument("--pair", nargs=2, action="append", default=[], metavar=("PO", "CAPACITY"),
+                        help="PO and capacity file of one job; repeat for more jobs")
+    parser.add_argument("--po-glob", help="Glob of PO files, each a job (quote it; ** is recursive)")
+    parser.add_argument("--cap-pattern", default="{dir}/container_capacity.csv",
+                        help="Capacity file of a globbed PO file; {dir} and {stem} are filled in")
+    parser.add_argument("--out-dir", default="batch_results")
+    parser.add_argument("--format", default="csv", choices=RESULT_FORMATS)
+    parser.add_argument("--workers", type=int, default=1, help="Jobs solved at the same time")
+    parser.add_argument("--force", action="store_true", help="Re-run jobs whose inputs did not change")
+    parser.add_argument("--engine", default="mip", choices=["mip", "greedy"])
+    parser.add_argument("--by-lane", action="store_true", help="Solve each lane as its own MIP")
+    parser.add_argument("--archive-dir", help="Store built models and solutions here and reuse them")
+    parser.add_argument("--late-penalty", type=float, default=2)
+    parser.add_argument("--priority-multiplier", type=float, default=2)
+    parser.add_argument("--backend", default="cbc", choices=SOLVER_BACKENDS)
+    parser.add_argument("--time-limit", type=float, default=None)
+    parser.add_argument("--mip-gap", type=float, default=None)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--relax-and-round", action="store_true",
+                        help="Round the LP relaxation and re-solve only its fractional part")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    pairs = find_pairs(args.pair, args.po_glob, args.cap_pattern)
+    if not pairs:
+        parser.error("no input pairs: give --pair or a --po-glob that matches")
+
+    configure_logging(args.log_level)
+    options = BatchOptions(
+        late_penalty_per_day=args.late_penalty, priority_multiplier=args.priority_multiplier,
+        engine=args.engine, by_lane=args.by_lane, result_format=args.format,
+        archive_dir=args.archive_dir,
+    )
+    solver_config = SolverConfig(
+        backend=args.backend, time_limit=args.time_limit, mip_gap=args.mip_gap,
+        threads=args.threads, relax_and_round=args.relax_and_round, msg=False
+    )
+    summary = run_batch(pairs, args.out_dir, options, solver_config, args.workers, args.force)
+    for row in summary:
+        print(f"{row['status']:>13}  {row['job']}" + (f"  {row['error']}" if row.get("error") else ""))
+    return 1 if any(row["status"] not in ("ok", "skipped") for row in summary) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+from src.instrumentation import RunStats, configure_logging, logger, peak_rss_mb
+from src.optimizer import optimize_shipping
+from src.preprocessing import preprocess_data
+from src.solver import SOLVER_BACKENDS, SolverConfig
+from src.synthetic import write_synthetic_csvs
+
+# Problem sizes swept by default: PO lines x lanes x weeks x mean Available Units
+DEFAULT_SIZES = ["100x2x4x2", "400x4x8x3", "1500x8x12x4", "4000x12x16x5"]
+
+
+@dataclass
+class BenchmarkCase:
+    n_po_lines: int
+    n_lanes: int
+    n_weeks: int
+    units_per_row: int
+    seed: int = 0
+
+    @property
+    def name(self):
+        return f"{self.n_po_lines}x{self.n_lanes}x{self.n_weeks}x{self.units_per_row}"
+
+    @classmethod
+    def parse(cls, size, seed=0):
+        # "POxLANESxWEEKSxUNITS", e.g. "400x4x8x3"
+        parts = [int(part) for part in size.lower().split("x")]
+        if len(parts) != 4:
+            raise ValueError(f"Size '{size}' must look like PO_LINESxLANESxWEEKSxUNITS")
+        return cls(*parts, seed=seed)
+
+
+def run_case(case, solver_config=None, late_penalty_per_day=2, priority_multiplier=2, compact=False):
+    # Generate, preprocess and optimize one case; returns a flat JSON-able record
+    solver_config = solver_config or SolverConfig(msg=False)
+    stats = RunStats()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        po_path, cap_path = write_synthetic_csvs(
+            tmp_dir, case.n_po_lines, case.n_lanes, case.n_weeks, case.units_per_row, seed=case.seed
+        )
+        with stats.phase("preprocess"):
+            po_df, cap_df = preprocess_data(po_path, cap_path, compact=compact)
+
+    record = {
+        "case": case.name, **asdict(case), "capacity_units": len(cap_df),
+        "input (MB)": (po_df.memory_usage(deep=True).sum() + cap_df.memory_usage(deep=True).sum()) / 2**20,
+    }
+    try:
+        _, info = optimize_shipping(
+            po_df, cap_df, late_penalty_per_day, priority_multiplier,
+            solver_config=solver_config, return_info=True, stats=stats
+        )
+        record.update(status=info.status, objective=info.objective, best_bound=info.best_bound, gap=info.gap)
+    except RuntimeError as e:
+        record.update(status="No solution", objective=None, best_bound=None, gap=None, error=str(e))
+
+    record.update({f"{name} (s)": seconds for name, seconds in stats.phase_seconds().items()})
+    record["total (s)"] = stats.total_seconds
+    record["peak rss (MB)"] = peak_rss_mb()
+    record.update(stats.counters)
+    return record
+
+
+def run_benchmark(cases, solver_config=None, isolate=True, **options):
+    # Run every case, each in a fresh worker process by default so the peak RSS
+    # belongs to that case alone
+    records = []
+    for case in cases:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                record = executor.submit(run_case, case, solver_config, **options).result()
+        else:
+            record = run_case(case, solver_config, **options)
+        records.append(record)
+        logger.info(
+            "benchmark %s: %.2fs, %s variables, objective %s",
+            record["case"], record["total (s)"], record.get("variables", 0), record["objective"]
+        )
+    return pd.DataFrame(records)
+
+
+def write_report(report_df, path, solver_config=None):
+    # JSON reports carry the run environment; any other extension is written as CSV
+    if path.endswith(".json"):
+        payload = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "solver": asdict(solver_config) if solver_config else None,
+            "cases": json.loads(report_df.to_json(orient="records")),
+        }
+        with open(path, "w") as f:
+            json.dump(payload, f, indent=2)
+    else:
+        report_df.to_csv(path, index=False)
+
+
+def read_report(path):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return pd.DataFrame(json.load(f)["cases"])
+    return pd.read_csv(path)
+
+
+def compare_reports(baseline_df, candidate_df, tolerance=0.25, min_seconds=0.05):
+    # Per case and metric: baseline, candidate and their ratio. Timings and memory
+    # regress when they grow by more than `tolerance` (and, for timings, by more than
+    # min_seconds); the objective regresses on any increase.
+    metrics = [col for col in baseline_df.columns if col.endswith("(s)") or col.endswith("(MB)")]
+    metrics += [col for col in ["variables", "constraints", "nonzeros", "objective"] if col in baseline_df.columns]
+    merged = baseline_df.merge(candidate_df, on="case", suffixes=(" baseline", " candidate"))
+
+    rows = []
+    for _, row in merged.iterrows():
+        for metric in metrics:
+            if f"{metric} candidate" not in row:
+                continue
+            base, cand = row[f"{metric} baseline"], row[f"{metric} candidate"]
+            if pd.isna(base) or pd.isna(cand):
+                continue
+            ratio = cand / base if base else float("inf") if cand else 1.0
+            if metric.endswith("(s)"):
+                regression = ratio > 1 + tolerance and cand - base > min_seconds
+            elif metric == "objective":
+                regression = cand > base + 1e-6 * max(abs(base), 1)
+            else:
+                regression = ratio > 1 + tolerance
+            rows.append({
+                "case": row["case"], "metric": metric, "baseline": base,
+                "candidate": cand, "ratio": ratio, "regression": regression,
+            })
+    return pd.DataFrame(rows, columns=["case", "metric", "baseline", "candidate", "ratio", "regression"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scaling benchmark for preprocess_data + optimize_shipping")
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="PO_LINESxLANESxWEEKSxUNITS per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", default="cbc", choices=SOLVER_BACKENDS)
+    parser.add_argument("--time-limit", type=float, default=120)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--out", default="benchmark_report.json", help="Report path (.json or .csv)")
+    parser.add_argument("--in-process", action="store_true", help="Run cases in this process")
+    parser.add_argument("--compact", action="store_true", help="Preprocess with categorical and downcast dtypes")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"),
+                        help="Compare two reports instead of running; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        comparison = compare_reports(read_report(args.compare[0]), read_report(args.compare[1]), args.tolerance)
+        print(comparison.to_string(index=False))
+        return 1 if comparison["regression"].any() else 0
+
+    configure_logging("INFO")
+    solver_config = SolverConfig(backend=args.backend, time_limit=args.time_limit, threads=args.threads, msg=False)
+    cases = [BenchmarkCase.parse(size, seed=args.seed) for size in args.sizes]
+    report_df = run_benchmark(cases, solver_config, isolate=not args.in_process, compact=args.compact)
+    write_report(report_df, args.out, solver_config)
+    print(report_df.to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
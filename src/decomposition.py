@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pulp
+from src.optimizer import optimize_shipping
+from src.instrumentation import merge_run_stats
+from src.solver import SolveInfo
+
+
+def split_by_lane(po_df, cap_df):
+    # A PO line can only use containers on its own (From Port, To Port) lane, so the model
+    # separates into one independent subproblem per lane that has PO lines. Containers on
+    # lanes without demand are left out.
+    cap_lanes = cap_df.groupby(["From Port", "To Port"], sort=False, observed=True).indices
+    po_lanes = po_df.groupby(["From Port", "To Port"], sort=False, dropna=False, observed=True).indices
+
+    for lane, po_pos in po_lanes.items():
+        cap_pos = cap_lanes.get(lane, np.array([], dtype=np.intp))
+        yield lane, po_df.iloc[po_pos], cap_df.iloc[cap_pos]
+
+
+def _solve_lane(po_sub, cap_sub, late_penalty_per_day, priority_multiplier, solver_config, warm_start):
+    return optimize_shipping(
+        po_sub, cap_sub, late_penalty_per_day, priority_multiplier,
+        solver_config=solver_config, warm_start=warm_start, return_info=True
+    )
+
+
+def combine_solve_info(infos, solve_time):
+    # Lane objectives and bounds add up; the combined gap is taken over the totals
+    objective = sum(info.objective or 0 for info in infos)
+    bounds = [info.best_bound for info in infos]
+    best_bound = sum(bounds) if all(b is not None for b in bounds) else None
+    gap = None
+    if best_bound is not None:
+        gap = abs(objective - best_bound) / max(abs(objective), 1e-9)
+
+    statuses = [info.status for info in infos]
+    solution_statuses = [info.solution_status for info in infos]
+    optimal = pulp.LpSolution[pulp.LpSolutionOptimal]
+    lane_stats = [info.stats for info in infos if info.stats is not None]
+    return SolveInfo(
+        backend=infos[0].backend if infos else "",
+        status=next((s for s in statuses if s != "Optimal"), "Optimal"),
+        solution_status=next((s for s in solution_statuses if s != optimal), optimal),
+        objective=objective,
+        best_bound=best_bound,
+        gap=gap,
+        solve_time=solve_time,
+        stats=merge_run_stats(lane_stats) if lane_stats else None,
+    )
+
+
+def optimize_shipping_by_lane(po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2,
+                              solver_config=None, warm_start=None, max_workers=None,
+                              return_info=False):
+    # Solve every lane as its own MIP in a process pool and concatenate the lane results
+    # into the optimize_shipping schema. max_workers=1 solves the lanes in-process.
+    start = time.perf_counter()
+    jobs = []
+    for (from_port, to_port), po_sub, cap_sub in split_by_lane(po_df, cap_df):
+        lane_warm_start = None
+        if warm_start is not None and not warm_start.empty:
+            lane_warm_start = warm_start[
+                (warm_start["From Port"] == from_port) & (warm_start["To Port"] == to_port)
+            ]
+        jobs.append((po_sub, cap_sub, late_penalty_per_day, priority_multiplier, solver_config, lane_warm_start))
+
+    if max_workers == 1 or len(jobs) <= 1:
+        outputs = [_solve_lane(*job) for job in jobs]
+    else:
+        # Largest lanes first so the long solves do not end up at the tail of the queue
+        order = sorted(range(len(jobs)), key=lambda i: -(len(jobs[i][0]) * max(len(jobs[i][1]), 1)))
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {i: executor.submit(_solve_lane, *jobs[i]) for i in order}
+            outputs = [futures[i].result() for i in range(len(jobs))]
+
+    frames = [results for results, _ in outputs if not results.empty]
+    results_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if return_info:
+        return results_df, combine_solve_info([info for _, info in outputs], time.perf_counter() - start)
+    return results_df
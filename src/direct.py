@@ -0,0 +1,224 @@
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pulp
+from src.routes import capped_routes, route_unit_limit, split_siblings
+from src.solver import SolveInfo, subscribe_progress
+
+# HiGHS model status name -> (PuLP status, PuLP solution status), as PuLP's HiGHS
+# interface reports them
+HIGHS_STATUS = {
+    "kOptimal": (pulp.LpStatusOptimal, pulp.LpSolutionOptimal),
+    "kInfeasible": (pulp.LpStatusInfeasible, pulp.LpSolutionInfeasible),
+    "kUnboundedOrInfeasible": (pulp.LpStatusInfeasible, pulp.LpSolutionInfeasible),
+    "kUnbounded": (pulp.LpStatusUnbounded, pulp.LpSolutionUnbounded),
+    "kObjectiveBound": (pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible),
+    "kObjectiveTarget": (pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible),
+    "kTimeLimit": (pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible),
+    "kIterationLimit": (pulp.LpStatusOptimal, pulp.LpSolutionIntegerFeasible),
+}
+
+
+@dataclass
+class ModelArrays:
+    # The pooled model as arrays. Columns are laid out as in the optimizer's variables
+    # tuple (routes, pools, PO lines); `order` is the column order handed to HiGHS.
+    # Rows are the demand rows, the volume and weight rows per pool and the per-route
+    # single-container rows, in CSR form.
+    n_routes: int
+    n_pools: int
+    n_po: int
+    col_cost: np.ndarray
+    col_upper: np.ndarray
+    row_lower: np.ndarray
+    row_upper: np.ndarray
+    start: np.ndarray
+    index: np.ndarray
+    value: np.ndarray
+    order: np.ndarray
+
+    @property
+    def n_cols(self):
+        return self.n_routes + self.n_pools + self.n_po
+
+
+def pulp_column_order(po_df, n_pools, routes):
+    # PuLP sorts variables by name before passing them to HiGHS; using the same column
+    # order gives HiGHS the same model and so the same solution
+    labels = np.array([pulp.LpElement.expression.sub("_", str(label)) for label in po_df.index], dtype=object)
+    names = np.concatenate([
+        labels[routes[:, 0]] + "_" + routes[:, 1].astype(str).astype(object),
+        np.arange(n_pools).astype(str).astype(object),
+        labels,
+    ])
+    prefixes = np.repeat(np.array(["x_", "use_", "unmet_"], dtype=object), [len(routes), n_pools, len(po_df)])
+    return np.argsort((prefixes + names).astype(str), kind="stable")
+
+
+def build_model_arrays(po_df, pools, routes, route_pen):
+    # Objective, bounds and constraint rows of optimize_shipping's model, built from the
+    # route index without any PuLP objects
+    n_routes, n_pools, n_po = len(routes), len(pools), len(po_df)
+    po_qty = po_df["To Be Shipped Quantity"].to_numpy(dtype=float)
+    route_po, route_pool = routes[:, 0], routes[:, 1]
+    use_col = n_routes + np.arange(n_pools)
+    unmet_col = n_routes + n_pools + np.arange(n_po)
+    by_po = np.argsort(route_po, kind="stable")
+    by_pool = np.argsort(route_pool, kind="stable")
+
+    # Per-route rows of the routes a single container caps below the line's quantity
+    limit = route_unit_limit(po_df, pools, routes)
+    capped = capped_routes(po_df, routes, limit)
+    fit_row = n_po + 2 * n_pools + np.arange(len(capped))
+    # Load order rows of the containers split from one pool: the later one's routes, then
+    # the earlier one's
+    earlier, later = split_siblings(pools)
+    pool_routes = np.split(by_pool, np.cumsum(np.bincount(route_pool, minlength=n_pools))[:-1])
+    order_routes = [np.concatenate([pool_routes[b], pool_routes[a]]) for a, b in zip(earlier, later)]
+    order_sign = [np.repeat([1.0, -1.0], [len(pool_routes[b]), len(pool_routes[a])])
+                  for a, b in zip(earlier, later)]
+    order_row = np.repeat(n_po + 2 * n_pools + len(capped) + np.arange(len(later)),
+                          [len(r) for r in order_routes])
+    order_col = np.concatenate(order_routes) if order_routes else np.zeros(0, dtype=np.int64)
+    order_value = np.concatenate(order_sign) if order_sign else np.zeros(0)
+    n_extra = len(capped) + len(later)
+
+    # Entries in the order PuLP adds them: each row's routes, then its pool or unmet column
+    vol_row = n_po + 2 * np.arange(n_pools)
+    row = np.concatenate([route_po[by_po], np.arange(n_po), vol_row[route_pool[by_pool]], vol_row,
+                          vol_row[route_pool[by_pool]] + 1, vol_row + 1, fit_row, fit_row, order_row])
+    col = np.concatenate([by_po, unmet_col, by_pool, use_col, by_pool, use_col, capped, use_col[route_pool[capped]],
+                          order_col])
+    value = np.concatenate([
+        np.ones(n_routes + n_po),
+        po_df["Volume (m3)"].to_numpy(dtype=float)[route_po[by_pool]],
+        -pools["Max Volume (m³)"].to_numpy(dtype=float),
+        po_df["Weight (kg)"].to_numpy(dtype=float)[route_po[by_pool]],
+        -pools["Max Weight (kg)"].to_numpy(dtype=float),
+        np.ones(len(capped)), -limit[capped],
+        order_value * po_df["Volume (m3)"].to_numpy(dtype=float)[route_po[order_col]],
+    ])
+    nonzero = value != 0
+    row, col, value = row[nonzero], col[nonzero], value[nonzero]
+    entries = np.argsort(row, kind="stable")
+
+    order = pulp_column_order(po_df, n_pools, routes)
+    position = np.empty(len(order), dtype=np.int64)
+    position[order] = np.arange(len(order))
+    n_rows = n_po + 2 * n_pools + n_extra
+    return ModelArrays(
+        n_routes, n_pools, n_po,
+        col_cost=np.concatenate([route_pen, pools["Price (USD)"].to_numpy(dtype=float),
+                                 po_df["Unmet Penalty"].to_numpy(dtype=float)]),
+        col_upper=np.concatenate([po_qty[route_po], pools["Pool Units"].to_numpy(dtype=float), po_qty]),
+        row_lower=np.concatenate([po_qty, np.full(2 * n_pools + n_extra, -np.inf)]),
+        row_upper=np.concatenate([po_qty, np.zeros(2 * n_pools + n_extra)]),
+        start=np.concatenate([[0], np.cumsum(np.bincount(row, minlength=n_rows))]).astype(np.int32),
+        index=position[col[entries]].astype(np.int32),
+        value=value[entries],
+        order=order,
+    )
+
+
+def solve_model_arrays(arrays, config, start=None, integer=True, col_lower=None, col_upper=None):
+    # Solve the arrays with highspy. start: optional column values (optimizer layout)
+    # passed as the starting solution; integer=False solves the LP relaxation;
+    # col_lower/col_upper override the column bounds. Returns the column values in the
+    # optimizer layout, or None without a solution, and the SolveInfo.
+    import highspy
+
+    order = arrays.order
+    lp = highspy.HighsLp()
+    lp.num_col_ = arrays.n_cols
+    lp.num_row_ = len(arrays.row_lower)
+    lp.col_cost_ = arrays.col_cost[order]
+    lp.col_lower_ = (np.zeros(arrays.n_cols) if col_lower is None else col_lower)[order]
+    lp.col_upper_ = (arrays.col_upper if col_upper is None else col_upper)[order]
+    lp.row_lower_ = arrays.row_lower
+    lp.row_upper_ = arrays.row_upper
+    var_type = highspy.HighsVarType.kInteger if integer else highspy.HighsVarType.kContinuous
+    lp.integrality_ = [var_type] * arrays.n_cols
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.num_col_ = lp.num_col_
+    lp.a_matrix_.num_row_ = lp.num_row_
+    lp.a_matrix_.start_ = arrays.start
+    lp.a_matrix_.index_ = arrays.index
+    lp.a_matrix_.value_ = arrays.value
+
+    highs = highspy.Highs()
+    highs.setOptionValue("output_flag", bool(config.msg))
+    if config.mip_gap is not None:
+        highs.setOptionValue("mip_rel_gap", config.mip_gap)
+    if config.threads is not None:
+        highs.setOptionValue("threads", config.threads)
+    if config.time_limit is not None:
+        highs.setOptionValue("time_limit", float(config.time_limit))
+    highs.passModel(lp)
+    if config.progress is not None:
+        subscribe_progress(highs, config.progress)
+    if start is not None:
+        solution = highspy.HighsSolution()
+        solution.col_value = np.asarray(start, dtype=float)[order]
+        solution.value_valid = True
+        highs.setSolution(solution)
+
+    started = time.perf_counter()
+    highs.run()
+    solve_time = time.perf_counter() - started
+
+    status, sol_status = HIGHS_STATUS.get(highs.getModelStatus().name, (pulp.LpStatusNotSolved, pulp.LpSolutionNoSolutionFound))
+    values = np.empty(arrays.n_cols)
+    values[order] = highs.getSolution().col_value
+    info = highs.getInfo()
+    if sol_status == pulp.LpSolutionIntegerFeasible and not math.isfinite(highs.getObjectiveValue()):
+        status, sol_status = pulp.LpStatusNotSolved, pulp.LpSolutionNoSolutionFound
+    objective = best_bound = gap = None
+    if sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        objective = float(arrays.col_cost @ values)
+        best_bound, gap = (info.mip_dual_bound, info.mip_gap) if integer else (objective, 0.0)
+        if sol_status == pulp.LpSolutionOptimal:
+            best_bound = objective if best_bound is None else best_bound
+    else:
+        values = None
+
+    return values, SolveInfo(
+        backend="highs-direct",
+        status=pulp.LpStatus[status],
+        solution_status=pulp.LpSolution[sol_status],
+        objective=objective,
+        best_bound=best_bound,
+        gap=gap,
+        solve_time=solve_time,
+    )
+
+
+def split_solution(arrays, values):
+    # Column values as (route_qty, opened, unmet_qty), like solution_values
+    n_routes, n_pools = arrays.n_routes, arrays.n_pools
+    return (
+        np.rint(values[:n_routes]).astype(np.int64),
+        values[n_routes:n_routes + n_pools].astype(float),
+        np.rint(values[n_routes + n_pools:]).astype(np.int64),
+    )
+
+
+def array_relaxation_solvers(arrays, config):
+    # solve_relaxed and solve_residual of relax_and_round for the arrays
+    splits = [arrays.n_routes, arrays.n_routes + arrays.n_pools]
+
+    def solve_relaxed():
+        values, info = solve_model_arrays(arrays, config, integer=False)
+        return (np.split(values, splits) if values is not None else None), info
+
+    def solve_residual(free, start):
+        # Fix every column outside `free` at its rounded value and start from the rounding
+        free, start = np.concatenate(free), np.concatenate(start).astype(float)
+        values, info = solve_model_arrays(
+            arrays, config, start=start,
+            col_lower=np.where(free, 0.0, start), col_upper=np.where(free, arrays.col_upper, start)
+        )
+        return (split_solution(arrays, values) if values is not None else None), info
+
+    return solve_relaxed, solve_residual
@@ -0,0 +1,174 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+from src.optimizer import compute_late_days
+from src.presolve import lane_codes
+
+VIOLATION_COLUMNS = ["Check", "Row", "PO Number", "PO Line Number", "Shipment ID", "Excess"]
+
+
+@dataclass
+class Evaluation:
+    # Objective of an assignment as the pooled model scores it, its components and every
+    # violated constraint. Row is the position in the assignment table, -1 for demand and
+    # capacity checks, which concern a whole PO line or container.
+    objective: float
+    container_cost: float
+    late_penalty: float
+    unmet_penalty: float
+    qty_assigned: int
+    unmet_qty: int
+    containers_used: int
+    violations: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=VIOLATION_COLUMNS))
+
+    @property
+    def feasible(self):
+        return self.violations.empty
+
+    def components(self):
+        return {
+            "Total Cost": self.objective, "Container Cost": self.container_cost,
+            "Late Penalty": self.late_penalty, "Unmet Penalty": self.unmet_penalty,
+            "Qty Assigned": self.qty_assigned, "Unmet Qty": self.unmet_qty,
+            "Containers Used": self.containers_used,
+        }
+
+
+class AssignmentEvaluator:
+    # Scores and checks assignments of PO lines to containers (one row per Shipment ID of
+    # the per-unit capacity table) without a model. The PO and container columns are
+    # turned into arrays once, so heuristics can evaluate many candidate assignments:
+    #   evaluate_table(df)  an assignment table such as optimize_shipping's results, keyed
+    #                       by PO Number, PO Line Number and Shipment ID with Qty Assigned
+    #   evaluate(po_pos, cap_pos, qty)  the same with positions into po_df and cap_df
+    # Checked: known PO lines and containers, non-negative whole quantities, same lane,
+    # departure on or after the Export ETA, no PO line shipped beyond its quantity and
+    # the volume and weight of every container.
+    def __init__(self, po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2, eps=1e-6):
+        self.po_df = po_df
+        self.cap_df = cap_df
+        self.eps = eps
+        self.po_keys = pd.MultiIndex.from_frame(po_df[["PO Number", "PO Line Number"]].astype(object))
+        self.ship_ids = pd.Index(cap_df["Shipment ID"].astype(object))
+        self.po_number = np.append(po_df["PO Number"].to_numpy(dtype=object), None)
+        self.po_line = np.append(po_df["PO Line Number"].to_numpy(dtype=object), None)
+        self.shipment_id = np.append(cap_df["Shipment ID"].to_numpy(dtype=object), None)
+
+        self.po_qty = po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64)
+        self.unit_vol = po_df["Volume (m3)"].to_numpy(dtype=float)
+        self.unit_wt = po_df["Weight (kg)"].to_numpy(dtype=float)
+        self.unmet_rate = po_df["Unmet Penalty"].to_numpy(dtype=float)
+        weight = float(priority_multiplier) ** po_df["Priority Level"].to_numpy(dtype=float)
+        self.late_rate = late_penalty_per_day * weight
+        self.export_eta = pd.to_datetime(po_df["Export ETA"]).to_numpy(dtype="datetime64[ns]")
+        self.import_eta = pd.to_datetime(po_df["Import ETA"]).to_numpy(dtype="datetime64[ns]")
+        self.po_lane, self.cap_lane = lane_codes(po_df, cap_df)
+
+        self.max_vol = cap_df["Max Volume (m³)"].to_numpy(dtype=float)
+        self.max_wt = cap_df["Max Weight (kg)"].to_numpy(dtype=float)
+        self.price = cap_df["Price (USD)"].to_numpy(dtype=float)
+        self.departure = pd.to_datetime(cap_df["Departure Date"]).to_numpy(dtype="datetime64[ns]")
+        self.arrival = pd.to_datetime(cap_df["Arrival Date"]).to_numpy(dtype="datetime64[ns]")
+
+    def positions(self, assignments):
+        # (po_pos, cap_pos, qty, rows) of the rows with a quantity; -1 for unknown keys.
+        # Rows without quantity, such as the unmet rows of a results table, are skipped.
+        rows = np.flatnonzero(assignments["Qty Assigned"].fillna(0).to_numpy() != 0)
+        assignments = assignments.iloc[rows]
+        po_pos = self.po_keys.get_indexer(pd.MultiIndex.from_frame(
+            assignments[["PO Number", "PO Line Number"]].astype(object)
+        ))
+        cap_pos = self.ship_ids.get_indexer(assignments["Shipment ID"].astype(object))
+        return po_pos, cap_pos, assignments["Qty Assigned"].to_numpy(dtype=float), rows
+
+    def evaluate_table(self, assignments):
+        po_pos, cap_pos, qty, rows = self.positions(assignments)
+        return self.evaluate(po_pos, cap_pos, qty, rows=rows)
+
+    def evaluate(self, po_pos, cap_pos, qty, rows=None):
+        # rows: the assignment table position of every entry, for the violation report
+        po_pos, cap_pos, qty = np.asarray(po_pos), np.asarray(cap_pos), np.asarray(qty, dtype=float)
+        rows = np.arange(len(qty)) if rows is None else np.asarray(rows)
+        n_po, n_cap = len(self.po_qty), len(self.price)
+
+        # --- Row checks ---
+        known = (po_pos >= 0) & (cap_pos >= 0)
+        checks = [
+            ("unknown PO line", po_pos < 0),
+            ("unknown container", (cap_pos < 0) & (po_pos >= 0)),
+            ("quantity", (qty < 0) | (qty != np.floor(qty))),
+        ]
+        p, c, q = po_pos[known], cap_pos[known], qty[known]
+        lane_ok = (self.po_lane[p] >= 0) & (self.po_lane[p] == self.cap_lane[c])
+        # NaT compares as false, so a missing date fails the departure check
+        early = ~(self.departure[c] >= self.export_eta[p])
+        checks.append(("lane", _scatter(known, ~lane_ok)))
+        checks.append(("departure", _scatter(known, lane_ok & early)))
+
+        # --- Costs ---
+        late_days = compute_late_days(self.arrival[c], self.import_eta[p])
+        late_penalty = float((late_days * self.late_rate[p]) @ q)
+        used = np.zeros(n_cap, dtype=bool)
+        used[c[q > 0]] = True
+        container_cost = float(self.price[used].sum())
+        shipped = np.bincount(p, weights=q, minlength=n_po)
+        unmet = np.maximum(self.po_qty - shipped, 0)
+        unmet_penalty = float(self.unmet_rate @ unmet)
+
+        # --- Demand and capacity checks ---
+        over = shipped - self.po_qty
+        load_vol = np.bincount(c, weights=q * self.unit_vol[p], minlength=n_cap)
+        load_wt = np.bincount(c, weights=q * self.unit_wt[p], minlength=n_cap)
+
+        violations = [(check, rows[mask], po_pos[mask], cap_pos[mask], np.nan) for check, mask in checks if mask.any()]
+        for check, excess, limit, is_po in [
+            ("demand", over, 0, True),
+            ("volume", load_vol - self.max_vol, self.eps, False),
+            ("weight", load_wt - self.max_wt, self.eps, False),
+        ]:
+            pos = np.flatnonzero(excess > limit)
+            if len(pos):
+                none = np.full(len(pos), -1)
+                violations.append((check, none, pos, none, excess[pos]) if is_po else (check, none, none, pos, excess[pos]))
+
+        return Evaluation(
+            objective=container_cost + late_penalty + unmet_penalty,
+            container_cost=container_cost,
+            late_penalty=late_penalty,
+            unmet_penalty=unmet_penalty,
+            qty_assigned=int(q.sum()),
+            unmet_qty=int(unmet.sum()),
+            containers_used=int(used.sum()),
+            violations=self._violation_table(violations),
+        )
+
+    def _violation_table(self, violations):
+        # One row per (check, row, PO position, container position, excess) entry; the
+        # key columns end with None, so position -1 reads as None
+        if not violations:
+            return pd.DataFrame(columns=VIOLATION_COLUMNS)
+        checks, rows, po_pos, cap_pos, excess = zip(*violations)
+        sizes = [len(r) for r in rows]
+        po_pos, cap_pos = np.concatenate(po_pos), np.concatenate(cap_pos)
+        return pd.DataFrame({
+            "Check": np.repeat(np.array(checks, dtype=object), sizes),
+            "Row": np.concatenate(rows),
+            "PO Number": self.po_number[po_pos],
+            "PO Line Number": self.po_line[po_pos],
+            "Shipment ID": self.shipment_id[cap_pos],
+            "Excess": np.concatenate([np.broadcast_to(np.asarray(e, dtype=float), (n,)) for e, n in zip(excess, sizes)]),
+        }, columns=VIOLATION_COLUMNS)
+
+
+def _scatter(mask, values):
+    # Values for the True positions of mask, False elsewhere
+    out = np.zeros(len(mask), dtype=bool)
+    out[mask] = values
+    return out
+
+
+def evaluate_assignments(po_df, cap_df, assignments, late_penalty_per_day=2, priority_multiplier=2):
+    # Objective, components and violations of one assignment table
+    evaluator = AssignmentEvaluator(po_df, cap_df, late_penalty_per_day, priority_multiplier)
+    return evaluator.evaluate_table(assignments)
@@ -0,0 +1,234 @@
+import time
+
+import numpy as np
+import pandas as pd
+from src.optimizer import (
+    assemble_results, bucket_routes, build_container_pools, route_late_penalty, unit_fits
+)
+from src.instrumentation import RunStats
+from src.routes import find_feasible_routes
+from src.solver import SolveInfo
+
+
+def _first_fit(rem_vol, rem_wt, is_open, unit_vol, unit_wt, qty):
+    # First-fit of `qty` units over the open containers of a pool. Returns the units
+    # taken per container without modifying the pool.
+    fits = unit_fits(rem_vol, rem_wt, unit_vol, unit_wt, qty) * is_open
+    return np.minimum(fits, np.maximum(qty - (np.cumsum(fits) - fits), 0))
+
+
+class _PoolState:
+    # Opened containers of one pool: remaining volume/weight and the load per PO line
+    def __init__(self, max_vol, max_wt, units):
+        self.max_vol, self.max_wt, self.units = max_vol, max_wt, units
+        self.rem_vol = np.zeros(0)
+        self.rem_wt = np.zeros(0)
+        self.is_open = np.zeros(0, dtype=bool)
+        self.loads = []
+
+    def open_container(self):
+        closed = np.flatnonzero(~self.is_open)
+        if len(closed):
+            j = int(closed[0])
+        elif len(self.is_open) < self.units:
+            j = len(self.is_open)
+            self.rem_vol = np.append(self.rem_vol, 0.0)
+            self.rem_wt = np.append(self.rem_wt, 0.0)
+            self.is_open = np.append(self.is_open, False)
+            self.loads.append({})
+        else:
+            return None
+        self.rem_vol[j], self.rem_wt[j], self.is_open[j] = self.max_vol, self.max_wt, True
+        self.loads[j] = {}
+        return j
+
+    def add(self, j, p, qty, unit_vol, unit_wt):
+        self.rem_vol[j] -= qty * unit_vol
+        self.rem_wt[j] -= qty * unit_wt
+        self.loads[j][p] = self.loads[j].get(p, 0) + qty
+
+    def close(self, j):
+        self.is_open[j] = False
+        self.loads[j] = {}
+
+
+def greedy_shipping(po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2,
+                    return_info=False, stats=None):
+    # Fast heuristic alternative to optimize_shipping with the same inputs and output
+    # columns. PO lines are taken by priority weight and unmet penalty, largest unit
+    # volume first, and packed first-fit into the cheapest reachable pools; a local
+    # search then closes containers that do not pay for themselves.
+    start = time.perf_counter()
+    stats = stats or RunStats()
+    with stats.phase("route generation"):
+        pools, members = build_container_pools(cap_df)
+        routes = find_feasible_routes(po_df, pools)
+    stats.count(po_lines=len(po_df), pools=len(pools), routes=len(routes))
+
+    qty = po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64)
+    unit_vol = po_df["Volume (m3)"].to_numpy(dtype=float)
+    unit_wt = po_df["Weight (kg)"].to_numpy(dtype=float)
+    unmet_rate = po_df["Unmet Penalty"].to_numpy(dtype=float)
+    weight = float(priority_multiplier) ** po_df["Priority Level"].to_numpy(dtype=float)
+    price = pools["Price (USD)"].to_numpy(dtype=float)
+
+    _, route_pen = route_late_penalty(po_df, pools, routes, late_penalty_per_day, priority_multiplier)
+    pen_of = {(p, c): pen for (p, c), pen in zip(routes.tolist(), route_pen.tolist())}
+
+    # Candidate pools per PO line, cheapest late penalty first
+    by_po = bucket_routes(routes[:, 0], len(po_df))
+    candidates = [
+        [(int(routes[r, 1]), route_pen[r]) for r in bucket[np.argsort(route_pen[bucket], kind="stable")]]
+        for bucket in by_po
+    ]
+
+    states = [
+        _PoolState(v, w, int(u)) for v, w, u in zip(
+            pools["Max Volume (m³)"].to_numpy(dtype=float),
+            pools["Max Weight (kg)"].to_numpy(dtype=float),
+            pools["Pool Units"].to_numpy(),
+        )
+    ]
+    unmet = qty.copy()
+
+    # --- Constructive pass: first-fit decreasing ---
+    # Each step takes the cheapest option per unit for the line: space in an open
+    # container (late penalty only), a new container (late penalty plus the unit's
+    # share of the price) or leaving the quantity unmet.
+    with stats.phase("construction"):
+        max_vols = pools["Max Volume (m³)"].to_numpy(dtype=float)
+        max_wts = pools["Max Weight (kg)"].to_numpy(dtype=float)
+        order = np.lexsort((-unit_vol, -unmet_rate, -weight))
+        for p in order:
+            options = [
+                (c, pen, max(unit_vol[p] / max(max_vols[c], 1e-9), unit_wt[p] / max(max_wts[c], 1e-9)))
+                for c, pen in candidates[p] if pen < unmet_rate[p]
+            ]
+            while unmet[p] > 0:
+                best = None
+                for c, pen, share in options:
+                    state = states[c]
+                    if (unit_fits(state.rem_vol, state.rem_wt, unit_vol[p], unit_wt[p], 1) * state.is_open).any():
+                        cost, is_new = pen, False
+                    elif share <= 1 and (len(state.is_open) < state.units or not state.is_open.all()):
+                        cost, is_new = pen + price[c] * share, True
+                    else:
+                        continue
+                    if best is None or cost < best[0]:
+                        best = (cost, c, is_new)
+                if best is None or best[0] >= unmet_rate[p]:
+                    break
+
+                _, c, is_new = best
+                state = states[c]
+                if is_new:
+                    state.open_container()
+                take = _first_fit(state.rem_vol, state.rem_wt, state.is_open, unit_vol[p], unit_wt[p], unmet[p])
+                for j in np.flatnonzero(take):
+                    state.add(j, p, int(take[j]), unit_vol[p], unit_wt[p])
+                unmet[p] -= int(take.sum())
+
+    # --- Local search: close containers whose contents can move elsewhere, or whose
+    # contents are worth less than the container price ---
+    with stats.phase("local search"):
+        improved = True
+        while improved:
+            improved = False
+
+            # Shift load into open containers with slack on pools that arrive earlier
+            for c, state in enumerate(states):
+                for j in np.flatnonzero(state.is_open):
+                    for p, q in list(state.loads[j].items()):
+                        for c2, pen in candidates[p]:
+                            if q == 0 or pen >= pen_of[(p, c)]:
+                                break
+                            other = states[c2]
+                            take = _first_fit(other.rem_vol, other.rem_wt, other.is_open, unit_vol[p], unit_wt[p], q)
+                            for j2 in np.flatnonzero(take):
+                                other.add(j2, p, int(take[j2]), unit_vol[p], unit_wt[p])
+                                state.add(j, p, -int(take[j2]), unit_vol[p], unit_wt[p])
+                            q -= int(take.sum())
+                            improved = improved or take.any()
+                        if state.loads[j][p] == 0:
+                            del state.loads[j][p]
+
+            opened = [(c, j) for c, state in enumerate(states) for j in np.flatnonzero(state.is_open)]
+            opened.sort(key=lambda cj: states[cj[0]].rem_vol[cj[1]] / max(states[cj[0]].max_vol, 1e-9), reverse=True)
+            for c, j in opened:
+                state = states[c]
+                if not state.is_open[j]:
+                    continue
+                # Tentatively relocate each PO line's load into other open containers
+                trial = {}
+                moves, delta = [], -price[c]
+                for p, q in state.loads[j].items():
+                    left = q
+                    for c2, pen in candidates[p]:
+                        if left == 0:
+                            break
+                        if c2 not in trial:
+                            other = states[c2]
+                            trial[c2] = (other.rem_vol.copy(), other.rem_wt.copy(), other.is_open.copy())
+                            if c2 == c:
+                                trial[c2][2][j] = False
+                        rem_vol, rem_wt, is_open = trial[c2]
+                        take = _first_fit(rem_vol, rem_wt, is_open, unit_vol[p], unit_wt[p], left)
+                        for j2 in np.flatnonzero(take):
+                            rem_vol[j2] -= take[j2] * unit_vol[p]
+                            rem_wt[j2] -= take[j2] * unit_wt[p]
+                            moves.append((c2, j2, p, int(take[j2])))
+                            delta += take[j2] * (pen - pen_of[(p, c)])
+                        left -= int(take.sum())
+                    delta += left * (unmet_rate[p] - pen_of[(p, c)])
+                if delta < -1e-9:
+                    dropped = dict(state.loads[j])
+                    state.close(j)
+                    for c2, j2, p, q in moves:
+                        states[c2].add(j2, p, q, unit_vol[p], unit_wt[p])
+                        dropped[p] -= q
+                    for p, q in dropped.items():
+                        unmet[p] += q
+                    improved = True
+
+    # --- Map opened containers to Shipment IDs ---
+    with stats.phase("extraction"):
+        out_po, out_pool, out_ship, out_qty = [], [], [], []
+        for c, (base_id, state) in enumerate(zip(pools.index, states)):
+            pool_members = members[base_id]
+            used = [j for j in np.flatnonzero(state.is_open) if state.loads[j]]
+            for unit, j in enumerate(used):
+                for p, q in state.loads[j].items():
+                    out_po.append(p)
+                    out_pool.append(c)
+                    out_ship.append(pool_members[unit])
+                    out_qty.append(q)
+
+        assignments = (
+            np.array(out_po, dtype=np.int64), np.array(out_pool, dtype=np.int64),
+            np.array(out_ship, dtype=object), np.array(out_qty, dtype=np.int64)
+        )
+        results_df = assemble_results(
+            po_df, pools, assignments, unmet, late_penalty_per_day, priority_multiplier
+        )
+
+    if return_info:
+        objective = heuristic_objective(results_df, pools)
+        info = SolveInfo(
+            backend="greedy", status="Heuristic", solution_status="Solution Found",
+            objective=objective, solve_time=time.perf_counter() - start, stats=stats
+        )
+        return results_df, info
+    return results_df
+
+
+def heuristic_objective(results_df, pools):
+    # Container prices of the used Shipment IDs plus late and unmet penalties
+    if results_df.empty:
+        return 0.0
+    used = results_df.loc[results_df["Used Container"] == 1, "Base Shipment ID"]
+    container_cost = pools["Price (USD)"].reindex(used).sum()
+    return float(
+        container_cost
+        + pd.to_numeric(results_df["Late Penalty"], errors="coerce").fillna(0).sum()
+        + pd.to_numeric(results_df["Unmet Penalty"], errors="coerce").fillna(0).sum()
+    )
@@ -0,0 +1,127 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from src.decomposition import split_by_lane
+from src.instrumentation import RunStats, logger, merge_run_stats
+from src.optimizer import optimize_shipping, plan_objective
+from src.solver import SolveInfo
+
+PO_KEY = ["PO Number", "PO Line Number"]
+CAP_KEY = ["Shipment ID"]
+LANE = ["From Port", "To Port"]
+
+
+@dataclass
+class Plan:
+    # Preprocessed inputs of a solved run with its results, the state re-optimized from
+    po_df: pd.DataFrame
+    cap_df: pd.DataFrame
+    results_df: pd.DataFrame
+    info: SolveInfo = None
+    late_penalty_per_day: float = 2
+    priority_multiplier: float = 2
+
+
+def solve_plan(po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2, solver_config=None):
+    results_df, info = optimize_shipping(
+        po_df, cap_df, late_penalty_per_day, priority_multiplier,
+        solver_config=solver_config, return_info=True
+    )
+    return Plan(po_df, cap_df, results_df, info, late_penalty_per_day, priority_multiplier)
+
+
+def _keyed(df, key):
+    # Index rows by their key plus an occurrence number, so repeated keys still pair up
+    occurrence = df.groupby(key, sort=False, dropna=False).cumcount().rename("_occurrence")
+    return df.set_index([*(df[col] for col in key), occurrence])
+
+
+def _in_lanes(df, lanes):
+    if df.empty or not lanes:
+        return np.zeros(len(df), dtype=bool)
+    return pd.MultiIndex.from_frame(df[LANE]).isin(list(lanes))
+
+
+def apply_changes(df, key, upserts=None, removed=None):
+    # New table from a diff: rows whose key is in `removed` are dropped, upsert rows
+    # replace the rows with the same key or are appended
+    key_index = pd.MultiIndex.from_frame(df[key])
+    drop = pd.Series(False, index=df.index)
+    if removed is not None and len(removed):
+        drop |= key_index.isin(pd.MultiIndex.from_frame(pd.DataFrame(removed, columns=key)))
+    if upserts is not None and len(upserts):
+        drop |= key_index.isin(pd.MultiIndex.from_frame(upserts[key]))
+    frames = [df[~drop.to_numpy()]] + ([upserts] if upserts is not None and len(upserts) else [])
+    return pd.concat(frames, ignore_index=True)
+
+
+def changed_lanes(old_df, new_df, key):
+    # (From Port, To Port) lanes of every added, removed or modified row
+    old, new = _keyed(old_df, key), _keyed(new_df, key)
+    columns = [col for col in old.columns if col in new.columns]
+    common = old.index.intersection(new.index)
+    old_hash = pd.util.hash_pandas_object(old.loc[common, columns], index=False)
+    new_hash = pd.util.hash_pandas_object(new.loc[common, columns], index=False)
+    modified = common[old_hash.to_numpy() != new_hash.to_numpy()]
+
+    touched = pd.concat([
+        old.loc[old.index.difference(new.index), LANE],
+        new.loc[new.index.difference(old.index), LANE],
+        old.loc[modified, LANE],
+        new.loc[modified, LANE],
+    ])
+    return set(touched.itertuples(index=False, name=None))
+
+
+def reoptimize(plan, po_df, cap_df, solver_config=None, fix_untouched=True):
+    # Re-solve after an edit of the inputs. Only lanes with a changed PO line or container
+    # are rebuilt and solved, warm-started from the previous results; the rows of every
+    # other lane are kept as they were. fix_untouched=False re-solves the whole model
+    # from the previous solution instead. Returns the new Plan; its info carries the
+    # realized objective and the number of lanes re-solved.
+    start = time.perf_counter()
+    lanes = changed_lanes(plan.po_df, po_df, PO_KEY) | changed_lanes(plan.cap_df, cap_df, CAP_KEY)
+    previous = plan.results_df
+    prev_lane = _in_lanes(previous, lanes)
+
+    frames, infos = [], []
+    if fix_untouched:
+        if not previous.empty:
+            frames.append(previous[~prev_lane])
+        for lane, po_sub, cap_sub in split_by_lane(po_df, cap_df):
+            if lane not in lanes:
+                continue
+            warm_start = previous[prev_lane] if not previous.empty else None
+            results, info = optimize_shipping(
+                po_sub, cap_sub, plan.late_penalty_per_day, plan.priority_multiplier,
+                solver_config=solver_config, warm_start=warm_start, return_info=True
+            )
+            frames.append(results)
+            infos.append(info)
+    else:
+        results, info = optimize_shipping(
+            po_df, cap_df, plan.late_penalty_per_day, plan.priority_multiplier,
+            solver_config=solver_config, warm_start=previous, return_info=True
+        )
+        frames.append(results)
+        infos.append(info)
+
+    frames = [frame for frame in frames if not frame.empty]
+    results_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=previous.columns)
+    logger.info("re-optimized %d changed lane(s) in %.2fs", len(lanes), time.perf_counter() - start)
+
+    lane_stats = [info.stats for info in infos if info.stats is not None]
+    stats = merge_run_stats(lane_stats) if lane_stats else RunStats()
+    stats.count(changed_lanes=len(lanes), solved_models=len(infos))
+    statuses = [info.status for info in infos]
+    info = SolveInfo(
+        backend=infos[0].backend if infos else (plan.info.backend if plan.info else "cbc"),
+        status=next((s for s in statuses if s != "Optimal"), "Optimal"),
+        solution_status="Incremental",
+        objective=plan_objective(results_df),
+        solve_time=time.perf_counter() - start,
+        stats=stats,
+    )
+    return Plan(po_df, cap_df, results_df, info, plan.late_penalty_per_day, plan.priority_multiplier)
@@ -0,0 +1,107 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+FILE_FORMATS = ("csv", "parquet", "arrow")
+EXTENSIONS = {
+    ".csv": "csv", ".txt": "csv",
+    ".parquet": "parquet", ".pq": "parquet",
+    ".arrow": "arrow", ".feather": "arrow", ".ipc": "arrow",
+}
+
+# Repeated text columns of the inputs, stored as categoricals when compacting
+CATEGORICAL_COLUMNS = {
+    "Product Name", "Product Family", "From Port", "To Port",
+    "Week_Year", "Carrier", "Container Type",
+}
+
+
+def _source_name(source):
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, "name", "") or ""
+
+
+def detect_format(source):
+    # File format from the extension, falling back to the magic bytes of the content
+    ext = os.path.splitext(_source_name(source))[1].lower()
+    if ext in EXTENSIONS:
+        return EXTENSIONS[ext]
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            head = f.read(6)
+    elif hasattr(source, "read") and hasattr(source, "seek"):
+        position = source.tell()
+        head = source.read(6)
+        source.seek(position)
+        if isinstance(head, str):
+            return "csv"
+    else:
+        return "csv"
+    if head[:4] == b"PAR1":
+        return "parquet"
+    if head[:6] == b"ARROW1" or head[:4] == b"\xff\xff\xff\xff":
+        return "arrow"
+    return "csv"
+
+
+def _read_arrow(source, columns=None):
+    # Arrow IPC file or stream; files on disk are memory-mapped so the columns are not
+    # copied before the pandas conversion
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    if isinstance(source, (str, os.PathLike)):
+        buffer = pa.memory_map(os.fspath(source), "r")
+    else:
+        buffer = pa.BufferReader(source.read())
+    try:
+        table = ipc.open_file(buffer).read_all()
+    except pa.ArrowInvalid:
+        buffer.seek(0)
+        table = ipc.open_stream(buffer).read_all()
+    if columns is not None:
+        table = table.select([col for col in columns if col in table.column_names])
+    return table.to_pandas()
+
+
+def read_table(source, dtype=None, file_format=None, columns=None):
+    # Read a CSV, Parquet or Arrow IPC table from a path or file-like object. dtype is
+    # applied to CSV at parse time and to the other formats after loading.
+    file_format = file_format or detect_format(source)
+    if file_format not in FILE_FORMATS:
+        raise ValueError(f"Unknown file format '{file_format}', expected one of {FILE_FORMATS}")
+
+    if file_format == "csv":
+        return pd.read_csv(source, dtype=dtype, usecols=columns)
+
+    if file_format == "parquet":
+        if isinstance(source, (str, os.PathLike)):
+            df = pd.read_parquet(source, columns=columns, memory_map=True)
+        else:
+            df = pd.read_parquet(source, columns=columns)
+    else:
+        df = _read_arrow(source, columns)
+
+    if dtype:
+        df = df.astype({col: kind for col, kind in dtype.items() if col in df.columns})
+    return df
+
+
+def compact_dtypes(df, categorical=CATEGORICAL_COLUMNS):
+    # Categoricals for the repeated text columns, the smallest integer type that holds
+    # each integer column, and float32 where it represents every value exactly
+    compacted = {}
+    for col in df.columns:
+        values = df[col]
+        if col in categorical and (values.dtype == object or pd.api.types.is_string_dtype(values)):
+            compacted[col] = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            compacted[col] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values) and values.dtype != np.float32:
+            narrow = values.astype(np.float32)
+            if np.array_equal(narrow.to_numpy(dtype=np.float64), values.to_numpy(dtype=np.float64), equal_nan=True):
+                compacted[col] = narrow
+    return df.assign(**compacted)
@@ -0,0 +1,134 @@
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+logger = logging.getLogger("container_optimizer")
+
+
+def configure_logging(level=logging.INFO):
+    # Send the optimizer's log records to stderr at `level` (a logging level or its name)
+    if not any(getattr(handler, "_container_optimizer", False) for handler in logger.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        handler._container_optimizer = True
+        logger.addHandler(handler)
+    logger.setLevel(level)
+    return logger
+
+
+def current_rss_mb():
+    # Resident memory of this process; falls back to the peak RSS where /proc is missing
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb():
+    # High-water mark of this process's resident memory
+    try:
+        import resource
+        import sys
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+    except (ImportError, OSError):
+        return None
+
+
+@dataclass
+class PhaseStats:
+    name: str
+    seconds: float
+    rss_mb: float = None
+    rss_delta_mb: float = None
+    traced_peak_mb: float = None
+
+
+@dataclass
+class RunStats:
+    # Wall time and memory per phase plus model size counters. Every phase and counter
+    # is also sent to the "container_optimizer" logger at `level`. trace_memory adds
+    # tracemalloc's peak per phase, which is exact but slows allocation-heavy phases.
+    # on_phase is called with the name of every phase as it starts.
+    level: int = logging.INFO
+    trace_memory: bool = False
+    phases: list = field(default_factory=list)
+    counters: dict = field(default_factory=dict)
+    on_phase: object = None
+
+    @contextmanager
+    def phase(self, name):
+        if self.on_phase is not None:
+            self.on_phase(name)
+        rss_before = current_rss_mb()
+        if self.trace_memory:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            traced_peak = None
+            if self.trace_memory:
+                traced_peak = tracemalloc.get_traced_memory()[1] / 2**20
+                if started_tracing:
+                    tracemalloc.stop()
+            rss_after = current_rss_mb()
+            rss_delta = rss_after - rss_before if rss_after is not None and rss_before is not None else None
+            self.phases.append(PhaseStats(name, seconds, rss_after, rss_delta, traced_peak))
+            logger.log(
+                self.level, "phase %s: %.3fs, rss %s MB (%s MB)", name, seconds,
+                f"{rss_after:.1f}" if rss_after is not None else "n/a",
+                f"{rss_delta:+.1f}" if rss_delta is not None else "n/a",
+            )
+
+    def count(self, **counters):
+        self.counters.update(counters)
+        logger.log(self.level, "counters: %s", ", ".join(f"{k}={v}" for k, v in counters.items()))
+
+    @property
+    def total_seconds(self):
+        return sum(phase.seconds for phase in self.phases)
+
+    def phase_seconds(self):
+        # Seconds per phase name, summed when a phase ran more than once
+        seconds = {}
+        for phase in self.phases:
+            seconds[phase.name] = seconds.get(phase.name, 0.0) + phase.seconds
+        return seconds
+
+    def to_frame(self):
+        return pd.DataFrame([vars(phase) for phase in self.phases],
+                            columns=["name", "seconds", "rss_mb", "rss_delta_mb", "traced_peak_mb"])
+
+    def to_dict(self):
+        return {
+            "phases": [vars(phase) for phase in self.phases],
+            "counters": dict(self.counters),
+            "total_seconds": self.total_seconds,
+        }
+
+
+def merge_run_stats(stats_list, level=logging.INFO):
+    # Sum phase times and numeric counters over independent runs (e.g. one per lane)
+    merged = RunStats(level=level)
+    for name, seconds in pd.DataFrame(
+        [(p.name, p.seconds) for stats in stats_list for p in stats.phases], columns=["name", "seconds"]
+    ).groupby("name", sort=False)["seconds"].sum().items():
+        merged.phases.append(PhaseStats(name, seconds))
+    for stats in stats_list:
+        for key, value in stats.counters.items():
+            merged.counters[key] = merged.counters.get(key, 0) + value
+    return merged
@@ -0,0 +1,354 @@
+import atexit
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, replace
+
+from src.decomposition import optimize_shipping_by_lane
+from src.heuristic import greedy_shipping
+from src.incremental import Plan, reoptimize
+from src.ingest import detect_format
+from src.instrumentation import RunStats, logger
+from src.optimizer import optimize_shipping
+from src.preprocessing import load_capacity, preprocess_data
+from src.rolling import optimize_shipping_rolling
+from src.solver import SolverConfig
+from src.streaming import read_po_csv_chunked
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+@dataclass
+class Job:
+    # Status of one background job as last reported by its worker process
+    id: str
+    label: str = ""
+    status: str = "queued"
+    phase: str = None
+    submitted: float = None
+    started: float = None
+    finished: float = None
+    objective: float = None
+    best_bound: float = None
+    gap: float = None
+    error: str = None
+    result: object = None
+    last_seen: float = None
+    timeout: float = None
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class JobProgress:
+    # Handed to the job function inside the worker; forwards phase and incumbent
+    # updates to the manager
+    def __init__(self, job_id, events):
+        self.job_id = job_id
+        self._events = events
+
+    def phase(self, name):
+        self._events.put((self.job_id, "phase", name))
+
+    def incumbent(self, objective, best_bound=None, gap=None):
+        self._events.put((self.job_id, "incumbent", (objective, best_bound, gap)))
+
+
+def _run_job(job_id, events, fn, args, kwargs):
+    # Worker entry point. The worker leads its own process group, so cancelling the
+    # job also kills the solver subprocesses it started.
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    try:
+        result = fn(*args, progress=JobProgress(job_id, events), **kwargs)
+    except Exception as e:
+        events.put((job_id, "failed", f"{type(e).__name__}: {e}"))
+    else:
+        events.put((job_id, "done", result))
+
+
+class QueueFull(RuntimeError):
+    pass
+
+
+class JobManager:
+    # Runs submitted functions in worker processes, at most max_workers at a time and
+    # up to max_queued more waiting in submission order. Jobs are shared by everyone
+    # holding the manager and addressed by ID. A running job that nobody has looked at
+    # for abandon_after seconds (e.g. its browser tab was closed) is cancelled, and one
+    # that runs longer than its timeout is killed and failed. on_finish(job) is called
+    # once for every job that finishes, is cancelled or fails.
+    def __init__(self, max_workers=2, abandon_after=None, poll_interval=0.2, max_queued=None, on_finish=None):
+        self.max_workers = max_workers
+        self.abandon_after = abandon_after
+        self.poll_interval = poll_interval
+        self.max_queued = max_queued
+        self.on_finish = on_finish
+        self._context = multiprocessing.get_context("spawn")
+        self._events = self._context.Queue()
+        self._jobs = {}
+        self._pending = deque()
+        self._processes = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._dispatcher = threading.Thread(target=self._dispatch, daemon=True)
+        self._dispatcher.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, fn, *args, label="", timeout=None, **kwargs):
+        # fn(*args, progress=JobProgress, **kwargs) must be importable by the worker.
+        # Raises QueueFull when max_queued jobs are already waiting.
+        job = Job(id=uuid.uuid4().hex[:12], label=label, submitted=time.time(), last_seen=time.time(), timeout=timeout)
+        with self._lock:
+            if self.max_queued is not None and len(self._pending) >= self.max_queued:
+                raise QueueFull(f"{len(self._pending)} jobs already queued")
+            self._jobs[job.id] = job
+            self._pending.append((job.id, fn, args, kwargs))
+        logger.info("job %s queued: %s", job.id, label)
+        return job.id
+
+    def get(self, job_id, touch=True):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and touch:
+                job.last_seen = time.time()
+            return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def queue_position(self, job_id):
+        with self._lock:
+            ids = [pending[0] for pending in self._pending]
+        return ids.index(job_id) + 1 if job_id in ids else None
+
+    def counts(self):
+        with self._lock:
+            return {"queued": len(self._pending), "running": len(self._processes)}
+
+    def cancel(self, job_id):
+        return self._stop(job_id, "cancelled")
+
+    def _stop(self, job_id, status, error=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED_STATES:
+                return False
+            self._pending = deque(pending for pending in self._pending if pending[0] != job_id)
+            process = self._processes.pop(job_id, None)
+            job.status, job.finished, job.error = status, time.time(), error
+        if process is not None:
+            _kill_process_group(process)
+        logger.info("job %s %s%s", job_id, status, f": {error}" if error else "")
+        self._finished(job)
+        return True
+
+    def _finished(self, job):
+        if self.on_finish is not None:
+            try:
+                self.on_finish(job)
+            except Exception:
+                logger.exception("on_finish failed for job %s", job.id)
+
+    def forget(self, job_id):
+        # Drop a finished job and its result
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status in FINISHED_STATES:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        if self._closed.is_set():
+            return
+        for job in self.jobs():
+            self.cancel(job.id)
+        self._closed.set()
+        self._dispatcher.join()
+
+    def _dispatch(self):
+        while not self._closed.is_set():
+            self._drain_events(timeout=self.poll_interval)
+            self._reap()
+            self._cancel_abandoned()
+            self._enforce_timeouts()
+            self._start_pending()
+
+    def _drain_events(self, timeout=None):
+        events = []
+        try:
+            events.append(self._events.get(timeout=timeout))
+            while True:
+                events.append(self._events.get_nowait())
+        except queue.Empty:
+            pass
+        for job_id, kind, value in events:
+            self._apply_event(job_id, kind, value)
+
+    def _apply_event(self, job_id, kind, value):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != "running":
+                return
+            if kind == "phase":
+                job.phase = value
+            elif kind == "incumbent":
+                job.objective, job.best_bound, job.gap = value
+            else:
+                job.status, job.finished = kind, time.time()
+                if kind == "done":
+                    job.result = value
+                else:
+                    job.error = value
+                process = self._processes.pop(job_id, None)
+        if kind in FINISHED_STATES:
+            logger.info("job %s %s after %.1fs", job_id, kind, job.elapsed)
+            if process is not None:
+                process.join()
+            self._finished(job)
+
+    def _reap(self):
+        # A worker that exited without reporting a result crashed or was killed
+        with self._lock:
+            dead = [job_id for job_id, process in self._processes.items() if not process.is_alive()]
+        if dead:
+            self._drain_events(timeout=self.poll_interval)
+        crashed = []
+        with self._lock:
+            for job_id in dead:
+                process = self._processes.pop(job_id, None)
+                job = self._jobs[job_id]
+                if process is not None and job.status == "running":
+                    job.status, job.finished = "failed", time.time()
+                    job.error = f"worker exited with code {process.exitcode}"
+                    crashed.append(job)
+        for job in crashed:
+            self._finished(job)
+
+    def _cancel_abandoned(self):
+        if self.abandon_after is None:
+            return
+        cutoff = time.time() - self.abandon_after
+        for job in self.jobs():
+            if job.status in ("queued", "running") and job.last_seen < cutoff:
+                logger.info("job %s not polled for %ds", job.id, self.abandon_after)
+                self.cancel(job.id)
+
+    def _enforce_timeouts(self):
+        now = time.time()
+        for job in self.jobs():
+            if job.status == "running" and job.timeout is not None and now - job.started > job.timeout:
+                self._stop(job.id, "failed", f"timed out after {job.timeout:g}s")
+
+    def _start_pending(self):
+        with self._lock:
+            while self._pending and len(self._processes) < self.max_workers:
+                job_id, fn, args, kwargs = self._pending.popleft()
+                # Not a daemon, so a job can still start its own worker pool
+                process = self._context.Process(target=_run_job, args=(job_id, self._events, fn, args, kwargs))
+                process.start()
+                self._processes[job_id] = process
+                job = self._jobs[job_id]
+                job.status, job.started = "running", time.time()
+
+
+def _kill_process_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        # Not a group leader yet (or no process groups on this platform)
+        process.kill()
+    process.join()
+
+
+# --- Dashboard Solve Job ---
+
+@dataclass
+class SolveRequest:
+    # Everything the dashboard needs for one solve. engine is "mip" or "greedy";
+    # rolling_weeks=(window_weeks, commit_weeks) selects the rolling horizon,
+    # lane_workers the per-lane decomposition, and plan an incremental re-solve.
+    late_penalty_per_day: float = 2
+    priority_multiplier: float = 2
+    engine: str = "mip"
+    solver_config: SolverConfig = None
+    seed_with_greedy: bool = False
+    warm_start: object = None
+    plan: Plan = None
+    rolling_weeks: tuple = None
+    lane_workers: int = None
+    chunked_ingest: bool = False
+
+
+def run_solve_request(po_source, cap_source, request, progress=None):
+    # Preprocess the inputs and solve them as configured by the request. Returns
+    # (results_df, cap_df, solve_info, plan, bad_rows); plan is None for greedy runs.
+    on_phase = progress.phase if progress is not None else None
+    solver_config = request.solver_config or SolverConfig(msg=False)
+    if progress is not None:
+        solver_config = replace(solver_config, progress=progress.incumbent)
+    late, pm = request.late_penalty_per_day, request.priority_multiplier
+
+    if on_phase:
+        on_phase("preprocessing")
+    bad_rows = None
+    if request.chunked_ingest and detect_format(po_source) == "csv":
+        po_df, bad_rows = read_po_csv_chunked(po_source, compact=True)
+        cap_df = load_capacity(cap_source, compact=True)
+    else:
+        po_df, cap_df = preprocess_data(po_source, cap_source, compact=True)
+
+    stats = RunStats(on_phase=on_phase)
+    warm_start = request.warm_start
+    plan = request.plan
+    if request.engine == "greedy":
+        results_df, solve_info = greedy_shipping(po_df, cap_df, late, pm, return_info=True, stats=stats)
+    else:
+        if request.seed_with_greedy:
+            warm_start = greedy_shipping(po_df, cap_df, late, pm)
+        if plan is not None and (plan.late_penalty_per_day, plan.priority_multiplier) == (late, pm):
+            if on_phase:
+                on_phase("incremental re-solve")
+            plan = reoptimize(plan, po_df, cap_df, solver_config=solver_config)
+            results_df, solve_info = plan.results_df.copy(), plan.info
+        elif request.rolling_weeks:
+            if on_phase:
+                on_phase("rolling horizon")
+            results_df, solve_info = optimize_shipping_rolling(
+                po_df, cap_df, *request.rolling_weeks, late, pm,
+                solver_config=solver_config, return_info=True
+            )
+        elif request.lane_workers:
+            if on_phase:
+                on_phase("lane solves")
+            # The lane workers cannot report back through this process
+            results_df, solve_info = optimize_shipping_by_lane(
+                po_df, cap_df, late, pm, solver_config=replace(solver_config, progress=None),
+                warm_start=warm_start, max_workers=request.lane_workers, return_info=True
+            )
+        else:
+            results_df, solve_info = optimize_shipping(
+                po_df, cap_df, late, pm, solver_config=solver_config,
+                warm_start=warm_start, return_info=True, stats=stats
+            )
+
+    # Full MIP solutions are the starting point for incremental re-solves
+    if request.engine == "greedy":
+        plan = None
+    elif plan is None or plan.info is not solve_info:
+        plan = Plan(po_df, cap_df, results_df.copy(), solve_info, late, pm)
+
+    # Callbacks do not outlive the worker
+    stats.on_phase = None
+    if solve_info.stats is not None:
+        solve_info.stats.on_phase = None
+    return results_df, cap_df, solve_info, plan, bad_rows
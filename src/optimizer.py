@@ -1,179 +1,787 @@
+import logging
 import pulp
+import numpy as np
 import pandas as pd
+from dataclasses import replace
+from src.direct import array_relaxation_solvers, build_model_arrays, solve_model_arrays, split_solution
+from src.presolve import add_settled_objective, expand_solution, map_warm_start, reduce_inputs
+from src.relaxation import relative_gap, relax_and_round
+from src.routes import capped_routes, find_feasible_routes, route_unit_limit, split_siblings
+from src.solver import SolveInfo, SolverConfig, solve_model
+from src.instrumentation import RunStats, logger
+
+# Seconds allowed to find a packing of one pool's quantities into its opened containers
+PACK_TIME_LIMIT = 10
+
+def build_container_pools(cap_df):
+    # Collapse the per-unit container rows into one pool per Base Shipment ID. Units of a
+    # pool share lane, dates, capacity and price, so the model only needs a count of
+    # opened containers per pool. Returns the pool table (indexed by Base Shipment ID,
+    # with a "Pool Units" column) and the Shipment IDs belonging to each pool, in order.
+    base_ids = cap_df["Base Shipment ID"]
+    pools = cap_df.drop_duplicates("Base Shipment ID").set_index("Base Shipment ID", drop=False)
+    pools["Pool Units"] = base_ids.value_counts().reindex(pools.index).to_numpy()
+
+    members = cap_df.groupby("Base Shipment ID", sort=False)["Shipment ID"].agg(list).to_dict()
+    return pools, members
+
+
+def split_pools(pools, members, split):
+    # Give every unit of the pools marked in `split` a pool of its own, keyed by its
+    # Shipment ID. The capacity rows of a single unit are exact, so its load always packs.
+    keys, split_members = [], {}
+    for key, is_split in zip(pools.index, split):
+        units = [[sid] for sid in members[key]] if is_split else [members[key]]
+        for unit in units:
+            keys.append(unit[0] if is_split else key)
+            split_members[keys[-1]] = unit
+    counts = np.where(split, pools["Pool Units"].to_numpy(), 1)
+    split_df = pools.iloc[np.repeat(np.arange(len(pools)), counts)].copy()
+    split_df.index = pd.Index(keys, name=pools.index.name)
+    split_df.loc[np.repeat(split, counts), "Pool Units"] = 1
+    return split_df, split_members
+
+
+def unit_fits(rem_vol, rem_wt, unit_vol, unit_wt, limit, eps=1e-9):
+    # How many units of one PO line fit into containers with the given room, capped at `limit`
+    fits = np.full(len(rem_vol), float(limit))
+    if unit_vol > 0:
+        fits = np.minimum(fits, np.floor((rem_vol + eps) / unit_vol))
+    if unit_wt > 0:
+        fits = np.minimum(fits, np.floor((rem_wt + eps) / unit_wt))
+    return np.maximum(fits, 0).astype(np.int64)
+
+
+class _UnitLoads:
+    # Opened units of one pool while unpacking: remaining volume and weight per unit and
+    # the quantity of every packed PO line per unit
+    def __init__(self, n_open, max_vol, max_wt, max_units):
+        self.max_vol, self.max_wt, self.max_units = max_vol, max_wt, max_units
+        self.rem_vol = np.full(n_open, max_vol)
+        self.rem_wt = np.full(n_open, max_wt)
+        self.lines = []
+        self.qty = np.zeros((0, n_open), dtype=np.int64)
+
+    def fits(self, unit_vol, unit_wt, limit):
+        # Units of a line that fit into each opened unit, capped at `limit`
+        return unit_fits(self.rem_vol, self.rem_wt, unit_vol, unit_wt, limit)
+
+    def open_unit(self):
+        self.rem_vol = np.append(self.rem_vol, self.max_vol)
+        self.rem_wt = np.append(self.rem_wt, self.max_wt)
+        self.qty = np.pad(self.qty, ((0, 0), (0, 1)))
+
+    def pack(self, p, qty, unit_vol, unit_wt, max_units):
+        # First-fit of qty units of PO line p over the opened units, opening further units
+        # up to max_units. Returns the units that did not fit.
+        row = np.zeros(len(self.rem_vol), dtype=np.int64)
+        while True:
+            fits = self.fits(unit_vol, unit_wt, qty)
+            take = np.minimum(fits, np.maximum(qty - (np.cumsum(fits) - fits), 0))
+            row[:len(take)] += take
+            self.rem_vol -= take * unit_vol
+            self.rem_wt -= take * unit_wt
+            qty -= int(take.sum())
+            if qty == 0 or len(self.rem_vol) >= max_units:
+                break
+            self.open_unit()
+            row = np.append(row, 0)
+        if row.any():
+            if p in self.lines:
+                self.qty[self.lines.index(p)] += row
+            else:
+                self.lines.append(p)
+                self.qty = np.vstack([self.qty, row])
+        return qty
+
+    def assign(self, lines, qty, unit_vol, unit_wt):
+        # Replace the packing with a quantity per line (rows) and unit (columns)
+        self.lines, self.qty = list(lines), qty
+        self.rem_vol = self.max_vol - unit_vol @ qty
+        self.rem_wt = self.max_wt - unit_wt @ qty
+
+
+def pack_units(qty, unit_vol, unit_wt, max_vol, max_wt, n_open, solver_config):
+    # Quantity per PO line and container when the lines' quantities pack into n_open
+    # identical containers, None when they do not (or no packing is found within
+    # PACK_TIME_LIMIT). A small feasibility MIP; containers are filled in volume order so
+    # that permuting them gives no new solutions.
+    model = pulp.LpProblem("Pack_Units", pulp.LpMinimize)
+    y = [[pulp.LpVariable(f"y_{l}_{u}", 0, int(q), cat=pulp.LpInteger) for u in range(n_open)] for l, q in enumerate(qty)]
+    model.setObjective(pulp.LpAffineExpression())
+    for l, q in enumerate(qty):
+        model.addConstraint(pulp.lpSum(y[l]) == int(q), f"Line_{l}")
+    volumes = [pulp.lpSum(unit_vol[l] * y[l][u] for l in range(len(qty))) for u in range(n_open)]
+    for u in range(n_open):
+        model.addConstraint(volumes[u] <= max_vol, f"Vol_{u}")
+        model.addConstraint(pulp.lpSum(unit_wt[l] * y[l][u] for l in range(len(qty))) <= max_wt, f"Wt_{u}")
+        if u:
+            model.addConstraint(volumes[u] <= volumes[u - 1], f"Order_{u}")
+    time_limit = min(solver_config.time_limit or PACK_TIME_LIMIT, PACK_TIME_LIMIT)
+    backend = "highs" if solver_config.backend.lower() == "highs-direct" else solver_config.backend
+    solve_model(model, SolverConfig(backend=backend, time_limit=time_limit, threads=solver_config.threads, msg=False))
+    if model.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+        return None
+    return np.rint([[var.varValue or 0 for var in row] for row in y]).astype(np.int64).reshape(len(qty), n_open)
+
+
+def unpack_pool_assignments(routes, route_qty, opened, pools, members, unit_vol, unit_wt,
+                            route_pen=None, unmet_rate=None, solver_config=None):
+    # Split each pool's aggregated assignment into per-container Shipment IDs with a
+    # first-fit pass over the opened units (largest unit volume first). When that leaves
+    # quantity over and solver_config is given, the pool is packed exactly (pack_units).
+    # A pool whose quantities do not pack into its opened units is short: further units
+    # of the pool are opened, and once it runs out of units the rest moves to the line's
+    # other routes (given route_pen and unmet_rate), into spare room of their opened units,
+    # then into new units where one costs less than leaving what it holds unmet. Whatever
+    # still does not fit is returned as extra unmet quantity per PO line.
+    # Returns positional arrays (po, pool, Shipment ID, qty), the overflow per PO line and
+    # the short pools.
+    overflow = np.zeros(len(unit_vol), dtype=np.int64)
+    short = np.zeros(len(pools), dtype=bool)
+    max_vols = pools["Max Volume (m³)"].to_numpy(dtype=float)
+    max_wts = pools["Max Weight (kg)"].to_numpy(dtype=float)
+    prices = pools["Price (USD)"].to_numpy(dtype=float)
+    n_units = np.array([len(members[base_id]) for base_id in pools.index])
+    loads = {}
+
+    used = np.flatnonzero(route_qty > 0)
+    used = used[np.lexsort((-unit_vol[routes[used, 0]], routes[used, 1]))]
+    left = []
+    for bucket in np.split(used, np.flatnonzero(np.diff(routes[used, 1])) + 1):
+        if not len(bucket):
+            continue
+        c = routes[bucket[0], 1]
+        lines, qty = routes[bucket, 0], route_qty[bucket].astype(np.int64)
+        n_open = min(max(int(round(opened[c])), 1), n_units[c])
+        load = loads[c] = _UnitLoads(n_open, max_vols[c], max_wts[c], n_units[c])
+        remaining = [load.pack(p, int(q), unit_vol[p], unit_wt[p], n_open) for p, q in zip(lines, qty)]
+        if not any(remaining):
+            continue
+        packed = None
+        if solver_config is not None:
+            packed = pack_units(qty, unit_vol[lines], unit_wt[lines], max_vols[c], max_wts[c], n_open, solver_config)
+        if packed is not None:
+            load.assign(lines, packed, unit_vol[lines], unit_wt[lines])
+            continue
+        short[c] = True
+        for p, q in zip(lines, remaining):
+            if q:
+                q = load.pack(p, q, unit_vol[p], unit_wt[p], n_units[c])
+            if q:
+                left.append((p, c, q))
+
+    # --- Move what a pool could not hold to the line's other routes ---
+    by_po = bucket_routes(routes[:, 0], len(unit_vol)) if left and route_pen is not None else None
+    for p, c, remaining in left:
+        if by_po is not None:
+            others = by_po[p][routes[by_po[p], 1] != c]
+            for r in others[np.argsort(route_pen[others], kind="stable")]:
+                c2 = routes[r, 1]
+                if remaining == 0 or route_pen[r] >= unmet_rate[p]:
+                    break
+                if c2 not in loads:
+                    loads[c2] = _UnitLoads(0, max_vols[c2], max_wts[c2], n_units[c2])
+                load = loads[c2]
+                remaining = load.pack(p, remaining, unit_vol[p], unit_wt[p], len(load.rem_vol))
+                # Open another unit while the units it takes are worth more than its price
+                while remaining and len(load.rem_vol) < n_units[c2]:
+                    take = unit_fits(max_vols[c2:c2 + 1], max_wts[c2:c2 + 1], unit_vol[p], unit_wt[p], remaining)[0]
+                    if take == 0 or prices[c2] >= take * (unmet_rate[p] - route_pen[r]):
+                        break
+                    remaining = load.pack(p, remaining, unit_vol[p], unit_wt[p], len(load.rem_vol) + 1)
+        if remaining > 0:
+            overflow[p] += remaining
+            logger.info("could not pack %d units of PO line %s into pool %s or another route",
+                        remaining, p, pools.index[c])
+
+    out_po, out_pool, out_ship, out_qty = [], [], [], []
+    for c in sorted(loads):
+        load = loads[c]
+        rows, units = np.nonzero(load.qty)
+        out_po.append(np.asarray(load.lines, dtype=np.int64)[rows])
+        out_pool.append(np.full(len(rows), c))
+        out_ship.append(np.asarray(members[pools.index[c]], dtype=object)[units])
+        out_qty.append(load.qty[rows, units])
+
+    if not out_po:
+        empty = np.zeros(0, dtype=np.int64)
+        return (empty, empty, np.zeros(0, dtype=object), empty), overflow, short
+    return (
+        np.concatenate(out_po), np.concatenate(out_pool),
+        np.concatenate(out_ship), np.concatenate(out_qty)
+    ), overflow, short
+
+
+def compute_late_days(arrival, import_eta):
+    # Whole days an arrival lands after the Import ETA (floored like Timedelta.days),
+    # never negative; 0 where either date is missing
+    delta = np.asarray(arrival, dtype="datetime64[ns]") - np.asarray(import_eta, dtype="datetime64[ns]")
+    late_days = np.zeros(delta.shape, dtype=np.int64)
+    valid = ~np.isnat(delta)
+    late_days[valid] = delta[valid] // np.timedelta64(1, "D")
+    return np.maximum(late_days, 0)
 
-def optimize_shipping(po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2):
-    model = pulp.LpProblem("PO_Container_Optimization", pulp.LpMinimize)
-    assign = {}
-    use_container = {}
-    unmet_vars = {}
 
-    # Feasible routes: PO line to shipment match
-    feasible_routes = []
-    for po_idx, po in po_df.iterrows():
-        for cap_idx, cap in cap_df.iterrows():
-            if (
-                po["From Port"] == cap["From Port"] and
-                po["To Port"] == cap["To Port"] and
-                cap["Departure Date"] >= po["Export ETA"]
-            ):
-                feasible_routes.append((po_idx, cap["Shipment ID"]))
+def route_late_penalty(po_df, pools, routes, late_penalty_per_day=2, priority_multiplier=2):
+    # Late days and per-unit late penalty of every (PO line, pool) route
+    late_days = compute_late_days(
+        pools["Arrival Date"].to_numpy()[routes[:, 1]],
+        po_df["Import ETA"].to_numpy()[routes[:, 0]],
+    )
+    weight = float(priority_multiplier) ** po_df["Priority Level"].to_numpy(dtype=float)
+    return late_days, late_days * late_penalty_per_day * weight[routes[:, 0]]
 
-    print(f"Feasible routes found: {len(feasible_routes)}")
 
-    # Create decision variables
-    for po_idx, ship_id in feasible_routes:
-        max_qty = po_df.loc[po_idx, "To Be Shipped Quantity"]
-        assign[(po_idx, ship_id)] = pulp.LpVariable(f"x_{po_idx}_{ship_id}", 0, max_qty, cat='Integer')
+def bucket_routes(keys, n_buckets):
+    # Group route positions by an integer key (PO position or pool position) with one
+    # stable sort. Returns a list with the route positions of every bucket.
+    order = np.argsort(keys, kind="stable")
+    bounds = np.searchsorted(keys[order], np.arange(n_buckets + 1))
+    return [order[bounds[i]:bounds[i + 1]] for i in range(n_buckets)]
 
-    for ship_id in cap_df["Shipment ID"]:
-        use_container[ship_id] = pulp.LpVariable(f"use_{ship_id}", cat='Binary')
 
-    # Unmet variables
-    for po_idx, po in po_df.iterrows():
-        unmet = pulp.LpVariable(f"unmet_{po_idx}", 0, po["To Be Shipped Quantity"], cat='Integer')
-        unmet_vars[po_idx] = unmet
+def warm_start_values(warm_start, po_df, pools, routes):
+    # Starting solution from a previous run's results DataFrame: quantities per
+    # (PO line, pool), containers opened per pool and the remaining unmet quantity
+    assigned = warm_start[warm_start["Qty Assigned"] > 0]
+    prev_qty = assigned.groupby(["PO Number", "PO Line Number", "Base Shipment ID"])["Qty Assigned"].sum()
+    prev_open = assigned.groupby("Base Shipment ID")["Shipment ID"].nunique()
 
-    # Objective function: penalties + container cost
-    objective_terms = []
+    po_qty = po_df["To Be Shipped Quantity"].to_numpy()
+    route_keys = pd.MultiIndex.from_arrays([
+        po_df["PO Number"].to_numpy()[routes[:, 0]],
+        po_df["PO Line Number"].to_numpy()[routes[:, 0]],
+        pools.index.to_numpy()[routes[:, 1]],
+    ])
+    route_qty = prev_qty.reindex(route_keys).fillna(0).to_numpy()
+    route_qty = np.minimum(route_qty, po_qty[routes[:, 0]])
 
-    for (po_idx, ship_id), var in assign.items():
-        po = po_df.loc[po_idx]
-        ship = cap_df[cap_df["Shipment ID"] == ship_id].iloc[0]
+    opened = prev_open.reindex(pools.index).fillna(0).to_numpy()
+    opened = np.minimum(opened, pools["Pool Units"].to_numpy())
 
-        late_days = max((ship["Arrival Date"] - po["Import ETA"]).days, 0)
-        penalty = late_days * late_penalty_per_day * (priority_multiplier ** po["Priority Level"])
-        objective_terms.append(penalty * var)
+    shipped = np.bincount(routes[:, 0], weights=route_qty, minlength=len(po_df))
+    return route_qty, opened, np.maximum(po_qty - shipped, 0)
 
-        print(f"Late Penalty for PO Line {po_idx} on {ship_id}: {penalty} * {var}")
 
-    for ship_id in use_container:
-        price = cap_df[cap_df["Shipment ID"] == ship_id].iloc[0]["Price (USD)"]
-        objective_terms.append(price * use_container[ship_id])
-        print(f"Container Cost for {ship_id}: {price} * {use_container[ship_id]}")
+def seed_from_results(warm_start, po_df, pools, routes, route_vars, use_container, unmet_vars):
+    # Set the variables' initial values from a previous run's results DataFrame
+    route_qty, opened, unmet_qty = warm_start_values(warm_start, po_df, pools, routes)
+    for var, qty in zip(route_vars, route_qty):
+        var.setInitialValue(int(qty))
+    for var, n in zip(use_container.values(), opened):
+        var.setInitialValue(int(n))
+    for var, qty in zip(unmet_vars.values(), unmet_qty):
+        var.setInitialValue(int(qty))
 
-    for po_idx, unmet in unmet_vars.items():
-        penalty = po_df.loc[po_idx, "Unmet Penalty"]
-        objective_terms.append(unmet * penalty)
 
-    model += pulp.lpSum(objective_terms)
+PO_RESULT_COLUMNS = [
+    "PO Number", "PO Line Number", "SKU", "Product Name", "Product Family", "IsElectronic",
+    "From Port", "To Port", "Export ETA", "Import ETA", "Volume (m3)", "Weight (kg)",
+    "COGS", "Priority Level",
+]
+SHIP_RESULT_COLUMNS = [
+    "Carrier", "Container Type", "Max Volume (m³)", "Max Weight (kg)", "Price (USD)",
+    "Departure Date", "Arrival Date",
+]
+RESULT_COLUMNS = PO_RESULT_COLUMNS + ["Unmet Penalty Rate", "Shipment ID", "Base Shipment ID"] + SHIP_RESULT_COLUMNS + [
+    "Qty Assigned", "COGS Value Assigned", "Late Days", "Late Penalty", "Used Container",
+    "Unmet Qty", "COGS Value Unmet", "Unmet Penalty",
+]
+
+
+def assemble_results(po_df, pools, assignments, unmet_qty,
+                     late_penalty_per_day=2, priority_multiplier=2):
+    # Build the results DataFrame with one join of the PO and pool tables by position:
+    # one row per (PO line, container) with quantity, then one row per PO line with
+    # unmet quantity. assignments holds positional arrays (po, pool, Shipment ID, qty);
+    # unmet_qty is aligned with po_df.
+    assign_po, assign_pool, assign_ship, assign_qty = assignments
+    keep = assign_qty > 0
+    unmet_pos = np.flatnonzero(unmet_qty > 0)
+    n_assigned, n_unmet = int(keep.sum()), len(unmet_pos)
+
+    po_pos = np.concatenate([assign_po[keep], unmet_pos]).astype(np.intp)
+    pool_pos = np.concatenate([assign_pool[keep], np.full(n_unmet, -1)])
+    qty = np.concatenate([assign_qty[keep], np.zeros(n_unmet, dtype=np.int64)])
+    unmet = np.concatenate([np.zeros(n_assigned, dtype=np.int64), unmet_qty[unmet_pos]])
+    is_assigned = np.arange(n_assigned + n_unmet) < n_assigned
+
+    # Optional descriptive PO columns may be absent; unmet rows get no container columns
+    results = po_df.iloc[po_pos].reindex(columns=PO_RESULT_COLUMNS).reset_index(drop=True)
+    results["Unmet Penalty Rate"] = po_df["Unmet Penalty"].to_numpy()[po_pos]
+    ship_ids = np.concatenate([assign_ship[keep], np.full(n_unmet, None, dtype=object)])
+    results["Shipment ID"] = ship_ids
+    results["Base Shipment ID"] = pd.Series(pools["Base Shipment ID"].to_numpy(), dtype=object).reindex(pool_pos).to_numpy()
+    ships = pools.reindex(columns=SHIP_RESULT_COLUMNS).reset_index(drop=True).reindex(pool_pos)
+    for col in SHIP_RESULT_COLUMNS:
+        results[col] = ships[col].array
+
+    cogs = results["COGS"].to_numpy(dtype=float)
+    late_days = compute_late_days(results["Arrival Date"], results["Import ETA"])
+    weight = float(priority_multiplier) ** results["Priority Level"].to_numpy(dtype=float)
+    unmet_rate = results["Unmet Penalty Rate"].to_numpy(dtype=float)
+
+    results["Qty Assigned"] = qty
+    results["COGS Value Assigned"] = qty * cogs
+    results["Late Days"] = np.where(is_assigned, late_days, np.nan)
+    results["Late Penalty"] = np.where(is_assigned, late_days * late_penalty_per_day * weight * qty, np.nan)
+    results["Used Container"] = (is_assigned & ~pd.Series(ship_ids).duplicated().to_numpy()).astype(int)
+    results["Unmet Qty"] = unmet
+    results["COGS Value Unmet"] = unmet * cogs
+    results["Unmet Penalty"] = np.trunc(unmet * unmet_rate).astype(np.int64)
+    return results[RESULT_COLUMNS]
+
+
+def create_variables(po_df, pools, routes):
+    # Integer variables of the pooled model: quantity per route, containers opened per
+    # pool (bounded by the units available) and unmet quantity per PO line
+    po_qty = po_df["To Be Shipped Quantity"].to_numpy()
+    route_vars = [
+        pulp.LpVariable(f"x_{po_df.index[p]}_{c}", 0, po_qty[p], cat='Integer')
+        for p, c in routes.tolist()
+    ]
+    use_container = {
+        base_id: pulp.LpVariable(f"use_{pos}", 0, units, cat='Integer')
+        for pos, (base_id, units) in enumerate(zip(pools.index, pools["Pool Units"]))
+    }
+    unmet_vars = {
+        po_idx: pulp.LpVariable(f"unmet_{po_idx}", 0, qty, cat='Integer')
+        for po_idx, qty in zip(po_df.index, po_qty)
+    }
+    return route_vars, use_container, unmet_vars
+
+
+def set_penalty_objective(model, po_df, pools, routes, variables,
+                          late_penalty_per_day=2, priority_multiplier=2):
+    # Objective function: penalties + container cost. Only the late penalty
+    # coefficients depend on the penalty parameters.
+    route_vars, use_container, unmet_vars = variables
+    _, route_pen = route_late_penalty(po_df, pools, routes, late_penalty_per_day, priority_multiplier)
+    objective_terms = list(zip(route_vars, route_pen))
+    objective_terms += zip(use_container.values(), pools["Price (USD)"].to_numpy())
+    objective_terms += zip(unmet_vars.values(), po_df["Unmet Penalty"].to_numpy())
+    model.setObjective(pulp.LpAffineExpression(objective_terms))
+
+
+def add_constraints(model, po_df, pools, routes, variables):
+    route_vars, use_container, unmet_vars = variables
+    po_qty = po_df["To Be Shipped Quantity"].to_numpy()
+
+    # Bucket route variables by PO line and by pool once, so every constraint is
+    # emitted from its own routes only
+    by_po = bucket_routes(routes[:, 0], len(po_df))
+    by_pool = bucket_routes(routes[:, 1], len(pools))
 
     # Constraints: demand fulfillment
-    for po_idx in po_df.index:
-        model += (
-            pulp.lpSum(var for (idx, sid), var in assign.items() if idx == po_idx) + unmet_vars[po_idx]
-            == po_df.loc[po_idx, "To Be Shipped Quantity"],
-            f"Demand_PO_{po_idx}"
+    for p, (po_idx, unmet) in enumerate(unmet_vars.items()):
+        terms = [(route_vars[r], 1) for r in by_po[p]]
+        terms.append((unmet, 1))
+        model.addConstraint(pulp.LpConstraint(
+            terms, pulp.LpConstraintEQ, f"Demand_PO_{po_idx}", po_qty[p]
+        ))
+
+    # Capacity constraints per pool, summed over its opened units
+    po_vol = po_df["Volume (m3)"].to_numpy()
+    po_wt = po_df["Weight (kg)"].to_numpy()
+    route_po = routes[:, 0]
+    max_vols = pools["Max Volume (m³)"].to_numpy()
+    max_wts = pools["Max Weight (kg)"].to_numpy()
+    for c, use in enumerate(use_container.values()):
+        bucket = by_pool[c]
+        volume_used = [(route_vars[r], po_vol[route_po[r]]) for r in bucket]
+        weight_used = [(route_vars[r], po_wt[route_po[r]]) for r in bucket]
+        volume_used.append((use, -max_vols[c]))
+        weight_used.append((use, -max_wts[c]))
+
+        model.addConstraint(pulp.LpConstraint(volume_used, pulp.LpConstraintLE, f"VolCap_{c}", 0))
+        model.addConstraint(pulp.LpConstraint(weight_used, pulp.LpConstraintLE, f"WtCap_{c}", 0))
+
+    # A route carries at most what fits into one container per opened unit; the summed
+    # pool capacity alone would count room that no single container has
+    limit = route_unit_limit(po_df, pools, routes)
+    use_vars = list(use_container.values())
+    for r in capped_routes(po_df, routes, limit):
+        model.addConstraint(pulp.LpConstraint(
+            [(route_vars[r], 1), (use_vars[routes[r, 1]], -limit[r])], pulp.LpConstraintLE, f"Fit_{r}", 0
+        ))
+
+    # Containers split from one pool are identical: keep them in order of their load
+    for a, b in zip(*split_siblings(pools)):
+        model.addConstraint(pulp.LpConstraint(
+            [(route_vars[r], po_vol[route_po[r]]) for r in by_pool[b]]
+            + [(route_vars[r], -po_vol[route_po[r]]) for r in by_pool[a]],
+            pulp.LpConstraintLE, f"UnitOrder_{b}", 0
+        ))
+
+
+def count_model_size(stats, model, po_df, pools, routes, variables):
+    route_vars, use_container, unmet_vars = variables
+    stats.count(
+        po_lines=len(po_df), pools=len(pools), routes=len(routes),
+        variables=len(route_vars) + len(use_container) + len(unmet_vars),
+        constraints=len(model.constraints),
+        nonzeros=sum(len(constraint) for constraint in model.constraints.values()),
+    )
+
+
+def solution_values(variables):
+    # The solution as arrays: quantity per route, units opened per pool, unmet per PO line
+    route_vars, use_container, unmet_vars = variables
+    route_qty = np.rint([var.varValue or 0 for var in route_vars]).astype(np.int64)
+    opened = np.array([var.varValue or 0 for var in use_container.values()], dtype=float)
+    unmet_qty = np.rint([var.varValue or 0 for var in unmet_vars.values()]).astype(np.int64)
+    return route_qty, opened, unmet_qty
+
+
+def extract_results(po_df, pools, members, routes, variables,
+                    late_penalty_per_day=2, priority_multiplier=2, reduction=None, solver_config=None):
+    # Collect the solution as arrays and unpack pooled quantities into containers
+    return results_from_solution(
+        po_df, pools, members, routes, *solution_values(variables), late_penalty_per_day, priority_multiplier,
+        reduction=reduction, solver_config=solver_config
+    )
+
+
+def unpack_solution(po_df, pools, members, routes, route_qty, opened, unmet_qty,
+                    late_penalty_per_day=2, priority_multiplier=2, solver_config=None):
+    # Per-container assignments of a pooled solution, the unmet quantity per PO line
+    # including what could not be packed, and the pools whose quantities did not pack
+    # into their opened units. solver_config: backend for pack_units
+    _, route_pen = route_late_penalty(po_df, pools, routes, late_penalty_per_day, priority_multiplier)
+    assignments, overflow, short = unpack_pool_assignments(
+        routes, route_qty, opened, pools, members,
+        po_df["Volume (m3)"].to_numpy(dtype=float), po_df["Weight (kg)"].to_numpy(dtype=float),
+        route_pen, po_df["Unmet Penalty"].to_numpy(dtype=float), solver_config
+    )
+    return assignments, unmet_qty + overflow, short
+
+
+def pack_solution(po_df, pools, members, routes, solution,
+                  late_penalty_per_day=2, priority_multiplier=2, solver_config=None, stats=None):
+    # (pools, assignments, unmet_qty, seconds) of a pooled solution. With a solver_config,
+    # pools whose quantities do not pack into their containers are solved again split into
+    # them (resolve_split_pools), which replaces those pools; seconds is the time spent
+    # in those solves
+    stats = stats or RunStats()
+    seconds = 0.0
+    assignments, unmet_qty, short = unpack_solution(
+        po_df, pools, members, routes, *solution, late_penalty_per_day, priority_multiplier, solver_config
+    )
+    while short.any() and solver_config is not None:
+        # The pooled rows of these pools hold quantities that no packing into their
+        # containers does: solve their PO lines again with each of their containers on its own
+        with stats.phase("split re-solve"):
+            pools, members, routes, solution, info = resolve_split_pools(
+                po_df, pools, members, routes, solution, short,
+                late_penalty_per_day, priority_multiplier, solver_config
+            )
+        if solution is None:
+            raise RuntimeError(f"Solver returned no solution (status: {info.status})")
+        seconds += info.solve_time
+        assignments, unmet_qty, short = unpack_solution(
+            po_df, pools, members, routes, *solution, late_penalty_per_day, priority_multiplier, solver_config
+        )
+    if short.any():
+        logger.warning("%d pools did not pack into their opened containers; the plan differs from the solution",
+                       int(short.sum()))
+    return pools, assignments, unmet_qty, seconds
+
+
+def results_from_solution(po_df, pools, members, routes, route_qty, opened, unmet_qty,
+                          late_penalty_per_day=2, priority_multiplier=2, reduction=None, solver_config=None):
+    pools, assignments, unmet_qty, _ = pack_solution(
+        po_df, pools, members, routes, (route_qty, opened, unmet_qty), late_penalty_per_day, priority_multiplier,
+        solver_config
+    )
+    return results_from_assignments(
+        po_df, pools, assignments, unmet_qty, late_penalty_per_day, priority_multiplier, reduction
+    )
+
+
+def results_from_assignments(po_df, pools, assignments, unmet_qty,
+                             late_penalty_per_day=2, priority_multiplier=2, reduction=None):
+    # reduction: the presolve Reduction po_df came from; results are reported for the
+    # original PO lines
+    if reduction is not None:
+        po_df = reduction.po_df
+        assignments, unmet_qty = expand_solution(reduction, assignments, unmet_qty)
+
+    # Result output
+    return assemble_results(
+        po_df, pools, assignments, unmet_qty,
+        late_penalty_per_day, priority_multiplier
+    )
+
+
+def plan_objective(results_df):
+    # Cost of a results table as the model scores it: prices of the used Shipment IDs,
+    # late penalties and the unmet quantity at its (untruncated) unmet rate
+    return float(
+        results_df.loc[results_df["Used Container"] == 1, "Price (USD)"].astype(float).sum()
+        + pd.to_numeric(results_df["Late Penalty"], errors="coerce").fillna(0).sum()
+        + (results_df["Unmet Qty"] * results_df["Unmet Penalty Rate"].astype(float)).sum()
+    )
+
+
+def reconcile_objective(solve_info, objective):
+    # Report the cost of the plan actually returned. When packing into containers needed a
+    # re-solve or moved quantity, the plan differs from the pooled solution: the objective
+    # and gap are taken from the plan (the pooled bound still holds) and it is reported as
+    # a feasible plan rather than an optimal one, as relax_and_round reports its plans.
+    if solve_info.objective is None or np.isclose(objective, solve_info.objective, rtol=1e-9, atol=1e-6):
+        return solve_info
+    logger.info("returned plan costs %.2f, pooled solution %.2f", objective, solve_info.objective)
+    solve_info.objective = objective
+    if solve_info.best_bound is not None:
+        solve_info.gap = relative_gap(objective, solve_info.best_bound)
+    solve_info.status = pulp.LpStatus[pulp.LpStatusNotSolved]
+    solve_info.solution_status = pulp.LpSolution[pulp.LpSolutionIntegerFeasible]
+    return solve_info
+
+
+def settled_results(reduction, late_penalty_per_day, priority_multiplier, solver_config, stats, return_info):
+    # Results and SolveInfo when the presolve leaves nothing to solve
+    with stats.phase("extraction"):
+        empty = np.zeros(0, dtype=np.int64)
+        pools = reduction.reduced_cap.set_index("Base Shipment ID", drop=False)
+        results_df = assemble_results(
+            reduction.po_df, pools, (empty, empty, np.zeros(0, dtype=object), empty),
+            reduction.po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64),
+            late_penalty_per_day, priority_multiplier
         )
+    solve_info = SolveInfo(
+        backend=solver_config.backend.lower(), status="Optimal",
+        solution_status=pulp.LpSolution[pulp.LpSolutionOptimal],
+        objective=reduction.settled_objective, best_bound=reduction.settled_objective, gap=0.0,
+        solve_time=0.0, stats=stats,
+    )
+    if return_info:
+        return results_df, solve_info
+    return results_df
+
+
+def pulp_relaxation_solvers(model, variables, solver_config):
+    # solve_relaxed and solve_residual of relax_and_round for the PuLP model
+    route_vars, use_container, unmet_vars = variables
+    columns = [*route_vars, *use_container.values(), *unmet_vars.values()]
+    bounds = [(var.lowBound, var.upBound) for var in columns]
+    splits = np.cumsum([len(route_vars), len(use_container)])
+
+    def solve_relaxed():
+        for var in columns:
+            var.cat = pulp.LpContinuous
+        try:
+            info = solve_model(model, replace(solver_config, warm_start=False))
+        finally:
+            for var in columns:
+                var.cat = pulp.LpInteger
+        if not has_solution(model):
+            return None, info
+        return np.split(np.array([var.varValue or 0 for var in columns], dtype=float), splits), info
+
+    def solve_residual(free, start):
+        # Fix every column outside `free` at its rounded value and start from the rounding
+        for var, value, is_free in zip(columns, np.concatenate(start), np.concatenate(free)):
+            var.setInitialValue(int(value))
+            if not is_free:
+                var.lowBound = var.upBound = int(value)
+        try:
+            info = solve_model(model, replace(solver_config, warm_start=True))
+        finally:
+            for var, (low, up) in zip(columns, bounds):
+                var.lowBound, var.upBound = low, up
+        return (solution_values(variables) if has_solution(model) else None), info
+
+    return solve_relaxed, solve_residual
+
+
+def build_model(po_df, pools, routes, late_penalty_per_day, priority_multiplier, stats):
+    model = pulp.LpProblem("PO_Container_Optimization", pulp.LpMinimize)
 
-    # Capacity constraints per container
-    for ship_id in cap_df["Shipment ID"]:
-        ship = cap_df[cap_df["Shipment ID"] == ship_id].iloc[0]
-        max_vol = ship["Max Volume (m³)"]
-        max_wt = ship["Max Weight (kg)"]
+    with stats.phase("variable creation"):
+        variables = create_variables(po_df, pools, routes)
 
-        volume_used = pulp.lpSum(
-            assign.get((po_idx, ship_id), 0) * po_df.loc[po_idx, "Volume (m3)"]
-            for po_idx in po_df.index
+    with stats.phase("objective"):
+        set_penalty_objective(model, po_df, pools, routes, variables, late_penalty_per_day, priority_multiplier)
+
+    with stats.phase("constraints"):
+        add_constraints(model, po_df, pools, routes, variables)
+    return model, variables
+
+
+def solve_pulp(model, po_df, pools, routes, variables, late_penalty_per_day, priority_multiplier,
+               solver_config, warm_start, stats):
+    # Solution arrays (None without a solution) and SolveInfo of the PuLP model
+    if warm_start is not None and not warm_start.empty:
+        with stats.phase("warm start"):
+            seed_from_results(warm_start, po_df, pools, routes, *variables)
+        solver_config = replace(solver_config, warm_start=True)
+
+    if solver_config.relax_and_round:
+        _, route_pen = route_late_penalty(po_df, pools, routes, late_penalty_per_day, priority_multiplier)
+        return relax_and_round(
+            *pulp_relaxation_solvers(model, variables, solver_config),
+            po_df, pools, routes, route_pen, solver_config, stats
         )
-        weight_used = pulp.lpSum(
-            assign.get((po_idx, ship_id), 0) * po_df.loc[po_idx, "Weight (kg)"]
-            for po_idx in po_df.index
+    with stats.phase("solve"):
+        solve_info = solve_model(model, solver_config)
+    return (solution_values(variables) if has_solution(model) else None), solve_info
+
+
+def solve_direct(po_df, pools, routes, late_penalty_per_day, priority_multiplier, solver_config, warm_start, stats):
+    # The same with the model built as arrays and solved by highspy
+    with stats.phase("matrix build"):
+        _, route_pen = route_late_penalty(po_df, pools, routes, late_penalty_per_day, priority_multiplier)
+        arrays = build_model_arrays(po_df, pools, routes, route_pen)
+    stats.count(
+        po_lines=len(po_df), pools=len(pools), routes=len(routes), variables=arrays.n_cols,
+        constraints=len(arrays.row_lower), nonzeros=len(arrays.value),
+    )
+    start = None
+    if warm_start is not None and not warm_start.empty:
+        with stats.phase("warm start"):
+            start = np.concatenate(warm_start_values(warm_start, po_df, pools, routes))
+
+    if solver_config.relax_and_round:
+        return relax_and_round(
+            *array_relaxation_solvers(arrays, solver_config),
+            po_df, pools, routes, route_pen, solver_config, stats
         )
+    with stats.phase("solve"):
+        values, solve_info = solve_model_arrays(arrays, solver_config, start)
+    return (split_solution(arrays, values) if values is not None else None), solve_info
 
-        model += volume_used <= max_vol * use_container[ship_id], f"VolCap_{ship_id}"
-        model += weight_used <= max_wt * use_container[ship_id], f"WtCap_{ship_id}"
 
-    # Solve
-    model.solve()
+def resolve_split_pools(po_df, pools, members, routes, solution, split,
+                        late_penalty_per_day, priority_multiplier, solver_config):
+    # Split the pools marked in `split` into their containers and solve again with the PO
+    # lines routed into them free, together with every pool those lines can reach; every
+    # other column keeps its value. Starts from the solution with the freed lines unmet.
+    # Returns the split pools, members and routes with the new solution and its SolveInfo.
+    route_qty, opened, unmet_qty = solution
+    free_po = np.zeros(len(po_df), dtype=bool)
+    free_po[routes[(route_qty > 0) & split[routes[:, 1]], 0]] = True
+    logger.info("re-solving %d PO lines with %d pools split into their containers", int(free_po.sum()), int(split.sum()))
 
-    # Result output
-    results = []
-    used_shipment_ids = set()
-
-    for (po_idx, ship_id), var in assign.items():
-        if var.varValue and var.varValue > 0:
-            po = po_df.loc[po_idx]
-            ship = cap_df[cap_df["Shipment ID"] == ship_id].iloc[0]
-
-            used_flag = 0
-            if ship_id not in used_shipment_ids:
-                used_flag = 1
-                used_shipment_ids.add(ship_id)
-
-            results.append({
-                "PO Number": po["PO Number"],
-                "PO Line Number": po["PO Line Number"],
-                "SKU": po["SKU"],
-                "Product Name": po["Product Name"],
-                "Product Family": po["Product Family"],
-                "IsElectronic": po["IsElectronic"],
-                "From Port": po["From Port"],
-                "To Port": po["To Port"],
-                "Export ETA": po["Export ETA"],
-                "Import ETA": po["Import ETA"],
-                "Volume (m3)": po["Volume (m3)"],
-                "Weight (kg)": po["Weight (kg)"],
-                "COGS": po["COGS"],
-                "Priority Level": po["Priority Level"],
-                "Unmet Penalty Rate": po["Unmet Penalty"],
-                "Shipment ID": ship_id,
-                "Base Shipment ID": ship["Base Shipment ID"],
-                "Carrier": ship["Carrier"],
-                "Container Type": ship["Container Type"],
-                "Max Volume (m³)": ship["Max Volume (m³)"],
-                "Max Weight (kg)": ship["Max Weight (kg)"],
-                "Price (USD)": ship["Price (USD)"],
-                "Departure Date": ship["Departure Date"],
-                "Arrival Date": ship["Arrival Date"],
-                "Qty Assigned": int(var.varValue),
-                "COGS Value Assigned" : int(var.varValue) * po["COGS"],
-                "Late Days": max((ship["Arrival Date"] - po["Import ETA"]).days, 0),
-                "Late Penalty": max((ship["Arrival Date"] - po["Import ETA"]).days, 0) * late_penalty_per_day * (priority_multiplier ** po["Priority Level"]) * int(var.varValue),
-                "Used Container": used_flag,
-                "Unmet Qty": 0,
-                "COGS Value Unmet": 0,
-                "Unmet Penalty": 0,
-            })
-
-    for po_idx, unmet in unmet_vars.items():
-        if unmet.varValue and unmet.varValue > 0:
-            po = po_df.loc[po_idx]
-            results.append({
-                "PO Number": po["PO Number"],
-                "PO Line Number": po["PO Line Number"],
-                "SKU": po["SKU"],
-                "Product Name": po["Product Name"],
-                "Product Family": po["Product Family"],
-                "IsElectronic": po["IsElectronic"],
-                "From Port": po["From Port"],
-                "To Port": po["To Port"],
-                "Export ETA": po["Export ETA"],
-                "Import ETA": po["Import ETA"],
-                "Volume (m3)": po["Volume (m3)"],
-                "Weight (kg)": po["Weight (kg)"],
-                "COGS": po["COGS"],
-                "Priority Level": po["Priority Level"],
-                "Unmet Penalty Rate": po["Unmet Penalty"],
-                "Shipment ID": None,
-                "Base Shipment ID": None,
-                "Carrier": None,
-                "Container Type": None,
-                "Max Volume (m³)": None,
-                "Max Weight (kg)": None,
-                "Price (USD)": None,
-                "Departure Date": None,
-                "Arrival Date": None,
-                "Qty Assigned": 0,
-                "COGS Value Assigned" : 0,
-                "Late Days": None,
-                "Late Penalty": None,
-                "Used Container": 0,
-                "Unmet Qty": int(unmet.varValue),
-                "COGS Value Unmet": int(unmet.varValue) * po["COGS"],
-                "Unmet Penalty": int(unmet.varValue * po["Unmet Penalty"]),
-            })
-
-    return pd.DataFrame(results)
+    new_pools, new_members = split_pools(pools, members, split)
+    new_routes = find_feasible_routes(po_df, new_pools)
+    old_route = pd.MultiIndex.from_arrays([routes[:, 0], pools.index[routes[:, 1]]]).get_indexer(
+        pd.MultiIndex.from_arrays([new_routes[:, 0], new_pools.index[new_routes[:, 1]]])
+    )
+    old_pool = pools.index.get_indexer(new_pools.index)
+    free_route = free_po[new_routes[:, 0]]
+    free_pool = np.zeros(len(new_pools), dtype=bool)
+    free_pool[new_routes[free_route, 1]] = True
+
+    start_qty = np.where((old_route >= 0) & ~free_route, route_qty[old_route], 0)
+    start_opened = np.where(old_pool >= 0, np.rint(opened[old_pool]), 0)
+    start_unmet = np.where(free_po, po_df["To Be Shipped Quantity"].to_numpy(), unmet_qty)
+    free = (free_route, free_pool, free_po)
+    start = (start_qty, start_opened, start_unmet)
+
+    config = replace(solver_config, relax_and_round=False, warm_start=False)
+    if config.backend.lower() == "highs-direct":
+        _, route_pen = route_late_penalty(po_df, new_pools, new_routes, late_penalty_per_day, priority_multiplier)
+        _, solve_residual = array_relaxation_solvers(build_model_arrays(po_df, new_pools, new_routes, route_pen), config)
+    else:
+        model, variables = build_model(po_df, new_pools, new_routes, late_penalty_per_day, priority_multiplier,
+                                       RunStats(level=logging.DEBUG))
+        _, solve_residual = pulp_relaxation_solvers(model, variables, config)
+    new_solution, info = solve_residual(free, start)
+    return new_pools, new_members, new_routes, new_solution, info
+
+
+def has_solution(model):
+    return model.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+
+
+def optimize_shipping(po_df, cap_df, late_penalty_per_day=2, priority_multiplier=2,
+                      solver_config=None, warm_start=None, return_info=False, stats=None,
+                      archive=None, presolve=True):
+    # solver_config: SolverConfig selecting the backend and its limits (default: CBC);
+    #   backend "highs-direct" builds the model as arrays and skips PuLP altogether
+    # warm_start: results DataFrame of a previous run used as the starting solution
+    # return_info: also return the SolveInfo (status, objective, bound, gap, run stats)
+    # stats: RunStats collecting phase timings and model size (default: logged at INFO)
+    # archive: ModelArchive that stores the built model and its solution; a model
+    #   archived for identical inputs is loaded instead of being rebuilt
+    # presolve: build the model from reduce_inputs' reduced tables (results are still
+    #   reported per original PO line)
+    stats = stats or RunStats()
+    solver_config = solver_config or SolverConfig()
+    direct = solver_config.backend.lower() == "highs-direct"
+    if direct and archive is not None:
+        raise ValueError("The model archive stores PuLP models; use the cbc or highs backend with it")
+
+    archived = None
+    reduction = None
+    if archive is not None:
+        with stats.phase("archive lookup"):
+            key = archive.key(po_df, cap_df, late_penalty_per_day, priority_multiplier, presolve)
+            if key in archive and archive.matches(key, presolve):
+                model, variables, context = archive.load_model(key)
+                model_po, pools, members, routes = context["po_df"], context["pools"], context["members"], context["routes"]
+                reduction = context.get("presolve")
+                archived = key
+    if archived is None:
+        model_po, model_cap = po_df, cap_df
+        if presolve:
+            with stats.phase("presolve"):
+                reduction = reduce_inputs(po_df, cap_df)
+                model_po, model_cap = reduction.reduced_po, reduction.reduced_cap
+            stats.count(**{f"presolve_{name}": value for name, value in reduction.counts.items()})
+            if model_po.empty:
+                # Every PO line was settled as unmet; there is no model left to solve
+                return settled_results(reduction, late_penalty_per_day, priority_multiplier,
+                                       solver_config, stats, return_info)
+
+        with stats.phase("route generation"):
+            # Identical containers are pooled by Base Shipment ID
+            pools, members = build_container_pools(model_cap)
+
+            # Feasible routes: PO line to container pool match
+            routes = find_feasible_routes(model_po, pools)
+
+    if reduction is not None and warm_start is not None and not warm_start.empty:
+        warm_start = map_warm_start(warm_start, reduction)
+
+    if direct:
+        solution, solve_info = solve_direct(model_po, pools, routes, late_penalty_per_day, priority_multiplier,
+                                            solver_config, warm_start, stats)
+    else:
+        if archived is None:
+            model, variables = build_model(model_po, pools, routes, late_penalty_per_day, priority_multiplier, stats)
+            if archive is not None:
+                with stats.phase("archive store"):
+                    archive.save_model(key, model, model_po, pools, members, routes, variables,
+                                       late_penalty_per_day, priority_multiplier, reduction=reduction)
+        count_model_size(stats, model, model_po, pools, routes, variables)
+        solution, solve_info = solve_pulp(model, model_po, pools, routes, variables, late_penalty_per_day,
+                                          priority_multiplier, solver_config, warm_start, stats)
+    if solution is None:
+        raise RuntimeError(f"Solver returned no solution (status: {solve_info.status})")
+
+    with stats.phase("extraction"):
+        pools, assignments, unmet_qty, seconds = pack_solution(
+            model_po, pools, members, routes, solution, late_penalty_per_day, priority_multiplier,
+            solver_config, stats
+        )
+        solve_info.solve_time += seconds
+
+        if reduction is not None:
+            add_settled_objective(solve_info, reduction)
+        results_df = results_from_assignments(
+            model_po, pools, assignments, unmet_qty, late_penalty_per_day, priority_multiplier, reduction
+        )
+        reconcile_objective(solve_info, plan_objective(results_df))
+    if archive is not None:
+        archive.save_solution(key, solution, (pools, assignments, unmet_qty), solve_info)
+
+    solve_info.stats = stats
+    if return_info:
+        return results_df, solve_info
+    return results_df
 
 
 if __name__ == "__main__":
@@ -1,9 +1,46 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+from src.ingest import compact_dtypes, read_table
 # from .volume_utils import compute_volume
 # from .date_utils import parse_week_year_to_date
 
+# Input file schemas as offered by the CSV templates: (column, expected format)
+PO_TEMPLATE_COLUMNS = [
+    ("PO Number", "str"),
+    ("PO Line Number", "int"),
+    ("SKU", "str"),
+    ("Product Name", "str"),
+    ("Product Family", "str"),
+    ("IsElectronic", "int (0 or 1)"),
+    ("COGS", "float"),
+    ("From Port", "str"),
+    ("To Port", "str"),
+    ("Export ETA", "date (DD/MM/YYYY)"),
+    ("Import ETA", "date (DD/MM/YYYY)"),
+    ("To Be Shipped Quantity", "int"),
+    ("Length (cm)", "float"),
+    ("Width (cm)", "float"),
+    ("Height (cm)", "float"),
+    ("Weight (kg)", "float"),
+    ("Priority Level", "int"),
+    ("Unmet Penalty", "float")
+]
+
+CAP_TEMPLATE_COLUMNS = [
+    ("Week_Year", "str (e.g. 2025-W25)"),
+    ("From Port", "str"),
+    ("To Port", "str"),
+    ("Carrier", "str"),
+    ("Container Type", "str"),
+    ("Available Units", "int"),
+    ("Max Volume (m³)", "float"),
+    ("Max Weight (kg)", "float"),
+    ("Estimated Transit Time (days)", "int"),
+    ("Price (USD)", "float")
+]
+
+
 def compute_volume(length_cm, width_cm, height_cm):
     # Convert cm³ to m³
     return (length_cm * width_cm * height_cm) / 1e6
@@ -14,86 +51,111 @@ def parse_week_year_to_date(week_year):
     return datetime.strptime(f'{year}-W{week}-1', "%Y-W%W-%w")
 
 
-def preprocess_data(po_path, capacity_path):
-    # Load data
-    po_df = pd.read_csv(po_path, dtype={
-        "PO Number": str,
-        "PO Line Number": int,
-        "SKU": str,
-        "Product Name": str,
-        "Product Family": str,
-        "IsElectronic": int,
-        "COGS": float,
-        "From Port": str,
-        "To Port": str,
-        "To Be Shipped Quantity": int,
-        "Length (cm)": float,
-        "Width (cm)": float,
-        "Height (cm)": float,
-        "Weight (kg)": float,
-        "Priority Level": int,
-        "Unmet Penalty": float
-    })
+def parse_week_year_column(week_years):
+    # Parse each distinct week string once and map the dates back onto the rows
+    codes, uniques = pd.factorize(week_years)
+    dates = pd.to_datetime([parse_week_year_to_date(week_year) for week_year in uniques])
+    return pd.Series(dates.take(codes, allow_fill=True, fill_value=pd.NaT), index=week_years.index, name=week_years.name)
+
+
+def expand_available_units(cap_df):
+    # One row per available container unit, keeping the source row's index label
+    units = cap_df["Available Units"].astype(int).clip(lower=0).to_numpy()
+    expanded = cap_df.loc[cap_df.index.repeat(units)]
+
+    base_ids = (
+        cap_df["Week_Year"].astype(str) + "_" + cap_df["From Port"].astype(str) + "_"
+        + cap_df["To Port"].astype(str) + "_" + cap_df["Carrier"].astype(str) + "_"
+        + cap_df["Container Type"].astype(str)
+    ).to_numpy().repeat(units)
+    unit_numbers = np.arange(len(expanded)) - np.repeat(np.cumsum(units) - units, units) + 1
 
-    cap_df = pd.read_csv(capacity_path, dtype={
-        "Week_Year": str,
-        "From Port": str,
-        "To Port": str,
-        "Carrier": str,
-        "Container Type": str,
-        "Available Units": int,
-        "Max Volume (m³)": float,
-        "Max Weight (kg)": float,
-        "Estimated Transit Time (days)": int,
-        "Price (USD)": float
+    expanded = expanded.assign(**{
+        "Shipment ID": base_ids + "-" + unit_numbers.astype(str),
+        "Base Shipment ID": base_ids,
     })
+    return expanded
+
+
+PO_DTYPES = {
+    "PO Number": str,
+    "PO Line Number": int,
+    "SKU": str,
+    "Product Name": str,
+    "Product Family": str,
+    "IsElectronic": int,
+    "COGS": float,
+    "From Port": str,
+    "To Port": str,
+    "To Be Shipped Quantity": int,
+    "Length (cm)": float,
+    "Width (cm)": float,
+    "Height (cm)": float,
+    "Weight (kg)": float,
+    "Priority Level": int,
+    "Unmet Penalty": float
+}
+
+CAP_DTYPES = {
+    "Week_Year": str,
+    "From Port": str,
+    "To Port": str,
+    "Carrier": str,
+    "Container Type": str,
+    "Available Units": int,
+    "Max Volume (m³)": float,
+    "Max Weight (kg)": float,
+    "Estimated Transit Time (days)": int,
+    "Price (USD)": float
+}
+
+REQUIRED_PO_COLUMNS = {col for col, _ in PO_TEMPLATE_COLUMNS}
+REQUIRED_CAP_COLUMNS = {col for col, _ in CAP_TEMPLATE_COLUMNS}
+
+
+def prepare_capacity(cap_df):
+    # --- Date Parsing ---
+    cap_df["Departure Date"] = parse_week_year_column(cap_df["Week_Year"])
+    cap_df["Arrival Date"] = cap_df["Departure Date"] + pd.to_timedelta(
+        cap_df["Estimated Transit Time (days)"], unit='D'
+    )
+
+    # --- Expand by Available Units ---
+    return expand_available_units(cap_df)
+
+
+def load_capacity(capacity_path, compact=False):
+    cap_df = read_table(capacity_path, dtype=CAP_DTYPES)
+    assert REQUIRED_CAP_COLUMNS.issubset(cap_df.columns), \
+        f"Missing required capacity columns: {REQUIRED_CAP_COLUMNS - set(cap_df.columns)}"
+    cap_df = prepare_capacity(cap_df)
+    return compact_dtypes(cap_df) if compact else cap_df
+
+
+def preprocess_data(po_path, capacity_path, compact=False):
+    # Load data: CSV, Parquet or Arrow IPC, detected from the name or content.
+    # compact stores repeated text as categoricals and downcasts numeric columns.
+    po_df = read_table(po_path, dtype=PO_DTYPES)
+    cap_df = read_table(capacity_path, dtype=CAP_DTYPES)
 
     # --- Schema Validation ---
-    required_po_cols = {
-        "PO Number", "PO Line Number", "SKU", "Product Name",
-        "Product Family", "IsElectronic", "COGS", "From Port",
-        "To Port", "Export ETA", "Import ETA", "To Be Shipped Quantity",
-        "Length (cm)", "Width (cm)", "Height (cm)", "Weight (kg)",
-        "Priority Level", "Unmet Penalty"
-    }
-
-    required_cap_cols = {
-        "Week_Year", "From Port", "To Port", "Carrier", "Container Type",
-        "Available Units", "Max Volume (m³)", "Max Weight (kg)",
-        "Estimated Transit Time (days)", "Price (USD)"
-    }
-
-    assert required_po_cols.issubset(po_df.columns), \
-        f"Missing required PO columns: {required_po_cols - set(po_df.columns)}"
-    assert required_cap_cols.issubset(cap_df.columns), \
-        f"Missing required capacity columns: {required_cap_cols - set(cap_df.columns)}"
+    assert REQUIRED_PO_COLUMNS.issubset(po_df.columns), \
+        f"Missing required PO columns: {REQUIRED_PO_COLUMNS - set(po_df.columns)}"
+    assert REQUIRED_CAP_COLUMNS.issubset(cap_df.columns), \
+        f"Missing required capacity columns: {REQUIRED_CAP_COLUMNS - set(cap_df.columns)}"
 
     # --- Compute Volume ---
     po_df["Volume (m3)"] = compute_volume(
-        po_df["Length (cm)"], po_df["Width (cm)"], po_df["Height (cm)"]
+        po_df["Length (cm)"].astype(float), po_df["Width (cm)"].astype(float), po_df["Height (cm)"].astype(float)
     )
 
     # --- Date Parsing ---
     po_df["Export ETA"] = pd.to_datetime(po_df["Export ETA"], format="%d/%m/%Y", errors="raise")
     po_df["Import ETA"] = pd.to_datetime(po_df["Import ETA"], format="%d/%m/%Y", errors="raise")
-    cap_df["Departure Date"] = cap_df["Week_Year"].apply(parse_week_year_to_date)
-    cap_df["Arrival Date"] = cap_df["Departure Date"] + pd.to_timedelta(
-        cap_df["Estimated Transit Time (days)"], unit='D'
-    )
-
-    # --- Expand by Available Units ---
-    expanded_rows = []
-    for _, row in cap_df.iterrows():
-        available_units = int(row.get("Available Units", 1))
-        base_id = f"{row['Week_Year']}_{row['From Port']}_{row['To Port']}_{row['Carrier']}_{row['Container Type']}"
-        for i in range(1, available_units + 1):
-            new_row = row.copy()
-            new_row["Shipment ID"] = f"{base_id}-{i}"
-            new_row["Base Shipment ID"] = base_id
-            expanded_rows.append(new_row)
-
-    cap_df_expanded = pd.DataFrame(expanded_rows)
+    cap_df_expanded = prepare_capacity(cap_df)
 
+    if compact:
+        return compact_dtypes(po_df), compact_dtypes(cap_df_expanded)
     return po_df, cap_df_expanded
 
 
@@ -0,0 +1,154 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# PO lines that agree on all of these are interchangeable in the model: same routes,
+# same late and unmet penalty per unit, same volume and weight per unit
+MERGE_COLUMNS = [
+    "From Port", "To Port", "Export ETA", "Import ETA", "Volume (m3)", "Weight (kg)",
+    "Priority Level", "Unmet Penalty",
+]
+
+
+@dataclass
+class Reduction:
+    # Inputs of the model after presolve and the map back to the original PO lines.
+    # group holds the reduced position of every original PO line, -1 for lines that
+    # have no feasible route and are settled as fully unmet.
+    po_df: pd.DataFrame
+    reduced_po: pd.DataFrame
+    reduced_cap: pd.DataFrame
+    group: np.ndarray
+    settled_objective: float = 0.0
+    counts: dict = field(default_factory=dict)
+
+
+def lane_codes(po_df, cap_df):
+    # Shared (From Port, To Port) codes for both tables; -1 where a port is missing
+    n_po = len(po_df)
+    from_port = pd.concat([po_df["From Port"].astype(object), cap_df["From Port"].astype(object)], ignore_index=True)
+    to_port = pd.concat([po_df["To Port"].astype(object), cap_df["To Port"].astype(object)], ignore_index=True)
+    codes, _ = pd.factorize(pd.MultiIndex.from_arrays([from_port, to_port]))
+    codes[(from_port.isna() | to_port.isna()).to_numpy()] = -1
+    return codes[:n_po], codes[n_po:]
+
+
+def reduce_inputs(po_df, cap_df):
+    # Shrink the model before it is built:
+    #   - PO lines without a container on their lane departing on or after their Export
+    #     ETA cannot ship, so they are settled as fully unmet outside the model
+    #   - containers that no remaining PO line can reach are dropped
+    #   - interchangeable PO lines (MERGE_COLUMNS) become one demand row with their
+    #     summed quantity, named after the first of them
+    po_lane, cap_lane = lane_codes(po_df, cap_df)
+    po_eta = pd.to_datetime(po_df["Export ETA"]).to_numpy(dtype="datetime64[ns]")
+    cap_dep = pd.to_datetime(cap_df["Departure Date"]).to_numpy(dtype="datetime64[ns]")
+
+    # --- Route-less PO lines: the lane's last departure is before the Export ETA ---
+    last_departure = pd.Series(cap_dep[cap_lane >= 0]).groupby(cap_lane[cap_lane >= 0]).max()
+    lane_last = last_departure.reindex(po_lane).to_numpy(dtype="datetime64[ns]")
+    routable = (po_lane >= 0) & ~np.isnat(po_eta) & ~np.isnat(lane_last) & (po_eta <= lane_last)
+
+    # --- Unreachable containers: they depart before every routable Export ETA on their lane ---
+    first_eta = pd.Series(po_eta[routable]).groupby(po_lane[routable]).min()
+    lane_first = first_eta.reindex(cap_lane).to_numpy(dtype="datetime64[ns]")
+    reachable = (cap_lane >= 0) & ~np.isnat(cap_dep) & ~np.isnat(lane_first) & (cap_dep >= lane_first)
+
+    # --- Merge interchangeable PO lines ---
+    kept = po_df[routable]
+    group = np.full(len(po_df), -1, dtype=np.int64)
+    group[routable] = kept.groupby(MERGE_COLUMNS, sort=False, dropna=False, observed=True).ngroup().to_numpy()
+    n_groups = int(group.max()) + 1 if len(kept) else 0
+    po_qty = po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64)
+    first_pos = np.full(n_groups, len(po_df), dtype=np.int64)
+    np.minimum.at(first_pos, group[routable], np.flatnonzero(routable))
+
+    reduced_po = po_df.iloc[first_pos].copy()
+    reduced_po["To Be Shipped Quantity"] = np.bincount(group[routable], weights=po_qty[routable], minlength=n_groups).astype(np.int64)
+    reduced_cap = cap_df[reachable]
+
+    settled_qty = po_qty[~routable]
+    counts = {
+        "po_lines": len(po_df), "model_po_lines": n_groups,
+        "settled_po_lines": int((~routable).sum()), "merged_po_lines": int(routable.sum()) - n_groups,
+        "containers": len(cap_df), "model_containers": len(reduced_cap),
+    }
+    return Reduction(
+        po_df, reduced_po, reduced_cap, group,
+        settled_objective=float((settled_qty * po_df["Unmet Penalty"].to_numpy(dtype=float)[~routable]).sum()),
+        counts=counts,
+    )
+
+
+def expand_solution(reduction, assignments, unmet_qty):
+    # Split the solution of the reduced model back onto the original PO lines. Every
+    # merged row's quantity (its container assignments first, then its unmet quantity)
+    # is handed out to its member lines in their original order. Returns positional
+    # assignments (po, pool, Shipment ID, qty) and the unmet quantity per original line.
+    assign_po, assign_pool, assign_ship, assign_qty = assignments
+    group = reduction.group
+    po_qty = reduction.po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64)
+
+    # Member lines laid out one after another, group by group
+    member_pos = np.flatnonzero(group >= 0)
+    member_pos = member_pos[np.argsort(group[member_pos], kind="stable")]
+    member_start = np.cumsum(po_qty[member_pos]) - po_qty[member_pos]
+
+    # Pieces of the reduced solution in the same layout
+    n_groups = len(reduction.reduced_po)
+    piece_group = np.concatenate([assign_po, np.arange(n_groups)])
+    piece_qty = np.concatenate([assign_qty, unmet_qty]).astype(np.int64)
+    piece_order = np.argsort(piece_group, kind="stable")
+    piece_start = np.empty(len(piece_qty), dtype=np.int64)
+    piece_start[piece_order] = np.cumsum(piece_qty[piece_order]) - piece_qty[piece_order]
+
+    # Cut the layout wherever a member line or a piece starts
+    total = int(po_qty[member_pos].sum())
+    bounds = np.union1d(member_start, piece_start)
+    bounds = np.append(bounds[bounds < total], total)
+    seg_start, seg_qty = bounds[:-1], np.diff(bounds)
+    seg_member = member_pos[np.searchsorted(member_start, seg_start, side="right") - 1]
+    sorted_start = piece_start[piece_order]
+    seg_piece = piece_order[np.searchsorted(sorted_start, seg_start, side="right") - 1]
+
+    # Assignment segments keep the order of the pieces they came from
+    is_assigned = seg_piece < len(assign_qty)
+    order = np.flatnonzero(is_assigned)
+    order = order[np.argsort(seg_piece[order], kind="stable")]
+    pieces = seg_piece[order]
+    expanded = (seg_member[order], assign_pool[pieces], assign_ship[pieces], seg_qty[order])
+
+    unmet = np.bincount(seg_member[~is_assigned], weights=seg_qty[~is_assigned], minlength=len(po_qty))
+    unmet = unmet.astype(np.int64)
+    unmet[group < 0] = po_qty[group < 0]
+    return expanded, unmet
+
+
+def add_settled_objective(solve_info, reduction):
+    # Lines settled by the presolve still count in the objective and bound
+    if not reduction.settled_objective:
+        return solve_info
+    if solve_info.objective is not None:
+        solve_info.objective += reduction.settled_objective
+    if solve_info.lp_bound is not None:
+        solve_info.lp_bound += reduction.settled_objective
+    if solve_info.best_bound is not None:
+        solve_info.best_bound += reduction.settled_objective
+        if solve_info.gap is not None and solve_info.objective is not None:
+            solve_info.gap = abs(solve_info.objective - solve_info.best_bound) / max(abs(solve_info.objective), 1e-9)
+    return solve_info
+
+
+def map_warm_start(warm_start, reduction):
+    # A previous run's results keyed to the merged PO lines, so warm-start seeding finds
+    # the quantities of every member line
+    key = ["PO Number", "PO Line Number"]
+    routable = reduction.group >= 0
+    original = reduction.po_df[key][routable].astype(object)
+    merged = reduction.reduced_po[key].astype(object).to_numpy()[reduction.group[routable]]
+    target = pd.DataFrame(merged, columns=key, index=pd.MultiIndex.from_frame(original))
+    target = target[~target.index.duplicated()]
+    mapped = target.reindex(pd.MultiIndex.from_frame(warm_start[key].astype(object)))
+    warm_start = warm_start.assign(**{col: mapped[col].to_numpy() for col in key})
+    return warm_start[mapped[key[0]].notna().to_numpy()]
@@ -0,0 +1,179 @@
+import time
+
+import numpy as np
+import pulp
+from src.instrumentation import logger
+from src.presolve import lane_codes
+from src.routes import route_unit_limit
+from src.solver import SolveInfo
+
+
+def pooled_objective(po_df, pools, route_pen, route_qty, opened, unmet_qty):
+    # Objective of the pooled model for a given solution
+    return float(
+        route_pen @ route_qty
+        + pools["Price (USD)"].to_numpy(dtype=float) @ opened
+        + po_df["Unmet Penalty"].to_numpy(dtype=float) @ unmet_qty
+    )
+
+
+def relative_gap(objective, bound):
+    return abs(objective - bound) / max(abs(objective), 1e-9)
+
+
+def round_relaxation(po_df, pools, routes, route_pen, route_x, use_x, eps=1e-6):
+    # Integer solution from LP values that keeps every pool within its volume and weight
+    # capacity and every route within what its opened units hold of the line: route
+    # quantities are floored and fractional pools rounded up, the demand lost to flooring
+    # goes to spare capacity of opened pools (cheapest late penalty first), then to further
+    # units of a pool where that costs less than leaving it unmet, and pools are finally
+    # cut back to the units their load needs
+    po_qty = po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64)
+    unit_vol = po_df["Volume (m3)"].to_numpy(dtype=float)
+    unit_wt = po_df["Weight (kg)"].to_numpy(dtype=float)
+    unmet_rate = po_df["Unmet Penalty"].to_numpy(dtype=float)
+    max_vol = pools["Max Volume (m³)"].to_numpy(dtype=float)
+    max_wt = pools["Max Weight (kg)"].to_numpy(dtype=float)
+    price = pools["Price (USD)"].to_numpy(dtype=float)
+    units = pools["Pool Units"].to_numpy(dtype=float)
+    route_po, route_pool = routes[:, 0], routes[:, 1]
+    limit = route_unit_limit(po_df, pools, routes)
+
+    route_qty = np.floor(route_x + eps).astype(np.int64)
+    opened = np.minimum(np.ceil(use_x - eps), units)
+    spare_vol = opened * max_vol - np.bincount(route_pool, weights=route_qty * unit_vol[route_po], minlength=len(pools))
+    spare_wt = opened * max_wt - np.bincount(route_pool, weights=route_qty * unit_wt[route_po], minlength=len(pools))
+
+    def fits(r, n_units):
+        # Units of route r's line that still fit into its pool with n_units opened
+        p, c = route_po[r], route_pool[r]
+        extra = n_units - opened[c]
+        take = min(missing[p], limit[r] * n_units - route_qty[r])
+        if unit_vol[p] > 0:
+            take = min(take, np.floor((spare_vol[c] + extra * max_vol[c] + eps) / unit_vol[p]))
+        if unit_wt[p] > 0:
+            take = min(take, np.floor((spare_wt[c] + extra * max_wt[c] + eps) / unit_wt[p]))
+        return max(int(take), 0)
+
+    def place(r, take, n_units):
+        p, c = route_po[r], route_pool[r]
+        spare_vol[c] += (n_units - opened[c]) * max_vol[c] - take * unit_vol[p]
+        spare_wt[c] += (n_units - opened[c]) * max_wt[c] - take * unit_wt[p]
+        opened[c] = n_units
+        route_qty[r] += take
+        missing[p] -= take
+
+    # --- Repair: place the floored-away demand ---
+    missing = po_qty - np.bincount(route_po, weights=route_qty, minlength=len(po_df)).astype(np.int64)
+    candidates = np.flatnonzero((missing[route_po] > 0) & (route_pen < unmet_rate[route_po]))
+    candidates = candidates[np.lexsort((route_pen[candidates], route_po[candidates]))]
+    for r in candidates:
+        c = route_pool[r]
+        if opened[c] > 0 and missing[route_po[r]] > 0:
+            place(r, fits(r, opened[c]), opened[c])
+    for r in candidates:
+        p, c = route_po[r], route_pool[r]
+        # Open another unit while the units it takes are worth more than its price
+        while missing[p] > 0 and opened[c] < units[c]:
+            take = fits(r, opened[c] + 1)
+            if take <= 0 or price[c] >= take * (unmet_rate[p] - route_pen[r]):
+                break
+            place(r, take, opened[c] + 1)
+
+    # --- Close the units a pool's load no longer needs ---
+    load_vol = opened * max_vol - spare_vol
+    load_wt = opened * max_wt - spare_wt
+    needed = np.maximum(
+        np.ceil(np.divide(load_vol, max_vol, out=np.zeros_like(load_vol), where=max_vol > 0) - eps),
+        np.ceil(np.divide(load_wt, max_wt, out=np.zeros_like(load_wt), where=max_wt > 0) - eps),
+    )
+    per_route = np.ceil(np.divide(route_qty, limit, out=np.zeros(len(routes)), where=np.isfinite(limit) & (limit > 0)) - eps)
+    np.maximum.at(needed, route_pool, per_route)
+    opened = np.minimum(opened, np.maximum(needed, 0))
+    return route_qty, opened, missing
+
+
+def residual_columns(po_lane, pool_lane, routes, relaxed, rounded, widen=False, eps=1e-6):
+    # Columns the residual MIP may change; everything else stays at its rounded value.
+    # Free are the PO lines the rounding moved away from the LP (a route or the unmet
+    # quantity changed, e.g. the line lost quantity to unmet), with every route and pool
+    # they can reach, and the pools whose open count changed. widen frees every line,
+    # route and pool on the lanes of those instead.
+    route_x, use_x, unmet_x = relaxed
+    route_qty, opened, unmet_qty = rounded
+    free_po = np.abs(unmet_qty - unmet_x) > eps
+    free_po[routes[np.abs(route_qty - route_x) > eps, 0]] = True
+    free_pool = np.abs(opened - use_x) > eps
+    if widen:
+        lanes = np.union1d(po_lane[free_po], pool_lane[free_pool])
+        free_po, free_pool = np.isin(po_lane, lanes), np.isin(pool_lane, lanes)
+    free_pool[routes[free_po[routes[:, 0]], 1]] = True
+    return free_po[routes[:, 0]], free_pool, free_po
+
+
+def relax_and_round(solve_relaxed, solve_residual, po_df, pools, routes, route_pen, config, stats):
+    # Solve the LP relaxation, round it to a capacity-feasible integer solution and, when
+    # that is not within the configured gap of the LP bound, re-solve the part the rounding
+    # changed as a MIP with everything else fixed, widened to its lanes if still short.
+    #   solve_relaxed() -> ((route_x, use_x, unmet_x) or None, SolveInfo)
+    #   solve_residual(free, start) -> ((route_qty, opened, unmet_qty) or None, SolveInfo)
+    # free and start are (routes, pools, PO lines) tuples. Returns the solution and a
+    # SolveInfo whose best_bound is the LP bound.
+    started = time.perf_counter()
+    with stats.phase("lp relaxation"):
+        relaxed, lp_info = solve_relaxed()
+    if relaxed is None:
+        return None, lp_info
+    lp_bound = lp_info.objective
+
+    with stats.phase("rounding"):
+        solution = round_relaxation(po_df, pools, routes, route_pen, *relaxed[:2])
+        objective = pooled_objective(po_df, pools, route_pen, *solution)
+    rounded_objective = objective
+    stats.count(lp_bound=lp_bound, rounded_objective=rounded_objective)
+
+    # Re-solve the part the rounding changed, then its whole lanes, until the solution is
+    # within the configured gap of the LP bound
+    tolerance = config.mip_gap or 1e-9
+    po_lane, pool_lane = lane_codes(po_df, pools)
+    n_free, last_free = 0, None
+    for widen in (False, True):
+        if relative_gap(objective, lp_bound) <= tolerance:
+            break
+        free = residual_columns(po_lane, pool_lane, routes, relaxed, solution, widen)
+        if last_free is not None and all((f == last).all() for f, last in zip(free, last_free)):
+            continue
+        last_free = free
+        n_free = int(sum(mask.sum() for mask in free))
+        if n_free == 0:
+            continue
+        with stats.phase("residual mip"):
+            residual, _ = solve_residual(free, solution)
+        if residual is not None:
+            residual_objective = pooled_objective(po_df, pools, route_pen, *residual)
+            if residual_objective <= objective:
+                solution, objective = residual, residual_objective
+    stats.count(residual_columns=n_free, residual_objective=objective)
+
+    # Optimal only when the LP bound proves it; otherwise the plan is a feasible solution
+    # whose quality is the gap to that bound
+    if relative_gap(objective, lp_bound) <= tolerance:
+        status, sol_status = pulp.LpStatusOptimal, pulp.LpSolutionOptimal
+    else:
+        status, sol_status = pulp.LpStatusNotSolved, pulp.LpSolutionIntegerFeasible
+
+    gap = relative_gap(objective, lp_bound)
+    logger.info(
+        "LP bound %.2f, rounded %.2f, final %.2f (gap %.4f%%, %d of %d columns re-solved)",
+        lp_bound, rounded_objective, objective, 100 * gap, n_free, len(routes) + len(pools) + len(po_df),
+    )
+    return solution, SolveInfo(
+        backend=lp_info.backend,
+        status=pulp.LpStatus[status],
+        solution_status=pulp.LpSolution[sol_status],
+        objective=objective,
+        best_bound=lp_bound,
+        gap=gap,
+        solve_time=time.perf_counter() - started,
+        lp_bound=lp_bound,
+    )
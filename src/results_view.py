@@ -0,0 +1,195 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Multiselect filters of the dashboard: ResultFilter field -> results column
+FILTER_COLUMNS = {"years": "Export Year", "months": "Export YearMonth", "weeks": "Export YearWeek"}
+CATEGORY_COLUMNS = [
+    "PO Number", "SKU", "Product Name", "Product Family", "From Port", "To Port", "Carrier",
+    "Container Type", "Shipment ID", "Base Shipment ID", "Export Year", "Export YearMonth", "Export YearWeek",
+]
+FULFILLMENT_STATUSES = ["Fully Met", "Partially Met", "Unmet"]
+
+
+@dataclass(frozen=True)
+class ResultFilter:
+    # Filter state of the dashboard; the memo key of every aggregation
+    po_text: str = ""
+    years: tuple = ()
+    months: tuple = ()
+    weeks: tuple = ()
+
+
+def _lookup(codes, selected):
+    # Boolean row mask of the rows whose code is in `selected`; the appended False maps
+    # the -1 of missing values
+    return np.append(selected, False)[codes]
+
+
+class ResultsView:
+    # Filter indexes and memoized aggregations over one solve's results. Everything that
+    # only depends on the results is built once: categorical codes for the filter and
+    # group-by columns, a PO line code per row and the container price per Shipment ID.
+    # A filter is then a lookup of its selected categories, and every KPI, chart table
+    # and aggregation is computed from the codes with bincounts and kept per ResultFilter.
+    def __init__(self, results_df, cap_df, memo_size=64):
+        self.results_df = results_df
+        self.cap_df = cap_df
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self._frame_key, self._frame_rows = None, None
+
+        # Group-by columns as categoricals, so grouped aggregations work on codes
+        self.frame = results_df.copy()
+        for col in CATEGORY_COLUMNS:
+            if col in self.frame.columns and self.frame[col].dtype == object:
+                self.frame[col] = self.frame[col].astype("category")
+
+        # --- Filter indexes ---
+        self.po_text_codes, po_text = pd.factorize(results_df["PO Number"].astype(str))
+        self.po_text_categories = pd.Series(po_text)
+        self.filter_codes = {
+            field: pd.factorize(results_df[col]) for field, col in FILTER_COLUMNS.items() if col in results_df.columns
+        }
+
+        # --- Per PO line and per container codes ---
+        self.line_codes, lines = pd.factorize(pd.MultiIndex.from_arrays([results_df["PO Number"], results_df["PO Line Number"]]))
+        self.n_lines = len(lines)
+        self.ship_codes, ships = pd.factorize(results_df["Shipment ID"])
+        cap_codes = pd.Index(ships).get_indexer(cap_df["Shipment ID"])
+        known = cap_codes >= 0
+        self.cap_codes = cap_codes
+        self.ship_price = np.bincount(cap_codes[known], weights=cap_df["Price (USD)"].to_numpy(dtype=float)[known], minlength=len(ships))
+
+        self.values = {
+            col: pd.to_numeric(results_df[col], errors="coerce").fillna(0).to_numpy(dtype=float)
+            for col in ["Qty Assigned", "Unmet Qty", "Unmet Penalty", "Late Penalty", "COGS Value Assigned", "COGS Value Unmet"]
+            if col in results_df.columns
+        }
+        # COGS of every PO line from its first row (assigning in reverse keeps the first)
+        cogs = pd.to_numeric(results_df["COGS"], errors="coerce").to_numpy(dtype=float)
+        has_line = self.line_codes >= 0
+        self.line_cogs = np.full(self.n_lines, np.nan)
+        self.line_cogs[self.line_codes[has_line][::-1]] = cogs[has_line][::-1]
+
+    def _cached(self, key, compute):
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            return self._memo[key]
+        value = compute()
+        self._memo[key] = value
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return value
+
+    def options(self, field):
+        # Sorted choices of a multiselect filter
+        if field not in self.filter_codes:
+            return []
+        return sorted(self.filter_codes[field][1])
+
+    def mask(self, state):
+        # Boolean row mask of a filter state; each filter's mask is memoized on its own
+        return self._cached(("mask", state), lambda: self._mask(state))
+
+    def _mask(self, state):
+        mask = np.ones(len(self.results_df), dtype=bool)
+        if state.po_text:
+            # Match the pattern against the distinct PO Numbers only
+            matched = self._cached(("po_text", state.po_text), lambda: self.po_text_categories.str.contains(state.po_text).to_numpy(dtype=bool))
+            mask &= matched[self.po_text_codes]
+        for field in FILTER_COLUMNS:
+            selected = getattr(state, field)
+            if selected and field in self.filter_codes:
+                codes, categories = self.filter_codes[field]
+                mask &= self._cached((field, selected), lambda: _lookup(codes, np.isin(categories, list(selected))))
+        return mask
+
+    def rows(self, state):
+        # The filtered results frame (categorical columns); only the latest one is kept
+        if self._frame_key != state:
+            self._frame_key, self._frame_rows = state, self.frame[self.mask(state)]
+        return self._frame_rows
+
+    def _sum(self, col, mask):
+        return float(self.values[col][mask].sum()) if col in self.values else 0.0
+
+    def used_containers(self, state):
+        # Boolean array over the result's Shipment IDs
+        def compute():
+            used = np.zeros(len(self.ship_price), dtype=bool)
+            codes = self.ship_codes[self.mask(state)]
+            used[codes[codes >= 0]] = True
+            return used
+        return self._cached(("used", state), compute)
+
+    def kpis(self, state):
+        def compute():
+            mask = self.mask(state)
+            used = self.used_containers(state)
+            lines = self.line_codes[mask]
+            container_cost = float(self.ship_price[used].sum())
+            unmet_penalty, late_penalty = self._sum("Unmet Penalty", mask), self._sum("Late Penalty", mask)
+            return {
+                "Total PO Lines": int(np.count_nonzero(np.bincount(lines[lines >= 0], minlength=self.n_lines))),
+                "Used Containers": int(used.sum()),
+                "Total Value Assigned": self._sum("COGS Value Assigned", mask),
+                "Total Unmet Value": self._sum("COGS Value Unmet", mask),
+                "Total Unmet Penalty": unmet_penalty,
+                "Total Late Penalty": late_penalty,
+                "Total Container Cost": container_cost,
+                "Estimated Total Cost": unmet_penalty + container_cost + late_penalty,
+            }
+        return self._cached(("kpis", state), compute)
+
+    def fulfillment(self, state):
+        # PO lines per fulfillment status and the COGS value of the lines in each status
+        def compute():
+            mask = self.mask(state)
+            lines = self.line_codes[mask]
+            keep = lines >= 0
+            lines = lines[keep]
+            present = np.bincount(lines, minlength=self.n_lines) > 0
+            assigned = np.bincount(lines, weights=self.values["Qty Assigned"][mask][keep], minlength=self.n_lines)
+            unmet = np.bincount(lines, weights=self.values["Unmet Qty"][mask][keep], minlength=self.n_lines)
+            status = np.select([unmet == 0, assigned > 0], [0, 1], 2)[present]
+            cogs_value = ((assigned + unmet) * self.line_cogs)[present]
+            valued = ~np.isnan(cogs_value)
+            return pd.DataFrame({
+                "Status": FULFILLMENT_STATUSES,
+                "PO Lines": np.bincount(status, minlength=3),
+                "COGS Value": np.bincount(status[valued], weights=cogs_value[valued], minlength=3),
+            })
+        return self._cached(("fulfillment", state), compute)
+
+    def carrier_summary(self, state):
+        return self._cached(("carrier", state), lambda: self.rows(state).groupby(
+            ["Carrier", "PO Number"], as_index=False, observed=True
+        )["Qty Assigned"].sum())
+
+    def family_summary(self, state):
+        # Assigned and unmet COGS value per Product Family, in long form for a stacked bar
+        def compute():
+            summary = self.rows(state).groupby("Product Family", as_index=False, observed=True).agg({
+                "Qty Assigned": "sum", "Unmet Qty": "sum", "COGS": "mean"
+            })
+            summary["Assigned Value"] = summary["Qty Assigned"] * summary["COGS"]
+            summary["Unmet Value"] = summary["Unmet Qty"] * summary["COGS"]
+            return summary.melt(id_vars="Product Family", value_vars=["Assigned Value", "Unmet Value"],
+                                var_name="Status", value_name="COGS Value")
+        return self._cached(("family", state), compute)
+
+    def aggregate(self, state, groupby_cols, numeric_cols):
+        groupby_cols, numeric_cols = tuple(groupby_cols), tuple(numeric_cols)
+        return self._cached(("aggregate", state, groupby_cols, numeric_cols), lambda: self.rows(state).groupby(
+            list(groupby_cols), as_index=False, observed=True
+        )[list(numeric_cols)].sum())
+
+    def unused_containers(self, state):
+        # Capacity rows whose Shipment ID has no filtered result row
+        def compute():
+            used = self.used_containers(state)
+            return self.cap_df[~np.append(used, False)[self.cap_codes]]
+        return self._cached(("unused", state), compute)
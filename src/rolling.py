@@ -0,0 +1,110 @@
+import logging
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from src.instrumentation import RunStats, logger, merge_run_stats
+from src.optimizer import assemble_results, build_container_pools, optimize_shipping, plan_objective
+from src.solver import SolveInfo
+
+PO_KEY = ["PO Number", "PO Line Number"]
+
+
+@dataclass
+class RollingInfo(SolveInfo):
+    # One row per window: weeks solved and committed, model inputs, solve time and outcome
+    windows: pd.DataFrame = None
+
+
+def departure_weeks(cap_df):
+    # Monday of each container's departure week
+    departure = pd.to_datetime(cap_df["Departure Date"])
+    return (departure - pd.to_timedelta(departure.dt.weekday, unit="D")).dt.normalize()
+
+
+def optimize_shipping_rolling(po_df, cap_df, window_weeks=4, commit_weeks=1,
+                              late_penalty_per_day=2, priority_multiplier=2,
+                              solver_config=None, return_info=False):
+    # Solve the horizon window by window: each MIP sees window_weeks of departures, the
+    # assignments to containers of its first commit_weeks are kept, and the quantity not
+    # shipped yet is carried into the next window. The last window commits everything.
+    # PO lines are identified by (PO Number, PO Line Number) across windows.
+    if not 1 <= commit_weeks <= window_weeks:
+        raise ValueError(f"Need 1 <= commit_weeks <= window_weeks, got {commit_weeks} and {window_weeks}")
+
+    start = time.perf_counter()
+    weeks = departure_weeks(cap_df)
+    week_starts = np.sort(weeks.dropna().unique())
+    remaining = po_df["To Be Shipped Quantity"].to_numpy(dtype=np.int64).copy()
+    export_eta = pd.to_datetime(po_df["Export ETA"]).to_numpy()
+    po_key = pd.MultiIndex.from_frame(po_df[PO_KEY])
+
+    committed, window_rows, window_stats = [], [], []
+    for w, first in enumerate(range(0, len(week_starts), commit_weeks)):
+        window = week_starts[first:first + window_weeks]
+        is_last = first + window_weeks >= len(week_starts)
+        commit = window if is_last else window[:commit_weeks]
+        window_end = window[-1] + np.timedelta64(7, "D")
+
+        # PO lines with quantity left that can leave port before the window closes
+        po_mask = (remaining > 0) & (export_eta < window_end)
+        window_po = po_df[po_mask].assign(**{"To Be Shipped Quantity": remaining[po_mask]})
+        window_cap = cap_df[weeks.isin(window).to_numpy()]
+
+        stats = RunStats(level=logging.DEBUG)
+        info = None
+        window_start = time.perf_counter()
+        if len(window_po) and len(window_cap):
+            results, info = optimize_shipping(
+                window_po, window_cap, late_penalty_per_day, priority_multiplier,
+                solver_config=solver_config, return_info=True, stats=stats
+            )
+            kept = results[(results["Qty Assigned"] > 0) & departure_weeks(results).isin(commit).to_numpy()]
+            committed.append(kept)
+            window_stats.append(stats)
+
+            shipped = kept.groupby(PO_KEY)["Qty Assigned"].sum()
+            remaining -= shipped.reindex(po_key).fillna(0).to_numpy(dtype=np.int64)
+            np.maximum(remaining, 0, out=remaining)
+        seconds = time.perf_counter() - window_start
+
+        window_rows.append({
+            "Window": w + 1,
+            "First Week": pd.Timestamp(window[0]).strftime("%Y-W%W"),
+            "Last Week": pd.Timestamp(window[-1]).strftime("%Y-W%W"),
+            "Committed Weeks": len(commit),
+            "PO Lines": len(window_po),
+            "Containers": len(window_cap),
+            "Status": info.status if info else "Skipped",
+            "Objective": info.objective if info else None,
+            "Solve Time (s)": seconds,
+            "Qty Committed": int(committed[-1]["Qty Assigned"].sum()) if info else 0,
+        })
+        logger.info("rolling window %d (%s..%s): %d PO lines, %d containers, %.2fs",
+                    w + 1, window_rows[-1]["First Week"], window_rows[-1]["Last Week"],
+                    len(window_po), len(window_cap), seconds)
+        if is_last:
+            break
+
+    # Whatever is still open after the last window is unmet
+    pools, _ = build_container_pools(cap_df)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=object), np.empty(0, dtype=np.int64))
+    unmet_rows = assemble_results(po_df, pools, empty, remaining, late_penalty_per_day, priority_multiplier)
+    frames = [frame for frame in committed + [unmet_rows] if not frame.empty]
+    results_df = pd.concat(frames, ignore_index=True) if frames else unmet_rows
+
+    if return_info:
+        windows = pd.DataFrame(window_rows)
+        statuses = [status for status in windows["Status"] if status != "Skipped"] if len(windows) else []
+        info = RollingInfo(
+            backend=(solver_config.backend if solver_config else "cbc"),
+            status=next((s for s in statuses if s != "Optimal"), "Optimal"),
+            solution_status="Rolling Horizon",
+            objective=plan_objective(results_df),
+            solve_time=time.perf_counter() - start,
+            stats=merge_run_stats(window_stats) if window_stats else None,
+            windows=windows,
+        )
+        return results_df, info
+    return results_df
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+
+def find_feasible_routes(po_df, cap_df):
+    # Match every PO line to the containers sailing its (From Port, To Port) lane on or
+    # after its Export ETA. Returns an (n, 2) array of positional (po_idx, container_idx)
+    # pairs, grouped by PO line and ordered by departure date within each line.
+    n_po, n_cap = len(po_df), len(cap_df)
+    if n_po == 0 or n_cap == 0:
+        return np.empty((0, 2), dtype=np.intp)
+
+    # --- Shared lane codes for both tables ---
+    lanes = pd.MultiIndex.from_arrays([
+        pd.concat([po_df["From Port"], cap_df["From Port"]], ignore_index=True),
+        pd.concat([po_df["To Port"], cap_df["To Port"]], ignore_index=True),
+    ])
+    lane_codes, _ = pd.factorize(lanes)
+    po_lane, cap_lane = lane_codes[:n_po], lane_codes[n_po:]
+
+    # --- Shared date ranks so departure >= ETA compares as integers ---
+    po_eta = pd.to_datetime(po_df["Export ETA"]).to_numpy(dtype="datetime64[ns]")
+    cap_dep = pd.to_datetime(cap_df["Departure Date"]).to_numpy(dtype="datetime64[ns]")
+    all_dates = np.unique(np.concatenate([po_eta, cap_dep]))
+    po_rank = np.searchsorted(all_dates, po_eta)
+    cap_rank = np.searchsorted(all_dates, cap_dep)
+
+    # Rows with a missing port or date never match, as in a plain == / >= comparison
+    po_valid = (po_lane >= 0) & ~np.isnat(po_eta) & po_df["From Port"].notna().to_numpy() & po_df["To Port"].notna().to_numpy()
+    cap_valid = (cap_lane >= 0) & ~np.isnat(cap_dep) & cap_df["From Port"].notna().to_numpy() & cap_df["To Port"].notna().to_numpy()
+
+    # --- Sort containers by (lane, departure) and binary-search each PO line ---
+    n_ranks = len(all_dates) + 1
+    cap_key = cap_lane.astype(np.int64) * n_ranks + cap_rank
+    cap_order = np.flatnonzero(cap_valid)
+    cap_order = cap_order[np.argsort(cap_key[cap_order], kind="stable")]
+    sorted_keys = cap_key[cap_order]
+
+    po_pos = np.flatnonzero(po_valid)
+    lane = po_lane[po_pos].astype(np.int64)
+    start = np.searchsorted(sorted_keys, lane * n_ranks + po_rank[po_pos], side="left")
+    end = np.searchsorted(sorted_keys, (lane + 1) * n_ranks, side="left")
+    counts = end - start
+
+    # --- Expand each PO line's [start, end) slice into explicit pairs ---
+    total = int(counts.sum())
+    po_idx = np.repeat(po_pos, counts)
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    cap_idx = cap_order[np.repeat(start, counts) + offsets]
+
+    return np.column_stack([po_idx, cap_idx]).astype(np.intp, copy=False)
+
+
+def route_unit_limit(po_df, pools, routes, eps=1e-9):
+    # Most units of a route's PO line that one container of its pool holds by volume and
+    # weight; inf for lines that have neither
+    unit_vol = po_df["Volume (m3)"].to_numpy(dtype=float)[routes[:, 0]]
+    unit_wt = po_df["Weight (kg)"].to_numpy(dtype=float)[routes[:, 0]]
+    max_vol = pools["Max Volume (m³)"].to_numpy(dtype=float)[routes[:, 1]]
+    max_wt = pools["Max Weight (kg)"].to_numpy(dtype=float)[routes[:, 1]]
+    limit = np.full(len(routes), np.inf)
+    for unit, cap in [(unit_vol, max_vol), (unit_wt, max_wt)]:
+        sized = unit > 0
+        limit[sized] = np.minimum(limit[sized], np.floor((np.maximum(cap[sized], 0) + eps) / unit[sized]))
+    return limit
+
+
+def capped_routes(po_df, routes, limit):
+    # Routes whose per-container limit is below the line's quantity; only these need a
+    # per-route capacity row, the pooled rows already cover the others
+    return np.flatnonzero(limit < po_df["To Be Shipped Quantity"].to_numpy()[routes[:, 0]])
+
+
+
+def split_siblings(pools):
+    # (earlier, later) positions of adjacent pools split from the same Base Shipment ID
+    base = pools["Base Shipment ID"].to_numpy(dtype=object)
+    later = np.flatnonzero(base[1:] == base[:-1]) + 1
+    return later - 1, later
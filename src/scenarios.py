@@ -0,0 +1,111 @@
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pulp
+from src.instrumentation import logger
+from src.optimizer import (
+    add_constraints, build_container_pools, create_variables, extract_results,
+    has_solution, plan_objective, reconcile_objective, set_penalty_objective
+)
+from src.routes import find_feasible_routes
+from src.solver import SolverConfig, solve_model
+
+SCENARIO_COLUMNS = [
+    "Late Penalty per Day", "Priority Multiplier", "Status", "Objective", "Total Cost",
+    "Container Cost", "Late Penalty", "Unmet Penalty", "Unmet Qty", "Unmet Value",
+    "Qty Assigned", "Containers Used", "Solve Time (s)",
+]
+
+
+def penalty_grid(late_penalties, priority_multipliers):
+    # Every (late_penalty_per_day, priority_multiplier) combination
+    return list(itertools.product(late_penalties, priority_multipliers))
+
+
+def summarize_scenario(results_df):
+    # Cost components of one solved scenario, scored like plan_objective (the unmet
+    # penalty at its untruncated rate)
+    assigned = results_df["Qty Assigned"] > 0
+    used = results_df["Used Container"] == 1
+    container_cost = float(results_df.loc[used, "Price (USD)"].astype(float).sum())
+    late_penalty = float(pd.to_numeric(results_df["Late Penalty"], errors="coerce").fillna(0).sum())
+    unmet_penalty = float((results_df["Unmet Qty"] * results_df["Unmet Penalty Rate"].astype(float)).sum())
+    return {
+        "Total Cost": plan_objective(results_df),
+        "Container Cost": container_cost,
+        "Late Penalty": late_penalty,
+        "Unmet Penalty": unmet_penalty,
+        "Unmet Qty": int(results_df["Unmet Qty"].sum()),
+        "Unmet Value": float(pd.to_numeric(results_df["COGS Value Unmet"], errors="coerce").fillna(0).sum()),
+        "Qty Assigned": int(results_df.loc[assigned, "Qty Assigned"].sum()),
+        "Containers Used": int(results_df["Used Container"].sum()),
+    }
+
+
+def _solve_scenarios(po_df, pools, members, routes, scenarios, solver_config, keep_results):
+    # Build variables and constraints once and re-solve with each scenario's objective.
+    # Each solve starts from the previous scenario's solution.
+    model = pulp.LpProblem("PO_Container_Scenarios", pulp.LpMinimize)
+    variables = create_variables(po_df, pools, routes)
+    add_constraints(model, po_df, pools, routes, variables)
+
+    rows, frames = [], []
+    for n, (late_penalty_per_day, priority_multiplier) in enumerate(scenarios):
+        start = time.perf_counter()
+        set_penalty_objective(model, po_df, pools, routes, variables, late_penalty_per_day, priority_multiplier)
+        info = solve_model(model, replace(solver_config, warm_start=n > 0 or solver_config.warm_start))
+        results_df = None
+        if has_solution(model):
+            results_df = extract_results(
+                po_df, pools, members, routes, variables, late_penalty_per_day, priority_multiplier,
+                solver_config=solver_config
+            )
+            reconcile_objective(info, plan_objective(results_df))
+        row = {
+            "Late Penalty per Day": late_penalty_per_day,
+            "Priority Multiplier": priority_multiplier,
+            "Status": info.status,
+            "Objective": info.objective,
+        }
+        if results_df is not None:
+            row.update(summarize_scenario(results_df))
+        row["Solve Time (s)"] = time.perf_counter() - start
+        rows.append(row)
+        frames.append(results_df if keep_results else None)
+    return rows, frames
+
+
+def sweep_penalties(po_df, cap_df, scenarios, solver_config=None, max_workers=None, keep_results=False):
+    # Solve one MIP per (late_penalty_per_day, priority_multiplier) pair. Pools and routes
+    # are built once here; the scenarios are split over worker processes that each build
+    # the constraints once and only swap the objective between solves.
+    # Returns the scenario table, plus the results per scenario when keep_results is set.
+    solver_config = solver_config or SolverConfig(msg=False)
+    scenarios = [tuple(scenario) for scenario in scenarios]
+    pools, members = build_container_pools(cap_df)
+    routes = find_feasible_routes(po_df, pools)
+
+    n_workers = min(max_workers or os.cpu_count() or 1, len(scenarios)) if scenarios else 1
+    chunks = [list(chunk) for chunk in np.array_split(np.arange(len(scenarios)), n_workers) if len(chunk)]
+    jobs = [
+        (po_df, pools, members, routes, [scenarios[i] for i in chunk], solver_config, keep_results)
+        for chunk in chunks
+    ]
+    start = time.perf_counter()
+    if n_workers == 1:
+        outputs = [_solve_scenarios(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            outputs = list(executor.map(_solve_scenarios, *zip(*jobs)))
+    logger.info("solved %d penalty scenarios on %d worker(s) in %.2fs",
+                len(scenarios), n_workers, time.perf_counter() - start)
+
+    table = pd.DataFrame([row for rows, _ in outputs for row in rows]).reindex(columns=SCENARIO_COLUMNS)
+    if keep_results:
+        return table, [frame for _, frames in outputs for frame in frames]
+    return table
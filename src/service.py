@@ -0,0 +1,308 @@
+import argparse
+import io
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from src.instrumentation import configure_logging, logger
+from src.jobs import FINISHED_STATES, JobManager, QueueFull, SolveRequest, run_solve_request
+from src.solver import SOLVER_BACKENDS, SolverConfig
+
+JOB_PATH = re.compile(r"^/jobs/([0-9a-f]+)(/results)?$")
+JOB_COLUMNS = [
+    "id", "status", "label", "submitted", "started", "finished", "params",
+    "objective", "best_bound", "gap", "solver_status", "rows", "error",
+]
+
+
+@dataclass
+class ServiceConfig:
+    host: str = "127.0.0.1"
+    port: int = 8000
+    db_path: str = "optimizer_service.db"
+    max_workers: int = 2
+    max_queued: int = 16
+    # Solver time limit of every job; the worker is killed kill_grace seconds later
+    job_timeout: float = 600
+    kill_grace: float = 30
+    max_body_mb: float = 256
+    max_page_size: int = 10_000
+
+
+def solve_payload(po_csv, cap_csv, request, progress=None):
+    # Worker side of a service job: only the results and solve info travel back
+    results_df, _, info, _, _ = run_solve_request(io.StringIO(po_csv), io.StringIO(cap_csv), request, progress)
+    info.stats = None
+    return results_df, info
+
+
+class ResultStore:
+    # Job records and result rows in SQLite. Rows are stored one JSON object each, so
+    # pages are read without loading the whole result.
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS jobs ({', '.join(JOB_COLUMNS)}, PRIMARY KEY (id))")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (job_id TEXT, row_no INTEGER, data TEXT, PRIMARY KEY (job_id, row_no))"
+            )
+            # Jobs that were in flight when the service stopped will not finish
+            self._db.execute(
+                "UPDATE jobs SET status = 'failed', error = 'service restarted' WHERE status IN ('queued', 'running')"
+            )
+
+    def add_job(self, job_id, label, params):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, label, submitted, params) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, label, time.time(), json.dumps(params)),
+            )
+
+    def finish_job(self, job):
+        rows = []
+        record = {"status": job.status, "started": job.started, "finished": job.finished, "error": job.error}
+        if job.status == "done":
+            results_df, info = job.result
+            rows = results_df.to_json(orient="records", lines=True, date_format="iso").splitlines()
+            record.update({
+                "objective": info.objective, "best_bound": info.best_bound, "gap": info.gap,
+                "solver_status": info.status, "rows": len(rows),
+            })
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO results (job_id, row_no, data) VALUES (?, ?, ?)",
+                ((job.id, n, row) for n, row in enumerate(rows)),
+            )
+            self._db.execute(
+                f"UPDATE jobs SET {', '.join(f'{col} = ?' for col in record)} WHERE id = ?",
+                (*record.values(), job.id),
+            )
+
+    def get_job(self, job_id):
+        with self._lock:
+            row = self._db.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(JOB_COLUMNS, row))
+        job["params"] = json.loads(job["params"])
+        return job
+
+    def get_rows(self, job_id, offset, limit):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT data FROM results WHERE job_id = ? AND row_no >= ? ORDER BY row_no LIMIT ?",
+                (job_id, offset, limit),
+            ).fetchall()
+        return [json.loads(data) for data, in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def parse_request(payload, config):
+    # Solve settings of a POST /jobs body; raises ValueError on bad input
+    for key in ("po_csv", "capacity_csv"):
+        if not isinstance(payload.get(key), str) or not payload[key].strip():
+            raise ValueError(f"'{key}' must be the CSV file content as a string")
+    engine = payload.get("engine", "mip")
+    backend = payload.get("backend", "cbc")
+    if engine not in ("mip", "greedy"):
+        raise ValueError("'engine' must be 'mip' or 'greedy'")
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"'backend' must be one of {SOLVER_BACKENDS}")
+    time_limit = min(float(payload.get("time_limit") or config.job_timeout), config.job_timeout)
+    params = {
+        "late_penalty_per_day": float(payload.get("late_penalty_per_day", 2)),
+        "priority_multiplier": float(payload.get("priority_multiplier", 2)),
+        "engine": engine, "backend": backend, "time_limit": time_limit,
+        "mip_gap": float(payload["mip_gap"]) if payload.get("mip_gap") is not None else None,
+        "by_lane": bool(payload.get("by_lane", False)),
+        "relax_and_round": bool(payload.get("relax_and_round", False)),
+    }
+    request = SolveRequest(
+        late_penalty_per_day=params["late_penalty_per_day"],
+        priority_multiplier=params["priority_multiplier"],
+        engine=engine,
+        solver_config=SolverConfig(
+            backend=backend, time_limit=time_limit, mip_gap=params["mip_gap"],
+            relax_and_round=params["relax_and_round"], msg=False
+        ),
+        lane_workers=1 if params["by_lane"] else None,
+    )
+    return params, request
+
+
+class OptimizerService:
+    # Solver jobs behind a JSON API:
+    #   POST   /jobs                  submit {"po_csv", "capacity_csv", settings...} -> 202 {"id"}
+    #   GET    /jobs/<id>             status, progress and result summary
+    #   GET    /jobs/<id>/results     result rows, ?offset=0&limit=1000
+    #   DELETE /jobs/<id>             cancel
+    #   GET    /health                queue and worker counts
+    # A full queue answers 429.
+    def __init__(self, config=None):
+        self.config = config or ServiceConfig()
+        self.store = ResultStore(self.config.db_path)
+        self.jobs = JobManager(
+            max_workers=self.config.max_workers, max_queued=self.config.max_queued,
+            on_finish=self._on_finish,
+        )
+        # Submissions and job completions both write the job's row
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((self.config.host, self.config.port), _make_handler(self))
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _on_finish(self, job):
+        with self._lock:
+            self.store.finish_job(job)
+        self.jobs.forget(job.id)
+
+    def submit(self, payload):
+        params, request = parse_request(payload, self.config)
+        label = str(payload.get("label", ""))
+        with self._lock:
+            job_id = self.jobs.submit(
+                solve_payload, payload["po_csv"], payload["capacity_csv"], request,
+                label=label, timeout=params["time_limit"] + self.config.kill_grace,
+            )
+            self.store.add_job(job_id, label, params)
+        return job_id
+
+    def status(self, job_id):
+        job = self.store.get_job(job_id)
+        if job is None:
+            return None
+        live = self.jobs.get(job_id)
+        # A finished job counts as running until its results are stored
+        if live is not None and job["status"] not in FINISHED_STATES:
+            job.update(
+                status="running" if live.status in FINISHED_STATES else live.status, started=live.started, phase=live.phase, elapsed=live.elapsed,
+                objective=live.objective, best_bound=live.best_bound, gap=live.gap,
+                queue_position=self.jobs.queue_position(job_id),
+            )
+        return job
+
+    def serve_forever(self):
+        logger.info("optimizer service listening on %s", self.url)
+        self.server.serve_forever()
+
+    def start(self):
+        # Serve from a background thread, e.g. for tests and local load runs
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.jobs.shutdown()
+        self.store.close()
+
+
+def _make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):
+            logger.debug("%s %s", self.address_string(), fmt % args)
+
+        def _send(self, status, body):
+            data = json.dumps(body, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _error(self, status, message):
+            self._send(status, {"error": message})
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                return self._send(HTTPStatus.OK, {"status": "ok", "workers": service.config.max_workers, **service.jobs.counts()})
+            match = JOB_PATH.match(url.path)
+            if not match:
+                return self._error(HTTPStatus.NOT_FOUND, "not found")
+            job = service.status(match.group(1))
+            if job is None:
+                return self._error(HTTPStatus.NOT_FOUND, "unknown job")
+            if not match.group(2):
+                return self._send(HTTPStatus.OK, job)
+
+            if job["status"] != "done":
+                return self._error(HTTPStatus.CONFLICT, f"job is {job['status']}")
+            query = parse_qs(url.query)
+            try:
+                offset = max(int(query.get("offset", [0])[0]), 0)
+                limit = min(max(int(query.get("limit", [1000])[0]), 1), service.config.max_page_size)
+            except ValueError:
+                return self._error(HTTPStatus.BAD_REQUEST, "offset and limit must be integers")
+            rows = service.store.get_rows(job["id"], offset, limit)
+            next_offset = offset + len(rows) if offset + len(rows) < job["rows"] else None
+            self._send(HTTPStatus.OK, {"total": job["rows"], "offset": offset, "next_offset": next_offset, "rows": rows})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/jobs":
+                return self._error(HTTPStatus.NOT_FOUND, "not found")
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > service.config.max_body_mb * 2**20:
+                return self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+            try:
+                job_id = service.submit(json.loads(self.rfile.read(length) or b"{}"))
+            except QueueFull as e:
+                return self._error(HTTPStatus.TOO_MANY_REQUESTS, f"queue is full ({e})")
+            except (ValueError, TypeError, AttributeError) as e:
+                return self._error(HTTPStatus.BAD_REQUEST, str(e))
+            self._send(HTTPStatus.ACCEPTED, {"id": job_id, "status": "queued"})
+
+        def do_DELETE(self):
+            match = JOB_PATH.match(urlparse(self.path).path)
+            if not match or match.group(2):
+                return self._error(HTTPStatus.NOT_FOUND, "not found")
+            if service.store.get_job(match.group(1)) is None:
+                return self._error(HTTPStatus.NOT_FOUND, "unknown job")
+            cancelled = service.jobs.cancel(match.group(1))
+            self._send(HTTPStatus.OK, {"id": match.group(1), "cancelled": cancelled})
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP service for shipping optimization jobs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--db", default="optimizer_service.db", help="SQLite file for jobs and results")
+    parser.add_argument("--workers", type=int, default=2, help="Jobs solved at the same time")
+    parser.add_argument("--max-queued", type=int, default=16, help="Waiting jobs before submissions get 429")
+    parser.add_argument("--job-timeout", type=float, default=600, help="Solver time limit per job (s)")
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    configure_logging(args.log_level)
+    service = OptimizerService(ServiceConfig(
+        host=args.host, port=args.port, db_path=args.db, max_workers=args.workers,
+        max_queued=args.max_queued, job_timeout=args.job_timeout,
+    ))
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
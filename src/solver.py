@@ -0,0 +1,210 @@
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+
+import pulp
+from src.instrumentation import logger
+
+# "highs-direct" hands optimize_shipping's constraint matrix to highspy as arrays
+# instead of building a PuLP model; PuLP models given to it are solved with HiGHS
+SOLVER_BACKENDS = ("cbc", "highs", "highs-direct")
+
+
+@dataclass
+class SolverConfig:
+    # backend: "cbc" (bundled with PuLP), "highs" or "highs-direct" (require highspy)
+    backend: str = "cbc"
+    time_limit: float = None
+    mip_gap: float = None
+    threads: int = None
+    warm_start: bool = False
+    msg: bool = True
+    # Called as progress(objective, best_bound, gap) when the solver reports a new
+    # incumbent or bound during the solve
+    progress: object = None
+    # Solve the LP relaxation, round it and re-solve only the fractional part as a MIP
+    # (optimize_shipping); the reported gap is then measured against the LP bound
+    relax_and_round: bool = False
+
+
+@dataclass
+class SolveInfo:
+    backend: str
+    status: str
+    solution_status: str
+    objective: float = None
+    best_bound: float = None
+    gap: float = None
+    solve_time: float = None
+    stats: object = None
+    lp_bound: float = None
+
+
+class WarmStartHiGHS(pulp.HiGHS):
+    # PuLP's HiGHS interface has no warm start; pass the variables' initial values to
+    # highspy as a starting solution right before the run.
+    def __init__(self, warmStart=False, progress=None, **kwargs):
+        super().__init__(**kwargs)
+        self.warmStart = warmStart
+        self.progress = progress
+
+    def callSolver(self, lp):
+        if self.progress is not None:
+            subscribe_progress(lp.solverModel, self.progress)
+        if self.warmStart:
+            import highspy
+
+            col_value = [0.0] * lp.solverModel.getNumCol()
+            for var in lp.variables():
+                col_value[var.index] = var.varValue or 0.0
+            start = highspy.HighsSolution()
+            start.col_value = col_value
+            start.value_valid = True
+            lp.solverModel.setSolution(start)
+        super().callSolver(lp)
+
+
+def subscribe_progress(highs, progress):
+    # Report every improving MIP solution of a highspy.Highs run
+    if not hasattr(highs, "cbMipImprovingSolution"):
+        return
+
+    def report(event):
+        out = event.data_out
+        bound = out.mip_dual_bound if math.isfinite(out.mip_dual_bound) else None
+        gap = out.mip_gap if math.isfinite(out.mip_gap) else None
+        progress(out.mip_primal_bound, bound, gap)
+
+    highs.cbMipImprovingSolution.subscribe(report)
+
+
+def build_solver(config, log_path=None):
+    backend = config.backend.lower()
+    if backend not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend '{config.backend}', expected one of {SOLVER_BACKENDS}")
+
+    if backend == "cbc":
+        return pulp.PULP_CBC_CMD(
+            msg=False if log_path else config.msg,
+            timeLimit=config.time_limit,
+            gapRel=config.mip_gap,
+            threads=config.threads,
+            warmStart=config.warm_start,
+            logPath=log_path,
+        )
+
+    solver = WarmStartHiGHS(
+        warmStart=config.warm_start,
+        progress=config.progress,
+        msg=config.msg,
+        timeLimit=config.time_limit,
+        gapRel=config.mip_gap,
+        threads=config.threads,
+    )
+    if not solver.available():
+        raise RuntimeError("The HiGHS backend requires the highspy package")
+    if not config.msg:
+        solver.optionsDict["output_flag"] = False
+    return solver
+
+
+def parse_cbc_log(text):
+    # Pull the final bound and gap out of CBC's result summary
+    info = {}
+    for key, pattern in [
+        ("objective", r"Objective value:\s+(\S+)"),
+        ("best_bound", r"Lower bound:\s+(\S+)"),
+        ("gap", r"Gap:\s+(\S+)"),
+    ]:
+        match = re.search(pattern, text)
+        if match:
+            try:
+                info[key] = float(match.group(1))
+            except ValueError:
+                pass
+    return info
+
+
+CBC_INCUMBENT = re.compile(r"Integer solution of (\S+) found")
+CBC_NODE_LOG = re.compile(r"(\S+) best solution, best possible (\S+)")
+
+
+def watch_cbc_log(log_path, progress, stop, interval=0.5):
+    # Follow the CBC log while it is written and report each new incumbent and bound.
+    # CBC buffers its output, so updates arrive in blocks rather than line by line.
+    objective = best_bound = None
+    position, partial = 0, ""
+    while not stop.wait(interval):
+        with open(log_path) as f:
+            f.seek(position)
+            text = partial + f.read()
+            position = f.tell()
+        *lines, partial = text.split("\n")
+        previous = (objective, best_bound)
+        for line in lines:
+            match = CBC_INCUMBENT.search(line)
+            if match:
+                objective = float(match.group(1))
+            match = CBC_NODE_LOG.search(line)
+            if match:
+                incumbent, best_bound = float(match.group(1)), float(match.group(2))
+                objective = incumbent if incumbent < 1e50 else objective
+        if (objective, best_bound) != previous and objective is not None:
+            gap = abs(objective - best_bound) / max(abs(objective), 1e-9) if best_bound is not None else None
+            progress(objective, best_bound, gap)
+
+
+def solve_model(model, config=None):
+    # Solve the PuLP model with the configured backend and report status, objective,
+    # best bound and achieved relative gap
+    config = config or SolverConfig()
+    backend = config.backend.lower()
+    log_info = {}
+    start = time.perf_counter()
+
+    if backend == "cbc":
+        fd, log_path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        stop = threading.Event()
+        watcher = None
+        if config.progress is not None:
+            watcher = threading.Thread(target=watch_cbc_log, args=(log_path, config.progress, stop), daemon=True)
+            watcher.start()
+        try:
+            model.solve(build_solver(config, log_path=log_path))
+            with open(log_path) as f:
+                log_text = f.read()
+        finally:
+            stop.set()
+            if watcher is not None:
+                watcher.join()
+            os.remove(log_path)
+        if config.msg:
+            logger.info("CBC log:\n%s", log_text)
+        log_info = parse_cbc_log(log_text)
+    else:
+        model.solve(build_solver(config))
+        highs_info = model.solverModel.getInfo()
+        log_info = {"best_bound": highs_info.mip_dual_bound, "gap": highs_info.mip_gap}
+
+    solve_time = time.perf_counter() - start
+    objective = pulp.value(model.objective)
+    best_bound = log_info.get("best_bound")
+    gap = log_info.get("gap")
+    if model.sol_status == pulp.LpSolutionOptimal:
+        best_bound = objective if best_bound is None else best_bound
+        gap = 0.0 if gap is None else gap
+
+    return SolveInfo(
+        backend=backend,
+        status=pulp.LpStatus[model.status],
+        solution_status=pulp.LpSolution[model.sol_status],
+        objective=objective,
+        best_bound=best_bound,
+        gap=gap,
+        solve_time=solve_time,
+    )
@@ -0,0 +1,212 @@
+import csv
+import io
+import os
+import re
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from src.decomposition import _solve_lane, combine_solve_info
+from src.ingest import compact_dtypes
+from src.instrumentation import logger
+from src.preprocessing import PO_DTYPES, REQUIRED_PO_COLUMNS, compute_volume
+
+BAD_ROW_COLUMNS = ["Line", "Column", "Value", "Error"]
+DATE_COLUMNS = ["Export ETA", "Import ETA"]
+# Columns every PO row needs to be solvable; the descriptive ones may be empty
+NON_NULL_COLUMNS = [
+    "PO Number", "PO Line Number", "IsElectronic", "From Port", "To Port", "Export ETA",
+    "Import ETA", "To Be Shipped Quantity", "Length (cm)", "Width (cm)", "Height (cm)", "Weight (kg)",
+    "Priority Level", "Unmet Penalty",
+]
+SKIPPED_LINE = re.compile(r"Skipping line (\d+): (.*)")
+
+
+def read_csv_header(source):
+    # Column names from the first line only, without reading the rest of the file
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, newline="", encoding="utf-8-sig") as f:
+            first = f.readline()
+    else:
+        position = source.tell()
+        first = source.readline()
+        source.seek(position)
+        if isinstance(first, bytes):
+            first = first.decode("utf-8-sig")
+    return next(csv.reader(io.StringIO(first)), [])
+
+
+def check_po_header(source):
+    columns = read_csv_header(source)
+    missing = REQUIRED_PO_COLUMNS - set(columns)
+    if missing:
+        raise ValueError(f"Missing required PO columns: {missing}")
+    return columns
+
+
+class ChunkedPOReader:
+    # Stream a PO CSV in batches of `chunksize` rows. The header is checked before any
+    # row is parsed; each batch is coerced to the PO dtypes, gets its volume and parsed
+    # dates, and rows that fail are collected in bad_rows with their line number instead
+    # of failing the load. Line numbers assume one record per line.
+    def __init__(self, source, chunksize=100_000, compact=False):
+        self.source = source
+        self.chunksize = chunksize
+        self.compact = compact
+        self.columns = check_po_header(source)
+        self.rows_read = 0
+        self.rows_kept = 0
+        self._bad = []
+        self._skipped = []
+        self._next_line = 2
+
+    @property
+    def bad_rows(self):
+        if not self._bad:
+            return pd.DataFrame(columns=BAD_ROW_COLUMNS)
+        return pd.concat(self._bad, ignore_index=True).sort_values("Line", kind="stable", ignore_index=True)
+
+    def __iter__(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", pd.errors.ParserWarning)
+            reader = pd.read_csv(self.source, dtype=str, chunksize=self.chunksize, on_bad_lines="warn")
+            for chunk in reader:
+                self._collect_skipped(caught)
+                caught.clear()
+                batch = self._process(chunk)
+                if len(batch):
+                    yield batch
+            self._collect_skipped(caught)
+
+    def _collect_skipped(self, caught):
+        # The C parser reports malformed lines (wrong field count) as ParserWarnings
+        lines, errors = [], []
+        for warning in caught:
+            for line, error in SKIPPED_LINE.findall(str(warning.message)):
+                lines.append(int(line))
+                errors.append(error)
+        if lines:
+            self._skipped.extend(lines)
+            self._bad.append(pd.DataFrame({"Line": lines, "Column": None, "Value": None, "Error": errors}))
+
+    def _line_numbers(self, n):
+        # File lines of the next n parsed rows, stepping over lines the parser skipped
+        skipped = np.array([line for line in self._skipped if line >= self._next_line], dtype=np.int64)
+        candidates = np.arange(self._next_line, self._next_line + n + len(skipped))
+        lines = candidates[~np.isin(candidates, skipped)][:n]
+        if n:
+            self._next_line = int(lines[-1]) + 1
+        return lines
+
+    def _process(self, chunk):
+        lines = self._line_numbers(len(chunk))
+        self.rows_read += len(chunk)
+        bad = np.zeros(len(chunk), dtype=bool)
+        problems = []
+
+        def flag(mask, col, error):
+            mask = np.asarray(mask, dtype=bool)
+            if mask.any():
+                problems.append(pd.DataFrame({
+                    "Line": lines[mask], "Column": col, "Value": chunk[col].to_numpy()[mask], "Error": error
+                }))
+            return mask
+
+        out = {}
+        for col in NON_NULL_COLUMNS:
+            bad |= flag(chunk[col].isna().to_numpy(), col, "missing value")
+        for col, kind in PO_DTYPES.items():
+            if kind is str:
+                continue
+            values = pd.to_numeric(chunk[col], errors="coerce")
+            invalid = values.isna() & chunk[col].notna()
+            if kind is int:
+                invalid |= values.notna() & (values % 1 != 0)
+            bad |= flag(invalid.to_numpy(), col, f"not a valid {kind.__name__}")
+            out[col] = values
+        for col in DATE_COLUMNS:
+            values = pd.to_datetime(chunk[col], format="%d/%m/%Y", errors="coerce")
+            bad |= flag((values.isna() & chunk[col].notna()).to_numpy(), col, "not a DD/MM/YYYY date")
+            out[col] = values
+        if problems:
+            self._bad.extend(problems)
+
+        batch = chunk.assign(**out)[~bad]
+        batch = batch.astype({col: kind for col, kind in PO_DTYPES.items() if kind is not str})
+        batch.index = pd.RangeIndex(self.rows_kept, self.rows_kept + len(batch))
+        self.rows_kept += len(batch)
+
+        batch["Volume (m3)"] = compute_volume(batch["Length (cm)"], batch["Width (cm)"], batch["Height (cm)"])
+        return compact_dtypes(batch) if self.compact else batch
+
+
+def _union_categories(batches):
+    # Batches whose categorical columns share the categories of all batches, so
+    # pd.concat keeps them categorical
+    shared = [col for col in batches[0].columns
+              if all(isinstance(batch[col].dtype, pd.CategoricalDtype) for batch in batches)]
+    categories = {
+        col: union_categoricals([batch[col] for batch in batches], sort_categories=True).categories
+        for col in shared
+    }
+    return [batch.assign(**{col: batch[col].cat.set_categories(cats) for col, cats in categories.items()})
+            for batch in batches]
+
+
+def read_po_csv_chunked(source, chunksize=100_000, compact=False):
+    # Whole PO table from the chunked reader, plus the bad rows report. With compact the
+    # batches are compacted as they are read and the table once more after the concat,
+    # since each batch picks its own categories and numeric widths
+    reader = ChunkedPOReader(source, chunksize, compact)
+    batches = list(reader)
+    if not batches:
+        return pd.DataFrame(columns=reader.columns + ["Volume (m3)"]), reader.bad_rows
+    if compact:
+        return compact_dtypes(pd.concat(_union_categories(batches))), reader.bad_rows
+    return pd.concat(batches), reader.bad_rows
+
+
+def partition_by_lane(batches, sorted_by_lane=False):
+    # Group streamed rows by (From Port, To Port). Yields (lane, rows) once a lane is
+    # complete: as soon as the next lane starts when the file is sorted by lane,
+    # otherwise at the end of the stream.
+    parts, current = {}, None
+    for batch in batches:
+        for lane, rows in batch.groupby(["From Port", "To Port"], sort=False, observed=True):
+            if sorted_by_lane and current is not None and lane != current:
+                yield current, pd.concat(parts.pop(current))
+            parts.setdefault(lane, []).append(rows)
+            current = lane
+    for lane, frames in parts.items():
+        yield lane, pd.concat(frames)
+
+
+def optimize_po_stream_by_lane(po_source, cap_df, late_penalty_per_day=2, priority_multiplier=2,
+                               solver_config=None, chunksize=100_000, sorted_by_lane=False,
+                               max_workers=None, return_info=False):
+    # Solve lane by lane while the PO file is still being read: every completed lane is
+    # submitted to the process pool right away. Returns the combined results and the
+    # bad rows report (and the combined SolveInfo with return_info).
+    start = time.perf_counter()
+    cap_lanes = cap_df.groupby(["From Port", "To Port"], sort=False, observed=True).indices
+    reader = ChunkedPOReader(po_source, chunksize)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for lane, po_sub in partition_by_lane(reader, sorted_by_lane):
+            cap_sub = cap_df.iloc[cap_lanes.get(lane, np.array([], dtype=np.intp))]
+            futures.append(executor.submit(
+                _solve_lane, po_sub, cap_sub, late_penalty_per_day, priority_multiplier, solver_config, None
+            ))
+            logger.info("lane %s-%s submitted after %d rows read", lane[0], lane[1], reader.rows_read)
+        outputs = [future.result() for future in futures]
+
+    frames = [results for results, _ in outputs if not results.empty]
+    results_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if return_info:
+        info = combine_solve_info([info for _, info in outputs], time.perf_counter() - start)
+        return results_df, reader.bad_rows, info
+    return results_df, reader.bad_rows
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pandas as pd
+from src.preprocessing import CAP_TEMPLATE_COLUMNS, PO_TEMPLATE_COLUMNS, parse_week_year_to_date
+
+PORTS = ["HK", "SZ", "SH", "NB", "SG", "LA", "NY", "SEA", "RTM", "HAM"]
+CARRIERS = ["Maersk", "ONE", "MSC", "CMA CGM", "Evergreen"]
+# Container type: (max volume m³, max weight kg, base price USD)
+CONTAINER_TYPES = {"20FT": (33.0, 21700.0, 1600.0), "40FT": (66.0, 26500.0, 3000.0)}
+PRODUCT_FAMILIES = {
+    "Electronics": ["Smartphone X", "Tablet Pro", "Wireless Earbuds", "Smartwatch"],
+    "Toys": ["Building Blocks", "Plush Bear", "Puzzle Set"],
+    "Home": ["Desk Lamp", "Kettle", "Storage Box", "Cushion"],
+    "Apparel": ["Rain Jacket", "Sneakers", "Backpack"],
+}
+
+
+def make_lanes(n_lanes):
+    # Distinct (From Port, To Port) pairs, origins from the first half of PORTS
+    origins, destinations = PORTS[:5], PORTS[5:]
+    lanes = [(o, d) for d in destinations for o in origins]
+    if n_lanes > len(lanes):
+        raise ValueError(f"At most {len(lanes)} lanes can be generated, got {n_lanes}")
+    return lanes[:n_lanes]
+
+
+def generate_capacity(n_lanes=2, n_weeks=4, units_per_row=3, start_week="2025-W25", seed=0):
+    # One to three carrier/container offers per lane and week, with Available Units
+    # averaging units_per_row
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(parse_week_year_to_date(start_week))
+    rows = []
+    for from_port, to_port in make_lanes(n_lanes):
+        transit = int(rng.integers(8, 30))
+        for week in range(n_weeks):
+            week_year = (start + pd.Timedelta(weeks=week)).strftime("%Y-W%W")
+            n_offers = int(rng.integers(1, 4))
+            for carrier in rng.choice(CARRIERS, n_offers, replace=False):
+                container_type = str(rng.choice(list(CONTAINER_TYPES)))
+                max_vol, max_wt, price = CONTAINER_TYPES[container_type]
+                rows.append([
+                    week_year, from_port, to_port, carrier, container_type,
+                    int(rng.integers(1, 2 * units_per_row)),
+                    max_vol, max_wt,
+                    transit + int(rng.integers(-2, 3)),
+                    round(price * rng.uniform(0.8, 1.3), 0),
+                ])
+    return pd.DataFrame(rows, columns=[col for col, _ in CAP_TEMPLATE_COLUMNS])
+
+
+def generate_purchase_orders(n_po_lines=100, n_lanes=2, n_weeks=4, start_week="2025-W25", seed=0):
+    # PO lines spread over the lanes with Export ETAs inside the capacity horizon and
+    # Import ETAs one to six weeks later
+    rng = np.random.default_rng(seed + 1)
+    start = pd.Timestamp(parse_week_year_to_date(start_week))
+    lanes = make_lanes(n_lanes)
+
+    lane_pos = rng.integers(0, len(lanes), n_po_lines)
+    families = rng.choice(list(PRODUCT_FAMILIES), n_po_lines)
+    export_eta = start + pd.to_timedelta(rng.integers(-3, 7 * max(n_weeks - 1, 1), n_po_lines), unit="D")
+    import_eta = export_eta + pd.to_timedelta(rng.integers(10, 45, n_po_lines), unit="D")
+    line_numbers = np.arange(n_po_lines) % 3 + 1
+
+    return pd.DataFrame({
+        "PO Number": [f"PO{i:06d}" for i in np.arange(n_po_lines) // 3],
+        "PO Line Number": line_numbers,
+        "SKU": [f"SKU{i:05d}" for i in rng.integers(0, max(n_po_lines // 2, 1), n_po_lines)],
+        "Product Name": [str(rng.choice(PRODUCT_FAMILIES[f])) for f in families],
+        "Product Family": families,
+        "IsElectronic": (families == "Electronics").astype(int),
+        "COGS": rng.uniform(5, 400, n_po_lines).round(2),
+        "From Port": [lanes[i][0] for i in lane_pos],
+        "To Port": [lanes[i][1] for i in lane_pos],
+        "Export ETA": export_eta.strftime("%d/%m/%Y"),
+        "Import ETA": import_eta.strftime("%d/%m/%Y"),
+        "To Be Shipped Quantity": rng.integers(1, 60, n_po_lines),
+        "Length (cm)": rng.uniform(10, 80, n_po_lines).round(1),
+        "Width (cm)": rng.uniform(10, 80, n_po_lines).round(1),
+        "Height (cm)": rng.uniform(5, 60, n_po_lines).round(1),
+        "Weight (kg)": rng.uniform(0.2, 40, n_po_lines).round(1),
+        "Priority Level": rng.integers(1, 4, n_po_lines),
+        "Unmet Penalty": rng.integers(300, 2500, n_po_lines),
+    }, columns=[col for col, _ in PO_TEMPLATE_COLUMNS])
+
+
+def write_synthetic_csvs(out_dir, n_po_lines=100, n_lanes=2, n_weeks=4, units_per_row=3,
+                         start_week="2025-W25", seed=0):
+    # Write a PO / capacity CSV pair in the template schema and return their paths
+    os.makedirs(out_dir, exist_ok=True)
+    po_path = os.path.join(out_dir, "purchase_orders.csv")
+    cap_path = os.path.join(out_dir, "container_capacity.csv")
+    generate_purchase_orders(n_po_lines, n_lanes, n_weeks, start_week, seed).to_csv(po_path, index=False)
+    generate_capacity(n_lanes, n_weeks, units_per_row, start_week, seed).to_csv(cap_path, index=False)
+    return po_path, cap_path
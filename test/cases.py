@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+# Inputs shared by the test modules: the CSV samples and generated cases
+
+PO_CSV = """PO Number,PO Line Number,SKU,Product Name,Product Family,IsElectronic,COGS,From Port,To Port,Export ETA,Import ETA,To Be Shipped Quantity,Length (cm),Width (cm),Height (cm),Weight (kg),Priority Level,Unmet Penalty
+PO001,1,SKU1001,Smartphone X,Electronics,1,250,HK,LA,15/06/2025,25/06/2025,10,15.0,7.5,0.8,0.2,2,1000
+PO001,2,SKU1002,Tablet Y,Electronics,1,400,HK,NY,16/06/2025,30/06/2025,4,25.0,17.5,1.0,0.5,1,1500
+"""
+
+CAP_CSV = """Week_Year,From Port,To Port,Carrier,Container Type,Available Units,Max Volume (m³),Max Weight (kg),Estimated Transit Time (days),Price (USD)
+2025-W25,HK,LA,Maersk,40FT,3,66.0,26500.0,10,3000.0
+2025-W26,HK,NY,ONE,20FT,0,33.0,21000.0,20,1800.0
+2025-W25,HK,NY,ONE,20FT,2,33.0,21000.0,21,1900.0
+"""
+
+
+def make_random_case(seed=3, n_po=40, n_pools=8):
+    rng = np.random.default_rng(seed)
+    po_df = pd.DataFrame({
+        "PO Number": [f"PO{i // 2}" for i in range(n_po)],
+        "PO Line Number": np.arange(n_po) % 2 + 1,
+        "SKU": [f"SKU{i}" for i in range(n_po)],
+        "From Port": "HK",
+        "To Port": rng.choice(["LA", "NY"], n_po),
+        "Export ETA": pd.Timestamp("2025-06-01") + pd.to_timedelta(rng.integers(0, 14, n_po), unit="D"),
+        "To Be Shipped Quantity": rng.integers(1, 30, n_po),
+        "Volume (m3)": rng.uniform(0.1, 3, n_po),
+        "Weight (kg)": rng.uniform(10, 400, n_po),
+        "Priority Level": rng.integers(1, 4, n_po),
+        "Unmet Penalty": rng.uniform(100, 600, n_po),
+    })
+    po_df["Import ETA"] = po_df["Export ETA"] + pd.Timedelta(days=12)
+
+    cap_rows = []
+    for b in range(n_pools):
+        departure = pd.Timestamp("2025-06-02") + pd.Timedelta(days=7 * (b % 3))
+        for unit in range(1, int(rng.integers(1, 4)) + 1):
+            cap_rows.append({
+                "Shipment ID": f"B{b}-{unit}", "Base Shipment ID": f"B{b}",
+                "From Port": "HK", "To Port": ["LA", "NY"][b % 2],
+                "Departure Date": departure,
+                "Arrival Date": departure + pd.Timedelta(days=10),
+                "Price (USD)": 1500.0, "Max Volume (m³)": 33.0, "Max Weight (kg)": 20000.0,
+                "Carrier": "ONE", "Container Type": "20FT"
+            })
+    return po_df, pd.DataFrame(cap_rows)
+
+
+def make_multi_lane_case():
+    lanes = [("HK", "LA"), ("HK", "NY"), ("SZ", "LA")]
+    po_rows, cap_rows = [], []
+    for lane_no, (from_port, to_port) in enumerate(lanes):
+        for line in (1, 2):
+            po_rows.append({
+                "PO Number": f"PO{lane_no}", "PO Line Number": line, "SKU": f"SKU{lane_no}{line}",
+                "From Port": from_port, "To Port": to_port,
+                "Export ETA": pd.Timestamp("2025-06-01"), "Import ETA": pd.Timestamp("2025-06-12"),
+                "To Be Shipped Quantity": 4 + line, "Volume (m3)": 3, "Weight (kg)": 100,
+                "Priority Level": line, "Unmet Penalty": 1000
+            })
+        for unit in (1, 2):
+            cap_rows.append({
+                "Shipment ID": f"S{lane_no}-{unit}", "Base Shipment ID": f"S{lane_no}",
+                "From Port": from_port, "To Port": to_port,
+                "Departure Date": pd.Timestamp("2025-06-03"),
+                "Arrival Date": pd.Timestamp("2025-06-10") + pd.Timedelta(days=2 * lane_no),
+                "Price (USD)": 600, "Max Volume (m³)": 20, "Max Weight (kg)": 2000,
+                "Carrier": "ONE", "Container Type": "20FT"
+            })
+    # A lane with demand but no capacity
+    po_rows.append({**po_rows[0], "PO Number": "PO9", "To Port": "SF"})
+    return pd.DataFrame(po_rows), pd.DataFrame(cap_rows)
@@ -0,0 +1,86 @@
+import io
+
+import pytest
+from archive import ModelArchive, replay_archived, resolve_archived
+from cases import CAP_CSV, PO_CSV, make_random_case
+from instrumentation import RunStats
+from optimizer import optimize_shipping, plan_objective
+from preprocessing import preprocess_data
+from solver import SolverConfig
+
+
+def load():
+    return preprocess_data(io.StringIO(PO_CSV), io.StringIO(CAP_CSV))
+
+
+def test_identical_inputs_reuse_archived_model(tmp_path):
+    po_df, cap_df = load()
+    archive = ModelArchive(str(tmp_path))
+    first = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive)
+
+    stats = RunStats()
+    po_df, cap_df = load()
+    second = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive, stats=stats)
+    phases = [phase.name for phase in stats.phases]
+    assert "route generation" not in phases and "archive lookup" in phases
+    assert second.equals(first)
+
+    key, = archive.keys()
+    assert archive.manifest(key)["solution"]["status"] == "Optimal"
+    assert replay_archived(archive, key).equals(first)
+    assert archive.key(po_df, cap_df, late_penalty_per_day=3) != key
+
+
+def test_presolve_setting_is_part_of_the_archive_key(tmp_path):
+    po_df, cap_df = load()
+    archive = ModelArchive(str(tmp_path))
+    optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive)
+
+    stats = RunStats()
+    results = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive,
+                                stats=stats, presolve=False)
+    assert "route generation" in [phase.name for phase in stats.phases]
+    assert "presolve" not in [phase.name for phase in stats.phases]
+    assert sorted(archive.manifest(key)["presolve"] for key in archive.keys()) == [False, True]
+    assert results["Qty Assigned"].sum() + results["Unmet Qty"].sum() == po_df["To Be Shipped Quantity"].sum()
+
+    # A model stored under the key but built differently is rebuilt, not loaded
+    key = archive.key(po_df, cap_df, presolve=False)
+    manifest = archive.manifest(key)
+    archive._write_manifest(key, {**manifest, "model_version": manifest["model_version"] - 1})
+    assert not archive.matches(key, presolve=False)
+    stats = RunStats()
+    optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive,
+                      stats=stats, presolve=False)
+    assert "route generation" in [phase.name for phase in stats.phases]
+    assert archive.matches(key, presolve=False)
+
+
+def test_mps_archive_resolves_to_same_objective(tmp_path):
+    po_df, cap_df = load()
+    archive = ModelArchive(str(tmp_path), model_format="mps")
+    results_df, info = optimize_shipping(
+        po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive, return_info=True
+    )
+    key, = archive.keys()
+    resolved_df, resolved_info = resolve_archived(archive, key, SolverConfig(backend="highs", msg=False))
+    assert resolved_info.objective == info.objective
+    assert resolved_df["Qty Assigned"].sum() == results_df["Qty Assigned"].sum()
+
+
+def test_replay_returns_the_plan_of_a_split_re_solve(tmp_path):
+    po_df, cap_df = make_random_case(n_po=12, n_pools=4)
+    archive = ModelArchive(str(tmp_path))
+    stats = RunStats()
+    results_df, info = optimize_shipping(
+        po_df, cap_df, solver_config=SolverConfig(msg=False), archive=archive, return_info=True, stats=stats,
+        presolve=False
+    )
+    # A pool of this case does not pack into its containers and is solved again split
+    assert "split re-solve" in [phase.name for phase in stats.phases]
+
+    key, = archive.keys()
+    assert archive.manifest(key)["solution"]["objective"] == info.objective
+    replayed = replay_archived(archive, key)
+    assert replayed.equals(results_df)
+    assert plan_objective(replayed) == pytest.approx(info.objective)
@@ -0,0 +1,48 @@
+import json
+import os
+
+import pandas as pd
+from batch import BatchOptions, find_pairs, job_name, main, run_batch
+from solver import SolverConfig
+from synthetic import write_synthetic_csvs
+
+
+def make_inputs(root, n_jobs=2):
+    for n in range(n_jobs):
+        write_synthetic_csvs(os.path.join(root, f"plan{n}"), n_po_lines=30, n_lanes=2, n_weeks=2, seed=n)
+    return os.path.join(root, "*", "purchase_orders.csv")
+
+
+def test_batch_runs_changed_jobs_only(tmp_path):
+    po_glob = make_inputs(str(tmp_path / "in"))
+    out_dir = str(tmp_path / "out")
+    argv = ["--po-glob", po_glob, "--out-dir", out_dir, "--workers", "2", "--format", "parquet", "--log-level", "WARNING"]
+
+    assert main(argv) == 0
+    pairs = find_pairs(po_glob=po_glob)
+    for po_path, cap_path in pairs:
+        job_dir = os.path.join(out_dir, job_name(po_path, cap_path))
+        with open(os.path.join(job_dir, "run_stats.json")) as f:
+            stats = json.load(f)
+        assert stats["status"] == "ok"
+        assert {phase["name"] for phase in stats["phases"]} >= {"preprocessing", "solve"}
+        assert len(pd.read_parquet(os.path.join(job_dir, stats["results_file"]))) == stats["rows"]
+
+    # Edit one PO file: only its job runs again
+    po_df = pd.read_csv(pairs[0][0])
+    po_df.loc[0, "To Be Shipped Quantity"] += 1
+    po_df.to_csv(pairs[0][0], index=False)
+    options = BatchOptions(result_format="parquet")
+    summary = run_batch(pairs, out_dir, options, SolverConfig(msg=False))
+    assert [row["status"] for row in summary] == ["ok", "skipped"]
+
+
+def test_batch_records_failures(tmp_path):
+    po_glob = make_inputs(str(tmp_path / "in"), n_jobs=1)
+    po_path, cap_path = find_pairs(po_glob=po_glob)[0]
+    with open(po_path, "w") as f:
+        f.write("PO Number\nPO1\n")
+
+    summary = run_batch([(po_path, cap_path), (po_path, "missing.csv")], str(tmp_path / "out"))
+    assert [row["status"] for row in summary] == ["failed", "missing input"]
+    assert "Missing required PO columns" in summary[0]["error"]
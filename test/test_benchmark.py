@@ -0,0 +1,36 @@
+import pandas as pd
+from benchmark import BenchmarkCase, compare_reports, read_report, run_benchmark, write_report
+from preprocessing import CAP_TEMPLATE_COLUMNS, PO_TEMPLATE_COLUMNS, preprocess_data
+from synthetic import write_synthetic_csvs
+
+
+def test_synthetic_csvs_match_the_templates(tmp_path):
+    po_path, cap_path = write_synthetic_csvs(tmp_path, n_po_lines=30, n_lanes=3, n_weeks=4, seed=7)
+
+    assert list(pd.read_csv(po_path).columns) == [col for col, _ in PO_TEMPLATE_COLUMNS]
+    assert list(pd.read_csv(cap_path).columns) == [col for col, _ in CAP_TEMPLATE_COLUMNS]
+
+    po_df, cap_df = preprocess_data(po_path, cap_path)
+    assert len(po_df) == 30
+    assert po_df.groupby(["From Port", "To Port"]).ngroups == 3
+    assert cap_df["Departure Date"].notna().all()
+
+    again, _ = write_synthetic_csvs(tmp_path / "again", n_po_lines=30, n_lanes=3, n_weeks=4, seed=7)
+    pd.testing.assert_frame_equal(pd.read_csv(po_path), pd.read_csv(again))
+
+
+def test_benchmark_report_round_trip_and_compare(tmp_path):
+    report = run_benchmark([BenchmarkCase.parse("20x2x3x2")], isolate=False)
+    row = report.iloc[0]
+    assert row["case"] == "20x2x3x2" and row["status"] == "Optimal"
+    assert {"preprocess (s)", "solve (s)", "total (s)", "peak rss (MB)", "variables", "nonzeros"} <= set(report.columns)
+
+    write_report(report, str(tmp_path / "base.json"))
+    baseline = read_report(str(tmp_path / "base.json"))
+    assert compare_reports(baseline, report)["regression"].sum() == 0
+
+    slower = report.copy()
+    slower["solve (s)"] += 5
+    slower["objective"] += 100
+    flagged = compare_reports(baseline, slower)
+    assert set(flagged.loc[flagged["regression"], "metric"]) == {"solve (s)", "objective"}
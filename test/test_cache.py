@@ -0,0 +1,36 @@
+import pandas as pd
+from cache import ResultCache, make_cache_key
+
+
+def test_key_depends_on_content_and_parameters():
+    key = make_cache_key([b"po", b"cap"], {"late_penalty_per_day": 2})
+
+    assert key == make_cache_key([b"po", b"cap"], {"late_penalty_per_day": 2})
+    assert key != make_cache_key([b"po", b"cap2"], {"late_penalty_per_day": 2})
+    assert key != make_cache_key([b"po", b"cap"], {"late_penalty_per_day": 3})
+    assert key != make_cache_key([b"pocap", b""], {"late_penalty_per_day": 2})
+
+
+def test_lru_eviction_and_stats():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"entries": 2, "hits": 3, "disk_hits": 0, "misses": 1, "hit_rate": 0.75}
+
+
+def test_disk_store_shared_between_instances(tmp_path):
+    results = pd.DataFrame({"Qty Assigned": [5]})
+    ResultCache(cache_dir=tmp_path).put("k", (results, None))
+
+    other = ResultCache(cache_dir=tmp_path)
+    cached_results, _ = other.get("k")
+    pd.testing.assert_frame_equal(cached_results, results)
+    assert other.stats()["disk_hits"] == 1
+
+    other.clear()
+    assert ResultCache(cache_dir=tmp_path).get("k") is None
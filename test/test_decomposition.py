@@ -0,0 +1,30 @@
+import pytest
+from cases import make_multi_lane_case
+from decomposition import optimize_shipping_by_lane, split_by_lane
+from optimizer import optimize_shipping
+from solver import SolverConfig
+
+
+def test_split_by_lane_covers_every_po_line():
+    po_df, cap_df = make_multi_lane_case()
+    parts = list(split_by_lane(po_df, cap_df))
+
+    assert len(parts) == 4
+    assert sum(len(po_sub) for _, po_sub, _ in parts) == len(po_df)
+    assert all((cap_sub["To Port"] == lane[1]).all() for lane, _, cap_sub in parts)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_lane_decomposition_matches_monolithic_solve(max_workers):
+    po_df, cap_df = make_multi_lane_case()
+    config = SolverConfig(msg=False)
+
+    _, full_info = optimize_shipping(po_df, cap_df, solver_config=config, return_info=True)
+    results, info = optimize_shipping_by_lane(
+        po_df, cap_df, solver_config=config, max_workers=max_workers, return_info=True
+    )
+
+    assert info.objective == pytest.approx(full_info.objective)
+    assert results["Qty Assigned"].sum() == 5 + 6 + 5 + 6 + 5 + 6
+    assert results["Unmet Qty"].sum() == 5
+    assert results["Shipment ID"].dropna().str.startswith("S").all()
@@ -0,0 +1,50 @@
+import pulp
+import pytest
+from cases import make_random_case
+from direct import build_model_arrays
+from optimizer import (
+    add_constraints, build_container_pools, create_variables, optimize_shipping, route_late_penalty,
+    set_penalty_objective
+)
+from routes import find_feasible_routes
+from solver import SolverConfig
+
+pytest.importorskip("highspy")
+
+
+def test_arrays_match_pulp_model():
+    po_df, cap_df = make_random_case(n_po=15, n_pools=4)
+    pools, _ = build_container_pools(cap_df)
+    routes = find_feasible_routes(po_df, pools)
+    model = pulp.LpProblem("m", pulp.LpMinimize)
+    variables = create_variables(po_df, pools, routes)
+    set_penalty_objective(model, po_df, pools, routes, variables)
+    add_constraints(model, po_df, pools, routes, variables)
+
+    arrays = build_model_arrays(po_df, pools, routes, route_late_penalty(po_df, pools, routes)[1])
+    columns = [var.name for var in variables[0]] + [var.name for var in variables[1].values()] \
+        + [var.name for var in variables[2].values()]
+    assert [columns[i] for i in arrays.order] == [var.name for var in model.variables()]
+
+    position = {name: i for i, name in enumerate(columns[i] for i in arrays.order)}
+    for n, constraint in enumerate(model.constraints.values()):
+        entries = slice(arrays.start[n], arrays.start[n + 1])
+        expected = [(position[var.name], coef) for var, coef in constraint.items() if coef != 0]
+        assert list(zip(arrays.index[entries], arrays.value[entries])) == pytest.approx(expected)
+        assert arrays.row_upper[n] == constraint.getUb()
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_direct_backend_matches_pulp_highs(seed):
+    po_df, cap_df = make_random_case(seed=seed)
+    expected, expected_info = optimize_shipping(
+        po_df, cap_df, solver_config=SolverConfig(backend="highs", msg=False), return_info=True
+    )
+    results, info = optimize_shipping(
+        po_df, cap_df, solver_config=SolverConfig(backend="highs-direct", msg=False), return_info=True
+    )
+
+    assert results.equals(expected)
+    assert (info.status, info.solution_status) == (expected_info.status, expected_info.solution_status)
+    assert info.objective == pytest.approx(expected_info.objective)
+    assert "variable creation" not in info.stats.phase_seconds()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cases import make_random_case
+from evaluation import AssignmentEvaluator, evaluate_assignments
+from heuristic import greedy_shipping
+from optimizer import optimize_shipping
+from scenarios import summarize_scenario
+from solver import SolverConfig
+
+CONFIG = SolverConfig(msg=False)
+
+
+def test_scores_solver_results_like_the_results_table():
+    po_df, cap_df = make_random_case(n_po=20, n_pools=5)
+    results, info = optimize_shipping(po_df, cap_df, late_penalty_per_day=5, solver_config=CONFIG, return_info=True)
+
+    evaluation = evaluate_assignments(po_df, cap_df, results, late_penalty_per_day=5)
+    summary = summarize_scenario(results)
+
+    assert evaluation.feasible
+    assert evaluation.container_cost == pytest.approx(summary["Container Cost"])
+    assert evaluation.late_penalty == pytest.approx(summary["Late Penalty"])
+    assert evaluation.unmet_qty == summary["Unmet Qty"]
+    assert evaluation.unmet_penalty == pytest.approx(summary["Unmet Penalty"])
+    assert evaluation.containers_used == summary["Containers Used"]
+    # The results table truncates the unmet penalty; the evaluator scores it like the model
+    unmet_rate = results["Unmet Penalty Rate"].to_numpy(dtype=float)
+    assert evaluation.unmet_penalty == pytest.approx((results["Unmet Qty"] * unmet_rate).sum())
+    assert evaluation.objective == pytest.approx(
+        evaluation.container_cost + evaluation.late_penalty + evaluation.unmet_penalty
+    )
+    # The solver's objective scores the plan the same way, so the two agree up to the
+    # truncated unmet penalty of the table
+    assert evaluation.objective == pytest.approx(info.objective)
+    truncated = results["Unmet Penalty"].sum() + evaluation.container_cost + evaluation.late_penalty
+    assert 0 <= evaluation.objective - truncated <= (results["Unmet Qty"] > 0).sum() + 1e-6
+
+
+def test_reports_every_violated_check():
+    po_df, cap_df = make_random_case(n_po=6, n_pools=4)
+    ship = cap_df.set_index("Shipment ID")
+    la = ship.index[ship["To Port"] == "LA"][0]
+    ny = ship.index[ship["To Port"] == "NY"][0]
+    line = po_df.iloc[0]
+    right, wrong = (la, ny) if line["To Port"] == "LA" else (ny, la)
+
+    overrides = pd.DataFrame([
+        {"PO Number": "NOPE", "PO Line Number": 1, "Shipment ID": right, "Qty Assigned": 1},
+        {"PO Number": line["PO Number"], "PO Line Number": line["PO Line Number"], "Shipment ID": "NOPE-1", "Qty Assigned": 1},
+        {"PO Number": line["PO Number"], "PO Line Number": line["PO Line Number"], "Shipment ID": wrong, "Qty Assigned": 1},
+        {"PO Number": line["PO Number"], "PO Line Number": line["PO Line Number"], "Shipment ID": right,
+         "Qty Assigned": line["To Be Shipped Quantity"] + 0.5},
+        {"PO Number": line["PO Number"], "PO Line Number": line["PO Line Number"], "Shipment ID": None, "Qty Assigned": 0},
+    ])
+    # Make the right-lane container too small and let it leave before the Export ETA
+    cap_df.loc[cap_df["Shipment ID"] == right, ["Max Volume (m³)", "Max Weight (kg)", "Departure Date"]] = [
+        0.01, 0.01, line["Export ETA"] - pd.Timedelta(days=1)
+    ]
+
+    violations = evaluate_assignments(po_df, cap_df, overrides).violations
+    by_check = violations.set_index("Check")
+
+    assert set(by_check.index) == {
+        "unknown PO line", "unknown container", "quantity", "lane", "departure", "demand", "volume", "weight"
+    }
+    assert by_check.loc["unknown PO line", "Row"] == 0
+    assert by_check.loc["unknown container", "Row"] == 1
+    assert by_check.loc["lane", "Row"] == 2
+    assert by_check.loc["departure", "Row"] == 3
+    assert by_check.loc["demand", "Excess"] == pytest.approx(1.5)
+    assert by_check.loc["volume", "Shipment ID"] == right
+
+
+def test_positional_evaluation_matches_table():
+    po_df, cap_df = make_random_case(seed=7, n_po=30, n_pools=6)
+    results = greedy_shipping(po_df, cap_df)
+    evaluator = AssignmentEvaluator(po_df, cap_df)
+
+    po_pos, cap_pos, qty, _ = evaluator.positions(results)
+    by_table = evaluator.evaluate_table(results)
+    by_position = evaluator.evaluate(po_pos, cap_pos, qty)
+
+    assert by_table.feasible and by_position.feasible
+    assert by_position.components() == by_table.components()
+    # Dropping a whole assignment leaves its quantity unmet
+    moved = evaluator.evaluate(po_pos[1:], cap_pos[1:], qty[1:])
+    assert moved.unmet_qty == by_table.unmet_qty + qty[0]
+    assert np.isfinite(moved.objective)
@@ -0,0 +1,43 @@
+from cases import make_random_case
+from heuristic import greedy_shipping
+from optimizer import optimize_shipping
+from solver import SolverConfig
+
+
+def test_greedy_respects_capacity_and_demand():
+    po_df, cap_df = make_random_case()
+    results, info = greedy_shipping(po_df, cap_df, return_info=True)
+
+    assigned = results[results["Qty Assigned"] > 0]
+    load = assigned.assign(
+        vol=assigned["Qty Assigned"] * assigned["Volume (m3)"],
+        wt=assigned["Qty Assigned"] * assigned["Weight (kg)"],
+    ).groupby("Shipment ID")[["vol", "wt"]].sum()
+
+    assert (load["vol"] <= 33.0 + 1e-6).all()
+    assert (load["wt"] <= 20000.0 + 1e-6).all()
+    assert results["Qty Assigned"].sum() + results["Unmet Qty"].sum() == po_df["To Be Shipped Quantity"].sum()
+    assert set(assigned["Shipment ID"]) <= set(cap_df["Shipment ID"])
+    assert results["Used Container"].sum() == assigned["Shipment ID"].nunique()
+    assert info.objective > 0
+
+
+def test_greedy_matches_output_columns_and_seeds_mip():
+    po_df, cap_df = make_random_case(n_po=12, n_pools=4)
+    greedy = greedy_shipping(po_df, cap_df)
+    results, info = optimize_shipping(
+        po_df, cap_df, solver_config=SolverConfig(msg=False), warm_start=greedy, return_info=True
+    )
+    _, greedy_info = greedy_shipping(po_df, cap_df, return_info=True)
+
+    assert list(greedy.columns) == list(results.columns)
+    assert info.objective <= greedy_info.objective + 1e-6
+
+
+def test_greedy_closes_container_not_worth_its_price():
+    po_df, cap_df = make_random_case(n_po=2, n_pools=1)
+    po_df["Unmet Penalty"] = 1.0
+    results = greedy_shipping(po_df, cap_df)
+
+    assert results["Qty Assigned"].sum() == 0
+    assert results["Used Container"].sum() == 0
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from cases import make_multi_lane_case
+from incremental import CAP_KEY, PO_KEY, apply_changes, changed_lanes, reoptimize, solve_plan
+from optimizer import optimize_shipping
+from solver import SolverConfig
+
+CONFIG = SolverConfig(msg=False)
+
+
+def test_changed_lanes_from_diff():
+    po_df, cap_df = make_multi_lane_case()
+    edited = apply_changes(
+        po_df, PO_KEY,
+        upserts=po_df[(po_df["PO Number"] == "PO0") & (po_df["PO Line Number"] == 1)].assign(**{"To Be Shipped Quantity": 9}),
+        removed=[("PO2", 2)],
+    )
+
+    assert len(edited) == len(po_df) - 1
+    assert changed_lanes(po_df, edited, PO_KEY) == {("HK", "LA"), ("SZ", "LA")}
+    assert changed_lanes(po_df, po_df.copy(), PO_KEY) == set()
+
+
+def test_reoptimize_only_resolves_changed_lanes():
+    po_df, cap_df = make_multi_lane_case()
+    plan = solve_plan(po_df, cap_df, solver_config=CONFIG)
+
+    # More demand on HK-LA and an extra container released on SZ-LA
+    new_po = apply_changes(po_df, PO_KEY, upserts=po_df.iloc[[0]].assign(**{"To Be Shipped Quantity": 9}))
+    extra = cap_df[cap_df["Shipment ID"] == "S2-2"].assign(**{"Shipment ID": "S2-3"})
+    new_cap = apply_changes(cap_df, CAP_KEY, upserts=extra)
+
+    new_plan = reoptimize(plan, new_po, new_cap, solver_config=CONFIG)
+
+    assert new_plan.info.stats.counters["solved_models"] == 2
+    untouched = lambda df: df[df["To Port"] == "NY"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(untouched(new_plan.results_df), untouched(plan.results_df))
+
+    _, full_info = optimize_shipping(new_po, new_cap, solver_config=CONFIG, return_info=True)
+    assert new_plan.info.objective == pytest.approx(full_info.objective)
+    assert new_plan.results_df["Qty Assigned"].sum() + new_plan.results_df["Unmet Qty"].sum() == new_po["To Be Shipped Quantity"].sum()
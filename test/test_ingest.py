@@ -0,0 +1,50 @@
+import io
+
+import pandas as pd
+import pyarrow.feather as feather
+from cases import CAP_CSV, PO_CSV
+from ingest import compact_dtypes, detect_format, read_table
+from optimizer import optimize_shipping
+from preprocessing import preprocess_data
+from solver import SolverConfig
+
+
+def write_inputs(tmp_path):
+    pd.read_csv(io.StringIO(PO_CSV)).to_parquet(tmp_path / "po.parquet")
+    feather.write_feather(pd.read_csv(io.StringIO(CAP_CSV)), tmp_path / "cap.arrow")
+    return tmp_path / "po.parquet", tmp_path / "cap.arrow"
+
+
+def test_formats_detected_from_name_or_content(tmp_path):
+    po_path, cap_path = write_inputs(tmp_path)
+    assert detect_format(po_path) == "parquet" and detect_format(cap_path) == "arrow"
+    assert detect_format(io.BytesIO(po_path.read_bytes())) == "parquet"
+    assert detect_format(io.BytesIO(cap_path.read_bytes())) == "arrow"
+    assert detect_format(io.StringIO(PO_CSV)) == "csv"
+    pd.testing.assert_frame_equal(read_table(io.BytesIO(cap_path.read_bytes())), pd.read_csv(io.StringIO(CAP_CSV)))
+
+
+def test_columnar_compact_ingest_matches_csv(tmp_path):
+    po_path, cap_path = write_inputs(tmp_path)
+    po_csv, cap_csv = preprocess_data(io.StringIO(PO_CSV), io.StringIO(CAP_CSV))
+    po_df, cap_df = preprocess_data(po_path, cap_path, compact=True)
+
+    assert isinstance(cap_df["Carrier"].dtype, pd.CategoricalDtype)
+    assert isinstance(po_df["From Port"].dtype, pd.CategoricalDtype)
+    assert po_df["To Be Shipped Quantity"].dtype == "int8"
+    pd.testing.assert_frame_equal(po_df, po_csv, check_dtype=False, check_categorical=False)
+    pd.testing.assert_frame_equal(cap_df, cap_csv, check_dtype=False, check_categorical=False)
+
+    results = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False))
+    expected = optimize_shipping(po_csv, cap_csv, solver_config=SolverConfig(msg=False))
+    assert isinstance(results["Carrier"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(results, expected, check_dtype=False, check_categorical=False)
+
+
+def test_compact_dtypes_narrow_without_losing_values():
+    df = pd.DataFrame({"a": [0.5, 2.0] * 500, "b": [0.1, 0.2] * 500, "c": [1, 300] * 500, "Carrier": ["ONE", "MSC"] * 500})
+    compacted = compact_dtypes(df)
+
+    assert compacted.dtypes.astype(str).tolist() == ["float32", "float64", "int16", "category"]
+    assert compacted.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum() / 4
+    pd.testing.assert_frame_equal(compacted, df, check_dtype=False, check_categorical=False)
@@ -0,0 +1,57 @@
+import logging
+
+from cases import make_random_case
+from heuristic import greedy_shipping
+from instrumentation import RunStats, merge_run_stats
+from optimizer import build_container_pools, optimize_shipping
+from routes import capped_routes, find_feasible_routes, route_unit_limit
+from solver import SolverConfig
+
+MIP_PHASES = ["route generation", "variable creation", "objective", "constraints", "solve", "extraction"]
+
+
+def test_optimize_shipping_records_phases_and_model_size(caplog):
+    po_df, cap_df = make_random_case(n_po=12, n_pools=4)
+    stats = RunStats(level=logging.DEBUG)
+
+    with caplog.at_level(logging.DEBUG, logger="container_optimizer"):
+        _, info = optimize_shipping(
+            po_df, cap_df, solver_config=SolverConfig(msg=False), return_info=True, stats=stats,
+            presolve=False
+        )
+
+    assert info.stats is stats
+    # This case has a pool whose lines do not pack into its containers; its re-solve
+    # runs inside the extraction phase
+    assert [phase.name for phase in stats.phases] == MIP_PHASES[:-1] + ["split re-solve", "extraction"]
+    assert all(phase.seconds >= 0 for phase in stats.phases)
+    assert stats.counters["po_lines"] == 12 and stats.counters["pools"] == 4
+    assert stats.counters["variables"] == stats.counters["routes"] + 12 + 4
+    # Demand rows, volume and weight rows per pool, and a row per route that one container caps
+    pools, _ = build_container_pools(cap_df)
+    routes = find_feasible_routes(po_df, pools)
+    capped = capped_routes(po_df, routes, route_unit_limit(po_df, pools, routes))
+    assert stats.counters["constraints"] == 12 + 2 * 4 + len(capped)
+    assert stats.counters["nonzeros"] >= stats.counters["variables"]
+    assert any("phase solve" in record.getMessage() for record in caplog.records)
+
+
+def test_merge_sums_phases_and_counters():
+    first, second = RunStats(), RunStats()
+    for stats in (first, second):
+        with stats.phase("solve"):
+            pass
+        stats.count(variables=10)
+
+    merged = merge_run_stats([first, second])
+    assert [phase.name for phase in merged.phases] == ["solve"]
+    assert merged.counters == {"variables": 20}
+    assert set(merged.to_frame().columns) >= {"name", "seconds", "rss_mb"}
+
+
+def test_greedy_reports_its_phases():
+    po_df, cap_df = make_random_case(n_po=12, n_pools=4)
+    _, info = greedy_shipping(po_df, cap_df, return_info=True)
+    assert [phase.name for phase in info.stats.phases] == [
+        "route generation", "construction", "local search", "extraction"
+    ]
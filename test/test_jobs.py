@@ -0,0 +1,89 @@
+import io
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from cases import CAP_CSV, PO_CSV
+from jobs import JobManager, QueueFull, SolveRequest, run_solve_request
+from solver import SolverConfig
+
+
+def sleep_in_subprocess(seconds, progress=None):
+    child = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({seconds})"])
+    progress.phase(str(child.pid))
+    child.wait()
+
+
+def wait_for(manager, job_id, statuses, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.status in statuses:
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} still {job.status}")
+
+
+def is_running(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+@pytest.fixture
+def manager():
+    manager = JobManager(max_workers=1, poll_interval=0.05)
+    yield manager
+    manager.shutdown()
+
+
+def test_solve_job_reports_phases_and_result(manager):
+    request = SolveRequest(solver_config=SolverConfig(msg=False))
+    job_id = manager.submit(run_solve_request, io.StringIO(PO_CSV), io.StringIO(CAP_CSV), request)
+    job = wait_for(manager, job_id, ("done", "failed"))
+
+    assert job.status == "done", job.error
+    results_df, cap_df, solve_info, plan, bad_rows = job.result
+    assert job.phase == "extraction"
+    assert results_df["Qty Assigned"].sum() == 14
+    assert plan.results_df.equals(results_df)
+    assert solve_info.stats.on_phase is None
+
+
+@pytest.mark.skipif(not hasattr(os, "killpg") or not os.path.exists("/proc"), reason="needs process groups and /proc")
+def test_cancel_kills_solver_subprocess_and_starts_next_job(manager):
+    running = manager.submit(sleep_in_subprocess, 60)
+    queued = manager.submit(sleep_in_subprocess, 0)
+    job = wait_for(manager, running, ("running",))
+    while job.phase is None:
+        time.sleep(0.05)
+    assert manager.get(queued).status == "queued"
+    assert manager.queue_position(queued) == 1
+
+    assert manager.cancel(running)
+    assert manager.get(running).status == "cancelled"
+    deadline = time.time() + 5
+    while is_running(int(job.phase)) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not is_running(int(job.phase))
+    assert wait_for(manager, queued, ("done", "failed")).status == "done"
+
+
+def test_timeout_fails_job_and_reports_finish():
+    finished = []
+    manager = JobManager(max_workers=1, poll_interval=0.05, max_queued=1, on_finish=finished.append)
+    try:
+        job_id = manager.submit(sleep_in_subprocess, 60, timeout=0.5)
+        wait_for(manager, job_id, ("running",))
+        manager.submit(sleep_in_subprocess, 0)
+        with pytest.raises(QueueFull):
+            manager.submit(sleep_in_subprocess, 0)
+        job = wait_for(manager, job_id, ("failed",))
+        assert job.error == "timed out after 0.5s"
+        assert finished[0] is job
+    finally:
+        manager.shutdown()
@@ -1,7 +1,10 @@
 import pytest
 import pandas as pd
+from cases import make_random_case
 from datetime import datetime
 from optimizer import optimize_shipping  # Replace with actual module name
+from evaluation import evaluate_assignments
+from solver import SolverConfig
 
 
 def make_po_df(data):
@@ -150,3 +153,128 @@ def test_case_5_shared_container_across_po_lines():
     results = optimize_shipping(po_df, cap_df)
     assert results["Qty Assigned"].sum() == 5
     assert results["Used Container"].sum() == 1
+
+def test_case_6_pooled_units_unpacked_per_container():
+    po_df = make_po_df([
+        {
+            "PO Number": "PO6", "PO Line Number": 1, "SKU": "SKU6A",
+            "From Port": "HK", "To Port": "LA",
+            "Export ETA": "2025-06-01", "Import ETA": "2025-06-12",
+            "To Be Shipped Quantity": 7, "Volume (m3)": 4, "Weight (kg)": 100,
+            "Priority Level": 1, "Unmet Penalty": 1000
+        },
+        {
+            "PO Number": "PO6", "PO Line Number": 2, "SKU": "SKU6B",
+            "From Port": "HK", "To Port": "LA",
+            "Export ETA": "2025-06-01", "Import ETA": "2025-06-12",
+            "To Be Shipped Quantity": 5, "Volume (m3)": 2, "Weight (kg)": 100,
+            "Priority Level": 1, "Unmet Penalty": 1000
+        }
+    ])
+    cap_df = make_cap_df([{
+        "Shipment ID": f"S6-{i}", "Base Shipment ID": "S6",
+        "From Port": "HK", "To Port": "LA",
+        "Departure Date": pd.Timestamp("2025-06-03"),
+        "Arrival Date": pd.Timestamp("2025-06-09"),
+        "Price (USD)": 600, "Max Volume (m³)": 20, "Max Weight (kg)": 2000,
+        "Carrier": "ONE", "Container Type": "20FT"
+    } for i in range(1, 5)])
+
+    po_df["Export ETA"] = pd.to_datetime(po_df["Export ETA"])
+    po_df["Import ETA"] = pd.to_datetime(po_df["Import ETA"])
+
+    results = optimize_shipping(po_df, cap_df)
+    assigned = results[results["Qty Assigned"] > 0]
+    used = assigned.assign(Vol=assigned["Qty Assigned"] * assigned["Volume (m3)"]).groupby("Shipment ID")["Vol"].sum()
+
+    assert results["Qty Assigned"].sum() == 12
+    assert results["Used Container"].sum() == 2
+    assert set(used.index) <= {"S6-1", "S6-2", "S6-3", "S6-4"}
+    assert (used <= 20).all()
+
+def make_shared_case():
+    po_df = make_po_df([
+        {
+            "PO Number": "PO7", "PO Line Number": line, "SKU": f"SKU7{line}",
+            "From Port": "HK", "To Port": "LA",
+            "Export ETA": "2025-06-01", "Import ETA": "2025-06-12",
+            "To Be Shipped Quantity": 6, "Volume (m3)": 3, "Weight (kg)": 100,
+            "Priority Level": line, "Unmet Penalty": 1000
+        } for line in (1, 2)
+    ])
+    cap_df = make_cap_df([{
+        "Shipment ID": f"S7-{i}", "Base Shipment ID": "S7",
+        "From Port": "HK", "To Port": "LA",
+        "Departure Date": pd.Timestamp("2025-06-03"),
+        "Arrival Date": pd.Timestamp("2025-06-14"),
+        "Price (USD)": 600, "Max Volume (m³)": 20, "Max Weight (kg)": 2000,
+        "Carrier": "ONE", "Container Type": "20FT"
+    } for i in range(1, 4)])
+
+    po_df["Export ETA"] = pd.to_datetime(po_df["Export ETA"])
+    po_df["Import ETA"] = pd.to_datetime(po_df["Import ETA"])
+    return po_df, cap_df
+
+@pytest.mark.parametrize("backend", ["cbc", "highs"])
+def test_case_7_solver_backends_report_status(backend):
+    if backend == "highs":
+        pytest.importorskip("highspy")
+    po_df, cap_df = make_shared_case()
+
+    config = SolverConfig(backend=backend, time_limit=30, mip_gap=0.0, threads=1, msg=False)
+    results, info = optimize_shipping(po_df, cap_df, solver_config=config, return_info=True)
+    assert results["Qty Assigned"].sum() == 12
+    assert info.status == "Optimal"
+    assert info.objective == pytest.approx(1200 + 6 * 8 + 6 * 16)
+    assert info.gap == pytest.approx(0)
+
+def test_case_8_warm_start_from_previous_results():
+    po_df, cap_df = make_shared_case()
+
+    first = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False))
+    second, info = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False),
+                                     warm_start=first, return_info=True)
+    assert second["Qty Assigned"].sum() == first["Qty Assigned"].sum()
+    assert info.objective == pytest.approx(1200 + 6 * 8 + 6 * 16)
+
+@pytest.mark.parametrize("backend,relax_and_round", [
+    ("cbc", False), ("cbc", True), ("highs-direct", False), ("highs-direct", True)
+])
+def test_case_9_route_is_capped_at_one_container_per_unit(backend, relax_and_round):
+    if backend == "highs-direct":
+        pytest.importorskip("highspy")
+    # Two 50 m³ units of A hold one 30 m³ unit each; their summed 100 m³ would take all three
+    po_df = make_po_df([{
+        "PO Number": "PO9", "PO Line Number": 1, "SKU": "SKU9",
+        "From Port": "HK", "To Port": "LA",
+        "Export ETA": pd.Timestamp("2025-06-01"), "Import ETA": pd.Timestamp("2025-06-10"),
+        "To Be Shipped Quantity": 3, "Volume (m3)": 30, "Weight (kg)": 100,
+        "Priority Level": 1, "Unmet Penalty": 5000
+    }])
+    cap_df = make_cap_df([{
+        "Shipment ID": f"{base}-{i}", "Base Shipment ID": base,
+        "From Port": "HK", "To Port": "LA",
+        "Departure Date": pd.Timestamp("2025-06-02"),
+        "Arrival Date": pd.Timestamp("2025-06-12"),
+        "Price (USD)": price, "Max Volume (m³)": 50, "Max Weight (kg)": 20000,
+        "Carrier": "ONE", "Container Type": "40FT"
+    } for base, units, price in [("A", 2, 100), ("B", 1, 400)] for i in range(1, units + 1)])
+
+    config = SolverConfig(backend=backend, relax_and_round=relax_and_round, msg=False)
+    results, info = optimize_shipping(po_df, cap_df, solver_config=config, return_info=True)
+    assert results["Unmet Qty"].sum() == 0
+    assert sorted(results["Shipment ID"]) == ["A-1", "A-2", "B-1"]
+    assert info.objective == pytest.approx(600 + 3 * 8)
+    assert evaluate_assignments(po_df, cap_df, results).objective == pytest.approx(info.objective)
+
+def test_case_10_reported_objective_is_the_returned_plan():
+    # Lines sharing a pool can fit its summed capacity but not its containers; what does not
+    # pack is re-solved, and the objective and gap are those of the plan returned
+    po_df, cap_df = make_random_case(seed=3)
+    results, info = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False), return_info=True)
+    evaluation = evaluate_assignments(po_df, cap_df, results)
+
+    assert evaluation.feasible
+    assert evaluation.objective == pytest.approx(info.objective)
+    assert info.best_bound <= info.objective
+    assert info.gap == pytest.approx((info.objective - info.best_bound) / abs(info.objective))
@@ -0,0 +1,36 @@
+import io
+import pandas as pd
+from cases import CAP_CSV, PO_CSV
+from preprocessing import expand_available_units, parse_week_year_to_date, preprocess_data
+
+
+def expand_with_iterrows(cap_df):
+    expanded_rows = []
+    for _, row in cap_df.iterrows():
+        base_id = f"{row['Week_Year']}_{row['From Port']}_{row['To Port']}_{row['Carrier']}_{row['Container Type']}"
+        for i in range(1, int(row["Available Units"]) + 1):
+            new_row = row.copy()
+            new_row["Shipment ID"] = f"{base_id}-{i}"
+            new_row["Base Shipment ID"] = base_id
+            expanded_rows.append(new_row)
+    return pd.DataFrame(expanded_rows)
+
+
+def test_preprocess_expands_units_like_row_copies():
+    po_df, cap_df = preprocess_data(io.StringIO(PO_CSV), io.StringIO(CAP_CSV))
+
+    raw = pd.read_csv(io.StringIO(CAP_CSV))
+    raw["Departure Date"] = raw["Week_Year"].apply(parse_week_year_to_date)
+    raw["Arrival Date"] = raw["Departure Date"] + pd.to_timedelta(raw["Estimated Transit Time (days)"], unit="D")
+
+    pd.testing.assert_frame_equal(cap_df, expand_with_iterrows(raw))
+    assert cap_df["Shipment ID"].tolist() == [
+        "2025-W25_HK_LA_Maersk_40FT-1", "2025-W25_HK_LA_Maersk_40FT-2", "2025-W25_HK_LA_Maersk_40FT-3",
+        "2025-W25_HK_NY_ONE_20FT-1", "2025-W25_HK_NY_ONE_20FT-2",
+    ]
+    assert po_df["Volume (m3)"].iloc[0] == 15.0 * 7.5 * 0.8 / 1e6
+
+
+def test_expand_available_units_handles_no_units():
+    raw = pd.read_csv(io.StringIO(CAP_CSV)).iloc[[1]]
+    assert expand_available_units(raw).empty
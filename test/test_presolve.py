@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+from cases import make_random_case
+from optimizer import optimize_shipping, plan_objective
+from presolve import reduce_inputs
+from solver import SolverConfig
+
+CONFIG = SolverConfig(msg=False)
+
+
+def make_reducible_case():
+    po_df, cap_df = make_random_case(seed=5, n_po=30, n_pools=6)
+    # Three copies of line 0 under other PO numbers, and a line after the last NY departure
+    copies = po_df.iloc[[0, 0, 0]].assign(**{"PO Number": ["C1", "C2", "C3"], "To Be Shipped Quantity": [4, 7, 2]})
+    late = po_df.iloc[[1]].assign(**{"PO Number": "LATE", "To Port": "NY", "Export ETA": pd.Timestamp("2025-07-30")})
+    # An LA container that leaves before every Export ETA
+    early = cap_df.iloc[[0]].assign(**{
+        "Shipment ID": "EARLY-1", "Base Shipment ID": "EARLY", "To Port": "LA",
+        "Departure Date": pd.Timestamp("2025-05-01"),
+    })
+    return pd.concat([po_df, copies, late], ignore_index=True), pd.concat([cap_df, early], ignore_index=True)
+
+
+def test_reduce_inputs_settles_merges_and_drops():
+    po_df, cap_df = make_reducible_case()
+    reduction = reduce_inputs(po_df, cap_df)
+
+    assert reduction.counts["settled_po_lines"] == 1 and reduction.group[-1] == -1
+    assert reduction.counts["merged_po_lines"] >= 3
+    assert len(set(reduction.group[[0, 30, 31, 32]])) == 1
+    assert "EARLY-1" not in set(reduction.reduced_cap["Shipment ID"])
+    assert reduction.reduced_po["To Be Shipped Quantity"].sum() == po_df["To Be Shipped Quantity"].iloc[:-1].sum()
+    assert reduction.settled_objective == po_df["Unmet Penalty"].iloc[-1] * po_df["To Be Shipped Quantity"].iloc[-1]
+
+
+def test_presolve_keeps_objective_and_reports_original_lines():
+    po_df, cap_df = make_reducible_case()
+    full, full_info = optimize_shipping(po_df, cap_df, solver_config=CONFIG, return_info=True, presolve=False)
+    reduced, info = optimize_shipping(po_df, cap_df, solver_config=CONFIG, return_info=True)
+
+    assert info.objective == pytest.approx(full_info.objective)
+    assert info.stats.counters["routes"] < full_info.stats.counters["routes"]
+    assert plan_objective(reduced) == pytest.approx(plan_objective(full))
+
+    key = ["PO Number", "PO Line Number"]
+    shipped = reduced.groupby(key)[["Qty Assigned", "Unmet Qty"]].sum().sum(axis=1)
+    expected = po_df.set_index(key)["To Be Shipped Quantity"]
+    pd.testing.assert_series_equal(shipped.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
+    assert reduced.loc[reduced["PO Number"] == "LATE", "Unmet Qty"].tolist() == [po_df["To Be Shipped Quantity"].iloc[-1]]
+
+
+def test_lane_without_containers_needs_no_solve():
+    po_df, cap_df = make_random_case(n_po=6, n_pools=2)
+    results, info = optimize_shipping(po_df, cap_df.iloc[0:0], solver_config=CONFIG, return_info=True)
+
+    assert "solve" not in [phase.name for phase in info.stats.phases]
+    assert results["Unmet Qty"].sum() == po_df["To Be Shipped Quantity"].sum()
+    assert info.objective == (po_df["To Be Shipped Quantity"] * po_df["Unmet Penalty"]).sum()
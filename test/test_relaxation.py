@@ -0,0 +1,54 @@
+import numpy as np
+import pulp
+import pytest
+from cases import make_random_case
+from instrumentation import RunStats
+from optimizer import (
+    add_constraints, build_container_pools, create_variables, optimize_shipping, pulp_relaxation_solvers,
+    route_late_penalty, set_penalty_objective
+)
+from relaxation import round_relaxation
+from routes import find_feasible_routes
+from solver import SolverConfig
+
+
+def test_rounding_respects_pool_capacity_and_demand():
+    po_df, cap_df = make_random_case(seed=2)
+    pools, _ = build_container_pools(cap_df)
+    routes = find_feasible_routes(po_df, pools)
+    model = pulp.LpProblem("m", pulp.LpMinimize)
+    variables = create_variables(po_df, pools, routes)
+    set_penalty_objective(model, po_df, pools, routes, variables)
+    add_constraints(model, po_df, pools, routes, variables)
+    solve_relaxed, _ = pulp_relaxation_solvers(model, variables, SolverConfig(msg=False))
+    (route_x, use_x, _), _ = solve_relaxed()
+
+    route_pen = route_late_penalty(po_df, pools, routes)[1]
+    route_qty, opened, unmet = round_relaxation(po_df, pools, routes, route_pen, route_x, use_x)
+    qty = po_df["To Be Shipped Quantity"].to_numpy()
+    load = route_qty * po_df["Volume (m3)"].to_numpy()[routes[:, 0]]
+    assert (np.bincount(routes[:, 1], weights=load, minlength=len(pools)) <= opened * pools["Max Volume (m³)"].to_numpy() + 1e-6).all()
+    assert (opened <= np.ceil(use_x - 1e-6)).all()
+    assert all(var.cat == pulp.LpInteger for var in variables[0])
+    assert (np.bincount(routes[:, 0], weights=route_qty, minlength=len(po_df)) + unmet == qty).all()
+    assert (unmet >= 0).all()
+
+
+@pytest.mark.parametrize("backend", ["cbc", "highs-direct"])
+def test_relax_and_round_reports_lp_bound_and_gap(backend):
+    if backend == "highs-direct":
+        pytest.importorskip("highspy")
+    po_df, cap_df = make_random_case(seed=1)
+    _, exact = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(backend=backend, msg=False), return_info=True)
+    stats = RunStats()
+    results, info = optimize_shipping(
+        po_df, cap_df, solver_config=SolverConfig(backend=backend, msg=False, relax_and_round=True),
+        return_info=True, stats=stats
+    )
+
+    assert info.lp_bound == info.best_bound <= exact.objective + 1e-6 <= info.objective + 2e-6
+    assert info.gap == pytest.approx((info.objective - info.lp_bound) / info.objective)
+    assert {"lp relaxation", "rounding"} <= set(stats.phase_seconds())
+    assert stats.counters["rounded_objective"] >= info.objective
+    shipped = results["Qty Assigned"].sum() + results["Unmet Qty"].sum()
+    assert shipped == po_df["To Be Shipped Quantity"].sum()
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+from cases import make_random_case
+from optimizer import optimize_shipping
+from results_view import ResultFilter, ResultsView
+from solver import SolverConfig
+
+
+@pytest.fixture(scope="module")
+def solved():
+    po_df, cap_df = make_random_case(seed=11, n_po=30, n_pools=6)
+    po_df["COGS"] = np.arange(len(po_df)) + 10.0
+    po_df["Product Family"] = np.where(np.arange(len(po_df)) % 3, "Toys", "Tools")
+    results = optimize_shipping(po_df, cap_df, solver_config=SolverConfig(msg=False))
+    export_date = pd.to_datetime(results["Export ETA"])
+    results["Export Year"] = export_date.dt.strftime("%Y")
+    results["Export YearMonth"] = export_date.dt.strftime("%Y-%m")
+    results["Export YearWeek"] = export_date.dt.strftime("%Y-%U")
+    return results, cap_df
+
+
+def status_of(df):
+    lines = df.groupby(["PO Number", "PO Line Number"])[["Qty Assigned", "Unmet Qty"]].sum()
+    return np.where(lines["Unmet Qty"] == 0, "Fully Met", np.where(lines["Qty Assigned"] > 0, "Partially Met", "Unmet"))
+
+
+@pytest.mark.parametrize("state", [
+    ResultFilter(),
+    ResultFilter(po_text="PO1"),
+    ResultFilter(weeks=("2025-22",)),
+    ResultFilter(po_text="PO[0-4]$", months=("2025-06",), weeks=("2025-23", "2025-24")),
+])
+def test_view_matches_filtering_the_frame(solved, state):
+    results, cap_df = solved
+    view = ResultsView(results, cap_df)
+
+    expected = results
+    if state.po_text:
+        expected = expected[expected["PO Number"].astype(str).str.contains(state.po_text)]
+    for selected, col in [(state.months, "Export YearMonth"), (state.weeks, "Export YearWeek")]:
+        if selected:
+            expected = expected[expected[col].isin(selected)]
+    used = cap_df["Shipment ID"].isin(expected["Shipment ID"].unique())
+
+    assert view.rows(state).index.equals(expected.index)
+    kpis = view.kpis(state)
+    assert kpis["Total PO Lines"] == len(expected[["PO Number", "PO Line Number"]].drop_duplicates())
+    assert kpis["Used Containers"] == expected["Shipment ID"].dropna().nunique()
+    assert kpis["Total Container Cost"] == pytest.approx(cap_df.loc[used, "Price (USD)"].sum())
+    assert kpis["Estimated Total Cost"] == pytest.approx(
+        expected["Unmet Penalty"].sum() + expected["Late Penalty"].sum() + cap_df.loc[used, "Price (USD)"].sum()
+    )
+    assert view.unused_containers(state).index.equals(cap_df.index[~used])
+
+    counts = pd.Series(status_of(expected)).value_counts()
+    fulfillment = view.fulfillment(state).set_index("Status")
+    assert fulfillment["PO Lines"].to_dict() == {s: counts.get(s, 0) for s in fulfillment.index}
+    assert fulfillment["PO Lines"].sum() == kpis["Total PO Lines"]
+
+
+def test_aggregations_are_memoized_per_filter_state(solved):
+    results, cap_df = solved
+    view = ResultsView(results, cap_df)
+    state = ResultFilter(po_text="PO")
+
+    first = view.aggregate(state, ["Carrier"], ["Qty Assigned"])
+    assert view.aggregate(ResultFilter(po_text="PO"), ["Carrier"], ["Qty Assigned"]) is first
+    assert view.kpis(state) is view.kpis(state)
+    assert first["Qty Assigned"].sum() == results["Qty Assigned"].sum()
+    # A different filter state is computed on its own
+    assert view.kpis(ResultFilter(po_text="nothing matches"))["Total PO Lines"] == 0
@@ -0,0 +1,41 @@
+import pytest
+from cases import make_random_case
+from optimizer import optimize_shipping, plan_objective
+from rolling import optimize_shipping_rolling
+from solver import SolverConfig
+
+CONFIG = SolverConfig(msg=False)
+
+
+def test_single_window_matches_full_model():
+    po_df, cap_df = make_random_case()
+    full, full_info = optimize_shipping(po_df, cap_df, solver_config=CONFIG, return_info=True)
+
+    results, info = optimize_shipping_rolling(po_df, cap_df, window_weeks=3, commit_weeks=1,
+                                              solver_config=CONFIG, return_info=True)
+
+    assert len(info.windows) == 1 and info.windows["Committed Weeks"].iloc[0] == 3
+    assert info.objective == pytest.approx(full_info.objective)
+    assert list(results.columns) == list(full.columns)
+
+
+def test_rolling_windows_commit_and_carry_forward():
+    po_df, cap_df = make_random_case()
+
+    results, info = optimize_shipping_rolling(po_df, cap_df, window_weeks=2, commit_weeks=1,
+                                              solver_config=CONFIG, return_info=True)
+
+    assert list(info.windows["Committed Weeks"]) == [1, 2]
+    assert (info.windows["Solve Time (s)"] > 0).all()
+    assert results["Qty Assigned"].sum() + results["Unmet Qty"].sum() == po_df["To Be Shipped Quantity"].sum()
+    assert info.objective == pytest.approx(plan_objective(results))
+
+    # Containers never take more than their capacity across the committed windows
+    loaded = results.assign(Vol=results["Qty Assigned"] * results["Volume (m3)"]).groupby("Shipment ID")["Vol"].sum()
+    assert (loaded <= 33.0 + 1e-6).all()
+
+
+def test_commit_weeks_must_fit_in_window():
+    po_df, cap_df = make_random_case()
+    with pytest.raises(ValueError):
+        optimize_shipping_rolling(po_df, cap_df, window_weeks=2, commit_weeks=3)
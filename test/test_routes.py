@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from routes import find_feasible_routes
+
+
+def brute_force_routes(po_df, cap_df):
+    pairs = []
+    for po_pos, (_, po) in enumerate(po_df.iterrows()):
+        for cap_pos, (_, cap) in enumerate(cap_df.iterrows()):
+            if (
+                po["From Port"] == cap["From Port"] and
+                po["To Port"] == cap["To Port"] and
+                cap["Departure Date"] >= po["Export ETA"]
+            ):
+                pairs.append((po_pos, cap_pos))
+    return sorted(pairs)
+
+
+def test_matches_nested_scan():
+    rng = np.random.default_rng(7)
+    ports = ["HK", "SZ", "LA", "NY"]
+    po_df = pd.DataFrame({
+        "From Port": rng.choice(ports[:2], 60),
+        "To Port": rng.choice(ports[2:], 60),
+        "Export ETA": pd.Timestamp("2025-06-01") + pd.to_timedelta(rng.integers(0, 30, 60), unit="D"),
+    }, index=rng.permutation(np.arange(100, 160)))
+    cap_df = pd.DataFrame({
+        "From Port": rng.choice(ports[:2], 40),
+        "To Port": rng.choice(ports[2:], 40),
+        "Departure Date": pd.Timestamp("2025-06-01") + pd.to_timedelta(rng.integers(0, 30, 40) // 7 * 7, unit="D"),
+    })
+
+    routes = find_feasible_routes(po_df, cap_df)
+    assert routes.shape[1] == 2
+    assert sorted(map(tuple, routes.tolist())) == brute_force_routes(po_df, cap_df)
+
+
+def test_missing_ports_and_empty_inputs():
+    po_df = pd.DataFrame({
+        "From Port": ["HK", None], "To Port": ["LA", "LA"],
+        "Export ETA": pd.to_datetime(["2025-06-01", "2025-06-01"]),
+    })
+    cap_df = pd.DataFrame({
+        "From Port": ["HK", None], "To Port": ["LA", "LA"],
+        "Departure Date": pd.to_datetime(["2025-06-01", "2025-06-02"]),
+    })
+
+    assert find_feasible_routes(po_df, cap_df).tolist() == [[0, 0]]
+    assert find_feasible_routes(po_df, cap_df.iloc[:0]).shape == (0, 2)
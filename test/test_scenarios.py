@@ -0,0 +1,38 @@
+import pytest
+from cases import make_random_case
+from optimizer import optimize_shipping
+from scenarios import SCENARIO_COLUMNS, penalty_grid, summarize_scenario, sweep_penalties
+from solver import SolverConfig
+
+CONFIG = SolverConfig(msg=False)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_sweep_matches_individual_solves(max_workers):
+    po_df, cap_df = make_random_case(n_po=20, n_pools=5)
+    scenarios = penalty_grid([0, 5, 50], [1, 3])
+
+    table = sweep_penalties(po_df, cap_df, scenarios, solver_config=CONFIG, max_workers=max_workers)
+
+    assert list(table.columns) == SCENARIO_COLUMNS
+    assert list(zip(table["Late Penalty per Day"], table["Priority Multiplier"])) == scenarios
+    for _, row in table.iterrows():
+        _, info = optimize_shipping(po_df, cap_df, row["Late Penalty per Day"], row["Priority Multiplier"],
+                                    solver_config=CONFIG, return_info=True)
+        assert row["Objective"] == pytest.approx(info.objective)
+        assert row["Total Cost"] == pytest.approx(info.objective)
+    # Raising the late penalty never lowers the optimal cost
+    by_penalty = table[table["Priority Multiplier"] == 1].set_index("Late Penalty per Day")["Objective"]
+    assert by_penalty.is_monotonic_increasing
+
+
+def test_summary_components_add_up():
+    po_df, cap_df = make_random_case(n_po=20, n_pools=5)
+    results, info = optimize_shipping(po_df, cap_df, solver_config=CONFIG, return_info=True)
+    summary = summarize_scenario(results)
+
+    assert summary["Total Cost"] == pytest.approx(
+        summary["Container Cost"] + summary["Late Penalty"] + summary["Unmet Penalty"]
+    )
+    assert summary["Total Cost"] == pytest.approx(info.objective)
+    assert summary["Qty Assigned"] + summary["Unmet Qty"] == po_df["To Be Shipped Quantity"].sum()
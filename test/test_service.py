@@ -0,0 +1,61 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from cases import CAP_CSV, PO_CSV
+from service import OptimizerService, ServiceConfig
+
+
+def call(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = OptimizerService(ServiceConfig(port=0, db_path=str(tmp_path / "jobs.db"), max_workers=1, job_timeout=30))
+    service.start()
+    yield service
+    service.shutdown()
+
+
+def test_submit_poll_and_page_results(service):
+    status, body = call("POST", f"{service.url}/jobs", {"po_csv": PO_CSV, "capacity_csv": CAP_CSV, "label": "t"})
+    assert status == 202
+    job_url = f"{service.url}/jobs/{body['id']}"
+
+    deadline = time.time() + 60
+    while (job := call("GET", job_url)[1])["status"] not in ("done", "failed") and time.time() < deadline:
+        time.sleep(0.1)
+    assert job["status"] == "done", job["error"]
+    assert job["params"]["time_limit"] == 30
+
+    status, page = call("GET", f"{job_url}/results?limit=2")
+    assert status == 200 and page["total"] == job["rows"]
+    rows = page["rows"]
+    while page["next_offset"] is not None:
+        page = call("GET", f"{job_url}/results?offset={page['next_offset']}&limit=2")[1]
+        rows += page["rows"]
+    assert len(rows) == job["rows"]
+    assert sum(row["Qty Assigned"] for row in rows) == 14
+
+
+def test_rejects_bad_requests(service, tmp_path):
+    assert call("POST", f"{service.url}/jobs", {"po_csv": PO_CSV})[0] == 400
+    assert call("POST", f"{service.url}/jobs", {"po_csv": PO_CSV, "capacity_csv": CAP_CSV, "engine": "x"})[0] == 400
+    assert call("GET", f"{service.url}/jobs/abc123")[0] == 404
+    assert call("GET", f"{service.url}/health")[1]["running"] == 0
+
+    full = OptimizerService(ServiceConfig(port=0, db_path=str(tmp_path / "full.db"), max_queued=0))
+    full.start()
+    try:
+        assert call("POST", f"{full.url}/jobs", {"po_csv": PO_CSV, "capacity_csv": CAP_CSV})[0] == 429
+    finally:
+        full.shutdown()
@@ -0,0 +1,85 @@
+import io
+
+import pandas as pd
+import pytest
+from cases import CAP_CSV, PO_CSV
+from decomposition import optimize_shipping_by_lane
+from preprocessing import prepare_capacity, preprocess_data
+from solver import SolverConfig
+from streaming import (
+    ChunkedPOReader, optimize_po_stream_by_lane, partition_by_lane, read_po_csv_chunked
+)
+
+HEADER = PO_CSV.splitlines()[0]
+ROW = "PO{n},1,SKU1,Widget,Tools,0,20,HK,{to},15/06/2025,25/06/2025,5,50.0,40.0,30.0,8.0,1,500"
+
+
+def make_po_csv(rows):
+    return io.StringIO("\n".join([HEADER] + rows) + "\n")
+
+
+def test_missing_header_column_fails_before_parsing_rows():
+    source = io.StringIO(PO_CSV.replace("Unmet Penalty", "Penalty"))
+    with pytest.raises(ValueError, match="Unmet Penalty"):
+        ChunkedPOReader(source)
+    assert source.tell() == 0
+
+
+def test_chunked_ingest_matches_full_preprocess():
+    rows = [ROW.format(n=n, to="LA" if n % 2 else "NY") for n in range(7)]
+    expected, _ = preprocess_data(make_po_csv(rows), io.StringIO(CAP_CSV))
+    po_df, bad_rows = read_po_csv_chunked(make_po_csv(rows), chunksize=3)
+
+    assert bad_rows.empty
+    pd.testing.assert_frame_equal(po_df, expected)
+
+
+def test_compact_chunks_keep_categorical_dtypes():
+    # Each chunk holds a different port, so each chunk's categories differ
+    rows = [ROW.format(n=n, to="LA" if n < 3 else "NY") for n in range(7)]
+    expected, _ = preprocess_data(make_po_csv(rows), io.StringIO(CAP_CSV), compact=True)
+    po_df, _ = read_po_csv_chunked(make_po_csv(rows), chunksize=3, compact=True)
+
+    assert isinstance(po_df["To Port"].dtype, pd.CategoricalDtype)
+    assert list(po_df["To Port"].cat.categories) == ["LA", "NY"]
+    pd.testing.assert_frame_equal(po_df, expected)
+
+
+def test_bad_rows_are_reported_with_line_numbers():
+    rows = [ROW.format(n=n, to="LA") for n in range(6)]
+    rows[1] = rows[1].replace(",5,50.0", ",five,50.0")
+    rows[2] = rows[2].replace("15/06/2025", "2025-06-15")
+    rows[3] = rows[3] + ",extra"
+    rows[4] = rows[4].replace(",HK,", ",,")
+    po_df, bad_rows = read_po_csv_chunked(make_po_csv(rows), chunksize=2)
+
+    assert po_df["PO Number"].tolist() == ["PO0", "PO5"]
+    assert bad_rows["Line"].tolist() == [3, 4, 5, 6]
+    assert bad_rows["Column"].tolist()[:2] == ["To Be Shipped Quantity", "Export ETA"]
+    assert bad_rows.loc[3, "Column"] == "From Port"
+
+
+def test_lanes_stream_out_when_sorted():
+    rows = [ROW.format(n=n, to=to) for n, to in enumerate(["LA", "LA", "LA", "NY", "NY"])]
+    reader = ChunkedPOReader(make_po_csv(rows), chunksize=2)
+    seen = []
+    for lane, po_sub in partition_by_lane(reader, sorted_by_lane=True):
+        seen.append((lane, len(po_sub), reader.rows_read))
+
+    assert seen == [(("HK", "LA"), 3, 4), (("HK", "NY"), 2, 5)]
+
+
+def test_stream_solve_matches_solve_by_lane():
+    rows = [ROW.format(n=n, to="LA" if n % 3 else "NY") for n in range(6)]
+    cap_df = prepare_capacity(pd.read_csv(io.StringIO(CAP_CSV)))
+    po_df, _ = read_po_csv_chunked(make_po_csv(rows))
+    config = SolverConfig(msg=False)
+
+    expected, expected_info = optimize_shipping_by_lane(po_df, cap_df, solver_config=config, return_info=True)
+    results, bad_rows, info = optimize_po_stream_by_lane(
+        make_po_csv(rows), cap_df, solver_config=config, chunksize=2, max_workers=2, return_info=True
+    )
+
+    assert bad_rows.empty
+    assert info.objective == pytest.approx(expected_info.objective)
+    assert results["Qty Assigned"].sum() == expected["Qty Assigned"].sum()